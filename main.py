@@ -2,7 +2,14 @@ import argparse
 import os
 from loguru import logger
 from xiaohongshu_mcp_py.app_server import AppServer
-from xiaohongshu_mcp_py.service import XiaohongshuService
+from xiaohongshu_mcp_py.executor import BrowserExecutor
+from xiaohongshu_mcp_py.process_executor import ProcessBrowserExecutor
+
+
+def create_service():
+    """在工作线程或工作进程中创建服务，Playwright 等较重的依赖在这里才导入，不拖慢服务启动"""
+    from xiaohongshu_mcp_py.service import XiaohongshuService
+    return XiaohongshuService()
 
 
 def main():
@@ -10,23 +17,131 @@ def main():
     parser = argparse.ArgumentParser(description='Xiaohongshu MCP Service')
     parser.add_argument('--headless', type=bool, default=True, help='是否使用无头模式')
     parser.add_argument('--bin', type=str, default='', help='浏览器二进制文件路径')
+    parser.add_argument('--pool-size', type=int, default=1, help='异步服务的页面池大小，同步服务每个工作线程只使用一个页面')
+    parser.add_argument('--contexts', type=int, default=1, help='异步服务页面池使用的浏览器上下文数量')
+    parser.add_argument('--pool-timeout', type=float, default=30, help='等待空闲页面的超时时间（秒）')
+    parser.add_argument('--workers', type=int, default=1, help='浏览器工作线程数量，每个线程拥有独立的浏览器')
+    parser.add_argument('--processes', type=int, default=0, help='浏览器工作进程数量，大于 0 时使用多进程执行器代替工作线程')
+    parser.add_argument('--queue-size', type=int, default=64, help='任务队列容量，队列满时返回503')
+    parser.add_argument('--job-deadline', type=float, default=120, help='任务默认截止时间（秒）')
+    parser.add_argument('--wait-timeout', type=float, default=3, help='页面就绪等待的上限（秒）')
+    parser.add_argument('--extract-mode', type=str, default='auto', choices=['auto', 'dom'], help='数据提取方式：auto 优先读取页面初始状态，dom 只解析页面元素')
+    parser.add_argument('--no-block-resources', action='store_true', help='关闭抓取接口的图片、视频、字体和统计脚本拦截')
+    parser.add_argument('--resource-profiles', type=str, default='', help='按接口覆盖资源拦截配置，如 "get_feeds=full,get_note_detail=scrape"')
+    parser.add_argument('--storage-state', type=str, default='storage_state.json', help='登录会话保存路径，为空时不保存')
+    parser.add_argument('--login-cache-ttl', type=float, default=300, help='登录状态缓存有效期（秒），为 0 时每次都打开页面检查')
+    parser.add_argument('--no-result-cache', action='store_true', help='关闭推荐列表、搜索和笔记详情的结果缓存')
+    parser.add_argument('--result-cache-ttls', type=str, default='', help='按接口覆盖结果缓存有效期（秒），如 get_feeds=30,get_note_detail=3600')
+    parser.add_argument('--result-cache-size', type=int, default=1024, help='结果缓存最大条目数')
+    parser.add_argument('--result-cache-bytes', type=int, default=64 * 1024 * 1024, help='结果缓存最大占用字节数')
+    parser.add_argument('--result-cache-stale', type=float, default=300, help='缓存过期后仍返回旧结果并在后台刷新的时长（秒）')
+    parser.add_argument('--note-store', type=str, default='', help='本地笔记存储（SQLite）路径，为空时不保存抓取到的笔记')
+    parser.add_argument('--feed-sessions', type=int, default=2, help='推荐列表游标分页会话数量上限（每个工作线程）')
+    parser.add_argument('--feed-session-ttl', type=float, default=600, help='游标分页会话空闲关闭时间（秒）')
+    parser.add_argument('--feed-session-max-notes', type=int, default=2000, help='单个游标分页会话最多收集的笔记数')
+    parser.add_argument('--note-details-concurrency', type=int, default=4, help='批量获取笔记详情的最大并发数')
+    parser.add_argument('--page-max-uses', type=int, default=200, help='单个页面使用多少次后换用新页面，为 0 时不限制')
+    parser.add_argument('--page-max-heap-mb', type=float, default=512, help='单个页面 JS 堆超过该值（MB）时换用新页面')
+    parser.add_argument('--browser-max-uses', type=int, default=2000, help='浏览器执行多少次操作后重启，为 0 时不限制')
+    parser.add_argument('--browser-max-heap-mb', type=float, default=2048, help='所有页面 JS 堆合计超过该值（MB）时重启浏览器')
+    parser.add_argument('--browser-max-error-rate', type=float, default=0.8, help='最近 20 个任务的失败率达到该值时重启浏览器，为 0 时不检查')
+    parser.add_argument('--accounts', type=str, default='', help='账号列表，逗号分隔，可用 名称:每分钟请求数 单独指定预算，如 "alice,bob:60"')
+    parser.add_argument('--account-rate', type=float, default=0, help='每个账号每分钟的请求数，为 0 时不限制')
+    parser.add_argument('--account-strategy', type=str, default='round_robin', choices=['round_robin', 'lru'], help='未指定账号时的选择方式：round_robin 轮询，lru 最久未使用')
+    parser.add_argument('--account-budget-wait', type=float, default=5, help='所有账号预算用完时最多等待的秒数，超过后返回429')
+    parser.add_argument('--lazy-launch', action='store_true', help='延迟到第一个请求到达时才启动浏览器，适合按需启动的部署')
+    parser.add_argument('--no-prewarm', action='store_true', help='关闭页面预热，搜索和笔记详情每次都完整加载页面')
+    parser.add_argument('--navigation-rate', type=float, default=60, help='初始的每分钟页面导航次数，之后根据错误率和验证页面自动调整，为 0 时不限速')
+    parser.add_argument('--navigation-min-rate', type=float, default=6, help='自动调整的每分钟导航次数下限')
+    parser.add_argument('--navigation-max-rate', type=float, default=240, help='自动调整的每分钟导航次数上限')
+    parser.add_argument('--navigation-retries', type=int, default=2, help='导航超时或临时网络错误时的最多重试次数')
+    parser.add_argument('--captcha-pause', type=float, default=30, help='遇到验证页面后暂停导航的秒数')
+    parser.add_argument('--async-server', action='store_true', help='使用基于 asyncio 的异步服务（需要安装 uvicorn）')
     args = parser.parse_args()
     
     # 初始化配置
     os.environ['HEADLESS_MODE'] = str(args.headless).lower()
     if args.bin:
         os.environ['BROWSER_BIN_PATH'] = args.bin
+    os.environ['PAGE_POOL_SIZE'] = str(args.pool_size)
+    os.environ['CONTEXT_POOL_SIZE'] = str(args.contexts)
+    os.environ['PAGE_POOL_WAIT_TIMEOUT'] = str(args.pool_timeout)
+    os.environ['WAIT_UPPER_BOUND'] = str(args.wait_timeout)
+    os.environ['EXTRACT_MODE'] = args.extract_mode
+    os.environ['RESOURCE_BLOCKING'] = str(not args.no_block_resources).lower()
+    os.environ['STORAGE_STATE_PATH'] = args.storage_state
+    os.environ['LOGIN_CACHE_TTL'] = str(args.login_cache_ttl)
+    os.environ['RESULT_CACHE'] = 'false' if args.no_result_cache else 'true'
+    if args.result_cache_ttls:
+        os.environ['RESULT_CACHE_TTLS'] = args.result_cache_ttls
+    os.environ['RESULT_CACHE_MAX_ENTRIES'] = str(args.result_cache_size)
+    os.environ['RESULT_CACHE_MAX_BYTES'] = str(args.result_cache_bytes)
+    os.environ['RESULT_CACHE_STALE_TTL'] = str(args.result_cache_stale)
+    os.environ['NOTE_STORE_PATH'] = args.note_store
+    os.environ['FEED_SESSION_LIMIT'] = str(args.feed_sessions)
+    os.environ['FEED_SESSION_TTL'] = str(args.feed_session_ttl)
+    os.environ['FEED_SESSION_MAX_NOTES'] = str(args.feed_session_max_notes)
+    os.environ['NOTE_DETAILS_CONCURRENCY'] = str(args.note_details_concurrency)
+    os.environ['BROWSER_PAGE_MAX_USES'] = str(args.page_max_uses)
+    os.environ['BROWSER_PAGE_MAX_HEAP_MB'] = str(args.page_max_heap_mb)
+    os.environ['BROWSER_MAX_USES'] = str(args.browser_max_uses)
+    os.environ['BROWSER_MAX_HEAP_MB'] = str(args.browser_max_heap_mb)
+    os.environ['BROWSER_MAX_ERROR_RATE'] = str(args.browser_max_error_rate)
+    os.environ['ACCOUNTS'] = args.accounts
+    os.environ['ACCOUNT_RATE'] = str(args.account_rate)
+    os.environ['ACCOUNT_STRATEGY'] = args.account_strategy
+    os.environ['ACCOUNT_BUDGET_WAIT'] = str(args.account_budget_wait)
+    os.environ['BROWSER_LAZY_LAUNCH'] = str(args.lazy_launch).lower()
+    os.environ['PAGE_PREWARM'] = 'false' if args.no_prewarm else 'true'
+    os.environ['NAVIGATION_RATE'] = str(args.navigation_rate)
+    os.environ['NAVIGATION_MIN_RATE'] = str(args.navigation_min_rate)
+    os.environ['NAVIGATION_MAX_RATE'] = str(args.navigation_max_rate)
+    os.environ['NAVIGATION_RETRIES'] = str(args.navigation_retries)
+    os.environ['NAVIGATION_CAPTCHA_PAUSE'] = str(args.captcha_pause)
+    # 多进程模式下各进程平分导航速率和未指定账号的请求预算
+    os.environ['BROWSER_PROCESSES'] = str(max(1, args.processes))
+    if args.resource_profiles:
+        os.environ['RESOURCE_PROFILES'] = args.resource_profiles
+    
+    if args.async_server:
+        run_async_server()
+        return
     
-    # 初始化服务
-    xiaohongshu_service = XiaohongshuService()
+    if args.pool_size > 1 or args.contexts > 1:
+        logger.warning("--pool-size 和 --contexts 只对异步服务生效，同步服务请通过 --workers 或 --processes 提高并发")
     
-    # 创建并启动应用服务器
-    app_server = AppServer(xiaohongshu_service)
+    # 初始化浏览器执行器，浏览器在工作线程或工作进程中创建
+    executor_class = ProcessBrowserExecutor if args.processes > 0 else BrowserExecutor
+    executor = executor_class(
+        create_service,
+        workers=args.processes if args.processes > 0 else args.workers,
+        queue_size=args.queue_size,
+        default_deadline=args.job_deadline
+    )
+    
+    # 创建并启动应用服务器，浏览器在后台启动，启动完成前 /ready 返回503
     try:
+        executor.start(wait=False)
+        app_server = AppServer(executor=executor)
         logger.info("正在启动小红书MCP服务，端口: 18060")
         app_server.start("0.0.0.0", 18060)
     except Exception as e:
         logger.error(f"启动服务器失败: {str(e)}")
+    finally:
+        executor.shutdown()
+
+
+def run_async_server():
+    """启动异步服务，浏览器在 ASGI lifespan 启动阶段于后台启动"""
+    from xiaohongshu_mcp_py.aio.app_server import AsyncAppServer
+    from xiaohongshu_mcp_py.aio.service import AsyncXiaohongshuService
+    
+    app_server = AsyncAppServer(AsyncXiaohongshuService())
+    try:
+        logger.info("正在启动小红书MCP异步服务，端口: 18060")
+        app_server.start("0.0.0.0", 18060)
+    except Exception as e:
+        logger.error(f"启动服务器失败: {str(e)}")
 
 
 if __name__ == '__main__':
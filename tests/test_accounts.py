@@ -0,0 +1,82 @@
+import pytest
+from xiaohongshu_mcp_py import accounts
+from xiaohongshu_mcp_py.accounts import Account, AccountRegistry, RateBudget, UnknownAccountError, account_worker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.delenv('BROWSER_PROCESSES', raising=False)
+    monkeypatch.delenv('BROWSER_PROCESS_INDEX', raising=False)
+    # 每个测试使用独立的进程内共用预算
+    monkeypatch.setattr(RateBudget, '_shared', {})
+    clock = FakeClock()
+    monkeypatch.setattr(accounts.time, 'monotonic', clock)
+    return clock
+
+
+def test_budget_refills_per_minute(clock):
+    budget = RateBudget(2)
+    assert budget.try_acquire() == 0
+    assert budget.try_acquire() == 0
+    assert budget.try_acquire() == pytest.approx(30)
+    clock.now += 30
+    assert budget.try_acquire() == 0
+    assert budget.stats()["throttled_total"] == 1
+
+
+def test_fractional_rate_allows_one_request(clock):
+    budget = RateBudget(0.5)
+    assert budget.available() == 1
+    assert budget.try_acquire() == 0
+    # 每分钟 0.5 次，两分钟后才能再次请求
+    assert budget.try_acquire() == pytest.approx(120)
+    clock.now += 120
+    assert budget.try_acquire() == 0
+
+
+def test_unlimited_budget(clock):
+    budget = RateBudget(0)
+    assert all(budget.try_acquire() == 0 for _ in range(100))
+    assert budget.available() is None
+
+
+def test_account_worker_is_stable():
+    assert account_worker("alice", 4) == account_worker("alice", 4)
+    assert 0 <= account_worker("bob", 3) < 3
+    assert account_worker("alice", 0) == 0
+
+
+def test_pinned_account_keeps_full_budget_in_its_process(clock, monkeypatch):
+    monkeypatch.setenv('BROWSER_PROCESSES', '2')
+    owner = account_worker("alice", 2)
+
+    # 指定账号的请求都由所属进程执行，该进程不平分预算
+    monkeypatch.setenv('BROWSER_PROCESS_INDEX', str(owner))
+    assert RateBudget.shared("alice", 1).rate == 1
+
+    monkeypatch.setattr(RateBudget, '_shared', {})
+    monkeypatch.setenv('BROWSER_PROCESS_INDEX', str(1 - owner))
+    budget = RateBudget.shared("alice", 1)
+    assert budget.rate == 0.5
+    assert budget.try_acquire() == 0
+
+
+def test_registry_reserves_named_and_rotates_accounts(clock):
+    alice, bob = Account("alice", "", 1), Account("bob", "", 0)
+    registry = AccountRegistry([alice, bob], strategy='round_robin', wait=0)
+
+    assert registry.reserve("alice") == (alice, 0)
+    account, wait = registry.reserve("alice")
+    assert account is None and wait == pytest.approx(60)
+    # 未指定账号时跳过没有预算的账号
+    assert [registry.reserve()[0] for _ in range(3)] == [bob, bob, bob]
+    with pytest.raises(UnknownAccountError):
+        registry.reserve("carol")
@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from xiaohongshu_mcp_py.aio.service import AsyncXiaohongshuService
+
+
+class FakeService:
+    def __init__(self, fail=False):
+        """只记录浏览器维护调用的服务"""
+        self.fail = fail
+        self.calls = []
+
+    async def start(self):
+        self.calls.append("start")
+
+    async def maintain(self, failed=None):
+        self.calls.append(("maintain", failed))
+
+    async def stream_feeds(self, limit=100):
+        try:
+            yield "note", {"note_id": "a"}
+            if self.fail:
+                raise RuntimeError("页面已崩溃")
+            yield "end", {"total_count": 1}
+        finally:
+            self.calls.append("closed")
+
+
+def run_stream(service, close_after=None):
+    async def main():
+        events = []
+        stream = AsyncXiaohongshuService.run_stream(service, 'stream_feeds', limit=1)
+        async for event in stream:
+            events.append(event)
+            if close_after and len(events) == close_after:
+                await stream.aclose()
+                break
+        return events
+
+    return asyncio.run(main())
+
+
+def test_stream_is_maintained_before_and_after():
+    service = FakeService()
+    assert [kind for kind, _ in run_stream(service)] == ["note", "end"]
+    # 生成器关闭（页面归还）后再检查浏览器健康状态
+    assert service.calls == ["start", ("maintain", None), "closed", ("maintain", False)]
+
+
+def test_stream_failure_is_recorded():
+    service = FakeService(fail=True)
+    with pytest.raises(RuntimeError):
+        run_stream(service)
+    assert service.calls[-1] == ("maintain", True)
+
+
+def test_client_disconnect_is_not_a_failure():
+    service = FakeService()
+    assert len(run_stream(service, close_after=1)) == 1
+    assert service.calls[-2:] == ["closed", ("maintain", False)]
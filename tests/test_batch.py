@@ -0,0 +1,64 @@
+import pytest
+from xiaohongshu_mcp_py.batch import MAX_BATCH_IDS, parse_batch, effective_concurrency, batch_item, batch_summary
+
+
+@pytest.fixture(autouse=True)
+def concurrency_limit(monkeypatch):
+    monkeypatch.setenv('NOTE_DETAILS_CONCURRENCY', '4')
+
+
+def test_parse_batch_defaults_to_configured_limit():
+    assert parse_batch({"note_ids": [" a ", "b", "c", "d", "e"]}) == (["a", "b", "c", "d", "e"], 4)
+
+
+def test_parse_batch_clamps_concurrency():
+    ids = ["a", "b", "c", "d", "e", "f"]
+    assert parse_batch({"note_ids": ids, "concurrency": 2})[1] == 2
+    assert parse_batch({"note_ids": ids, "concurrency": 100})[1] == 4
+    assert parse_batch({"note_ids": ids, "concurrency": -1})[1] == 1
+    assert parse_batch({"note_ids": ids, "concurrency": "3"})[1] == 3
+    # 不超过笔记数
+    assert parse_batch({"note_ids": ["a", "b"], "concurrency": 4})[1] == 2
+
+
+@pytest.mark.parametrize("data", [
+    None,
+    [],
+    {},
+    {"note_ids": []},
+    {"note_ids": "a,b"},
+    {"note_ids": ["a", " "]},
+    {"note_ids": ["a"] * (MAX_BATCH_IDS + 1)},
+    {"note_ids": ["a"], "concurrency": "many"},
+    {"note_ids": ["a"], "concurrency": [2]}
+])
+def test_parse_batch_rejects_invalid_bodies(data):
+    with pytest.raises(ValueError):
+        parse_batch(data)
+
+
+def test_effective_concurrency():
+    assert effective_concurrency(4, 2, "工作线程数") == 2
+    assert effective_concurrency(2, 8, "工作线程数") == 2
+    assert effective_concurrency(3, 0, "页面池大小") == 1
+
+
+def test_batch_item_treats_result_error_as_failure():
+    assert batch_item(0, "a", {"detail": {}}, cache="hit") == {
+        "index": 0, "note_id": "a", "success": True, "data": {"detail": {}}, "cache": "hit"
+    }
+    assert batch_item(1, "b", {"error": "笔记不存在"}) == {"index": 1, "note_id": "b", "success": False, "error": "笔记不存在"}
+    assert batch_item(2, "c", error="超时")["success"] is False
+
+
+def test_batch_summary_reports_requested_and_effective_concurrency():
+    items = [batch_item(0, "a", {}), batch_item(1, "b", error="超时")]
+    summary = batch_summary(items, 12.5, 1, 4)
+    assert summary == {
+        "total_count": 2,
+        "failed_count": 1,
+        "concurrency": 1,
+        "requested_concurrency": 4,
+        "elapsed_ms": 12.5
+    }
+    assert batch_summary(items, 1, 2)["requested_concurrency"] == 2
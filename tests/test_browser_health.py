@@ -0,0 +1,146 @@
+import pytest
+from xiaohongshu_mcp_py.browser_health import BrowserHealth
+from xiaohongshu_mcp_py.executor import invoke
+
+
+class FakeEmitter:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def emit(self, event):
+        self.handlers[event]()
+
+
+def make_health(**kwargs):
+    options = {"page_max_uses": 3, "page_max_heap_mb": 100, "browser_max_uses": 10,
+               "browser_max_heap_mb": 150, "max_error_rate": 0.5, "window": 10, "sample_every": 2}
+    options.update(kwargs)
+    return BrowserHealth(**options)
+
+
+def test_page_is_recycled_after_max_uses_or_heap():
+    health = make_health()
+    page = FakeEmitter()
+    health.watch_page(page)
+    assert health.record_use(page) is None
+    # 每使用 2 次读取一次内存
+    assert health.should_sample(page)
+    assert health.record_use(page, heap_bytes=120 * 1024 * 1024) == "JS 堆占用 120.0MB"
+    assert health.record_use(page) == "已使用 3 次"
+
+
+def test_crashes_trigger_restart():
+    health = make_health()
+    browser, page = FakeEmitter(), FakeEmitter()
+    health.watch_browser(browser)
+    health.watch_page(page)
+
+    page.emit('crash')
+    assert health.record_use(page) == "渲染进程崩溃"
+    assert health.restart_reason() is None
+    browser.emit('disconnected')
+    assert health.restart_reason() == "浏览器已断开连接"
+    assert health.crash_count == 2
+
+
+def test_closing_browser_is_not_a_crash():
+    health = make_health()
+    browser = FakeEmitter()
+    health.watch_browser(browser)
+    health.begin_close()
+    browser.emit('disconnected')
+    assert health.crash_count == 0
+    assert health.restart_reason() is None
+
+
+def test_error_rate_and_browser_limits():
+    health = make_health()
+    for failed in [True, False] * 5:
+        health.record_outcome(failed)
+    assert health.restart_reason() == "最近 10 个任务失败率 50%"
+
+    health = make_health(max_error_rate=0)
+    pages = [FakeEmitter(), FakeEmitter()]
+    for page in pages:
+        health.watch_page(page)
+        health.record_use(page, heap_bytes=80 * 1024 * 1024)
+    assert health.restart_reason() == "页面 JS 堆合计 160.0MB"
+
+
+def test_reset_before_relaunch_keeps_new_pages_sampled():
+    health = make_health()
+    old = FakeEmitter()
+    health.watch_page(old)
+    health.begin_close()
+
+    # 与 restart_browser 相同: 关闭旧浏览器后清空计数，再登记新浏览器的页面
+    health.reset()
+    new = FakeEmitter()
+    health.watch_page(new)
+    health.record_use(new)
+    assert health.should_sample(new)
+    assert health.stats()["browser_restarts_total"] == 1
+    assert health.stats()["page_heap_mb"] == [0.0]
+
+
+def test_forget_counts_only_recycled_pages():
+    health = make_health()
+    pages = [FakeEmitter(), FakeEmitter()]
+    for page in pages:
+        health.watch_page(page)
+    health.forget(pages[0])
+    health.forget(pages[1], recycled=False)
+    assert health.stats()["page_recycles_total"] == 1
+
+
+class FakeService:
+    def __init__(self, crash_on_first=True, error=None):
+        """第一次执行时模拟浏览器崩溃的服务"""
+        self.health = make_health()
+        self.crash_on_first = crash_on_first
+        self.error = error
+        self.calls = 0
+        self.maintained = []
+
+    def maintain(self, failed=None):
+        self.maintained.append(failed)
+
+    def get_feeds(self):
+        return self._run()
+
+    def publish_content(self):
+        return self._run()
+
+    def _run(self):
+        self.calls += 1
+        if self.calls == 1 and self.crash_on_first:
+            self.health.crash_count += 1
+            if self.error:
+                raise self.error
+            return {"error": "页面已崩溃"}
+        return {"feeds": []}
+
+
+def test_invoke_reruns_read_only_jobs_after_crash():
+    service = FakeService(error=RuntimeError("Target closed"))
+    assert invoke(service, 'get_feeds', (), {}) == {"feeds": []}
+    assert service.calls == 2
+    assert service.maintained == [None, True]
+    assert service.health.stats()["reruns_total"] == 1
+
+
+def test_invoke_does_not_rerun_jobs_with_side_effects():
+    service = FakeService(error=RuntimeError("Target closed"))
+    with pytest.raises(RuntimeError):
+        invoke(service, 'publish_content', (), {})
+    assert service.calls == 1
+    assert service.maintained == [None, True]
+
+
+def test_invoke_records_success():
+    service = FakeService(crash_on_first=False)
+    assert invoke(service, 'get_feeds', (), {}) == {"feeds": []}
+    assert service.maintained == [None, False]
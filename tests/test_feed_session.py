@@ -0,0 +1,66 @@
+import pytest
+from xiaohongshu_mcp_py import feed_session
+from xiaohongshu_mcp_py.feed_session import FeedCursorError, FeedSession, FeedSessionsBase, encode_cursor, parse_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(3, "3f9a1c2b7d4e", 40)
+    assert cursor == "3.3f9a1c2b7d4e.40"
+    assert parse_cursor(cursor) == (3, "3f9a1c2b7d4e", 40)
+
+
+def test_negative_offset_is_clamped():
+    assert parse_cursor("0.abc.-5") == (0, "abc", 0)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "0.abc", "0.abc.20.1", "x.abc.20", "0.abc.twenty"])
+def test_invalid_cursor_raises(cursor):
+    with pytest.raises(FeedCursorError):
+        parse_cursor(cursor)
+
+
+def test_cursor_error_is_value_error():
+    # 接口把 ValueError 转换为 400
+    assert issubclass(FeedCursorError, ValueError)
+
+
+def test_session_dedupes_cards_and_stops_at_max_notes():
+    session = FeedSession(page=None, capture=None, max_notes=3)
+    assert session.add_cards([{"note_id": "a"}, {"note_id": "b"}, {"note_id": "a"}, {"note_id": None}]) == 2
+    assert session.add_cards([{"note_id": "b"}, {"note_id": "c"}, {"note_id": "d"}]) == 1
+    assert [card["note_id"] for card in session.items] == ["a", "b", "c"]
+    assert session.full
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sessions_expire_and_evict_least_recently_used(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(feed_session.time, 'monotonic', clock)
+    closed = []
+    sessions = FeedSessionsBase(max_sessions=2, ttl=60, max_notes=100, on_close=closed.append)
+
+    first, second = FeedSession("page-1", None, 100), FeedSession("page-2", None, 100)
+    sessions._register(first)
+    clock.now += 10
+    sessions._register(second)
+
+    # 为新会话腾出位置时关闭最久未使用的会话
+    assert sessions._stale(reserve=1) == [first]
+    clock.now += 5
+    assert sessions.get(first.id) is first
+    assert sessions._stale(reserve=1) == [second]
+
+    clock.now += 61
+    assert sessions.get(second.id) is None
+    assert set(sessions._stale()) == {first, second}
+
+    sessions._unregister(first)
+    assert closed == ["page-1"]
+    assert sessions.stats()["closed_total"] == 1
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from xiaohongshu_mcp_py import metrics
+from xiaohongshu_mcp_py.metrics import MetricsRegistry, StageTimer, collect_samples, instrument, merge, render
+
+
+def parse(text):
+    """将 Prometheus 文本解析为 {样本行左侧: 值}，跳过注释"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_render_counters_and_cumulative_histogram():
+    registry = MetricsRegistry(buckets=(0.1, 1))
+    registry.inc('xhs_action_timeouts_total', action='search_content', stage='goto')
+    registry.inc('xhs_action_timeouts_total', action='search_content', stage='goto')
+    for value in (0.05, 0.5, 5):
+        registry.observe('xhs_http_request_duration_seconds', value, route='/api/v1/feeds', method='GET', status=200)
+
+    text = render(registry.snapshot())
+    samples = parse(text)
+    assert samples['xhs_action_timeouts_total{action="search_content",stage="goto"}'] == 2
+    labels = 'method="GET",route="/api/v1/feeds",status="200"'
+    assert samples[f'xhs_http_request_duration_seconds_bucket{{{labels},le="0.1"}}'] == 1
+    assert samples[f'xhs_http_request_duration_seconds_bucket{{{labels},le="1"}}'] == 2
+    assert samples[f'xhs_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 3
+    assert samples[f'xhs_http_request_duration_seconds_count{{{labels}}}'] == 3
+    assert samples[f'xhs_http_request_duration_seconds_sum{{{labels}}}'] == pytest.approx(5.55)
+    assert '# TYPE xhs_http_request_duration_seconds histogram' in text
+    assert '# TYPE xhs_action_timeouts_total counter' in text
+    # 没有数据的指标不输出
+    assert 'xhs_browser_heap_bytes' not in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc('xhs_extraction_failures_total', action='a"b\\c\nd')
+    assert 'xhs_extraction_failures_total{action="a\\"b\\\\c\\nd"} 1' in render(registry.snapshot())
+
+
+def test_merge_adds_process_snapshots():
+    first, second = MetricsRegistry(buckets=(1,)), MetricsRegistry(buckets=(1,))
+    first.inc('xhs_extraction_failures_total', action='get_feeds')
+    second.inc('xhs_extraction_failures_total', action='get_feeds', value=2)
+    second.inc('xhs_extraction_failures_total', action='search_content')
+    first.observe('xhs_action_stage_duration_seconds', 0.5, action='get_feeds', stage='goto')
+    second.observe('xhs_action_stage_duration_seconds', 2, action='get_feeds', stage='goto')
+
+    samples = parse(render(merge([first.snapshot(), None, second.snapshot()])))
+    assert samples['xhs_extraction_failures_total{action="get_feeds"}'] == 3
+    assert samples['xhs_extraction_failures_total{action="search_content"}'] == 1
+    labels = 'action="get_feeds",stage="goto"'
+    assert samples[f'xhs_action_stage_duration_seconds_bucket{{{labels},le="1"}}'] == 1
+    assert samples[f'xhs_action_stage_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 2
+    assert samples[f'xhs_action_stage_duration_seconds_sum{{{labels}}}'] == 2.5
+
+
+def test_merge_does_not_modify_snapshots():
+    registry = MetricsRegistry(buckets=(1,))
+    registry.observe('xhs_action_stage_duration_seconds', 0.5, action='a', stage='goto')
+    snapshot = registry.snapshot()
+    merge([snapshot, snapshot])
+    assert list(snapshot["histograms"].values())[0][2] == 1
+
+
+def test_collect_samples():
+    executor_stats = {"workers": 2, "busy_workers": 1, "queue_depth": 3, "queue_size": 64, "rejected_total": 4, "expired_total": 0}
+    pool_stats = [{"worker_id": 1, "size": 1, "in_use": 1, "waiting": 0, "wait_timeouts_total": 0,
+                   "health": {"page_heap_mb": [1.5, 0.5], "crashes_total": 1, "browser_restarts_total": 2}}]
+    samples = parse(render(merge([]), collect_samples(executor_stats, pool_stats)))
+    assert samples['xhs_executor_queue_depth'] == 3
+    assert samples['xhs_page_pool_in_use{worker="1"}'] == 1
+    assert samples['xhs_browser_heap_bytes{worker="1"}'] == 2 * 1024 * 1024
+    assert samples['xhs_browser_restarts_total{worker="1"}'] == 2
+
+
+def test_stage_timer_records_stages_and_failures():
+    registry = MetricsRegistry()
+    timer = StageTimer('get_note_detail', registry)
+    timer.stage('goto')
+    timer.stage('extract')
+    timer.fail(ValueError("解析失败"))
+    timer.finish()
+
+    snapshot = registry.snapshot()
+    stages = sorted(dict(labels)['stage'] for name, labels in snapshot["histograms"])
+    assert stages == ['extract', 'goto']
+    assert snapshot["counters"][('xhs_extraction_failures_total', (('action', 'get_note_detail'),))] == 1
+
+    timer = StageTimer('get_note_detail', registry)
+    timer.stage('wait')
+    timer.fail(TimeoutError())
+    key = ('xhs_action_timeouts_total', (('action', 'get_note_detail'), ('stage', 'wait')))
+    assert registry.snapshot()["counters"][key] == 1
+
+
+class Action:
+    @instrument('test_plain')
+    def plain(self):
+        self.timer.stage('goto')
+        return 'ok'
+
+    @instrument('test_generator')
+    def generator(self):
+        self.timer.stage('scroll')
+        yield 1
+        yield 2
+
+    @instrument('test_async')
+    async def coroutine(self):
+        self.timer.stage('extract')
+        return 'ok'
+
+    @instrument('test_async_generator')
+    async def async_generator(self):
+        self.timer.stage('scroll')
+        yield 1
+        yield 2
+
+
+def recorded_actions():
+    return {dict(labels)['action'] for name, labels in metrics.registry.snapshot()["histograms"]}
+
+
+def test_instrument_supports_functions_and_generators():
+    action = Action()
+    assert action.plain() == 'ok'
+    items = action.generator()
+    assert next(items) == 1
+    items.close()
+    assert asyncio.run(action.coroutine()) == 'ok'
+
+    async def consume():
+        return [item async for item in action.async_generator()]
+
+    assert asyncio.run(consume()) == [1, 2]
+    assert {'test_plain', 'test_generator', 'test_async', 'test_async_generator'} <= recorded_actions()
@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+import json
+import pytest
+from xiaohongshu_mcp_py import pacing
+from xiaohongshu_mcp_py.pacing import NavigationPacer
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.xiaohongshu.capture import NOTE_API_PATTERN as NOTE_API, SEARCH_API_PATTERN, response_matches
+
+API_URL = "https://edith.xiaohongshu.com"
+NOTE_BODY = json.dumps({"source_note_id": "n1"})
+
+
+def api_response(status, url=f"{API_URL}/api/sns/web/v1/feed", body=None):
+    request = SimpleNamespace(url=url, post_data=body)
+    return SimpleNamespace(status=status, ok=200 <= status < 300, url=url, request=request)
+
+
+class FakePage:
+    def __init__(self, *responses):
+        """已预热的页面，站内导航期间依次返回 responses，完整导航记录地址"""
+        self.url = "https://www.xiaohongshu.com/explore"
+        self.responses = responses
+        self.gotos = []
+
+    @contextmanager
+    def expect_response(self, predicate, timeout=None):
+        info = SimpleNamespace(value=None)
+        yield info
+        info.value = next(response for response in self.responses if predicate(response))
+
+    def evaluate(self, script, path):
+        self.path = path
+
+    def goto(self, url, **kwargs):
+        self.gotos.append(url)
+        return SimpleNamespace(status=200, ok=True, url=url)
+
+
+@pytest.fixture
+def pacer(monkeypatch):
+    monkeypatch.delenv('BROWSER_PROCESSES', raising=False)
+    monkeypatch.setenv('PAGE_PREWARM', 'true')
+    monkeypatch.setattr(pacing.time, 'monotonic', lambda: 1000.0)
+    return NavigationPacer(rate=60, min_rate=6, max_rate=240, burst=5, retries=0, captcha_pause=30)
+
+
+def test_soft_goto_returns_api_response(pacer):
+    page = FakePage(api_response(200, body=NOTE_BODY))
+    response, soft = navigate.soft_goto(page, "https://www.xiaohongshu.com/explore/n1", NOTE_API, pacer, match="n1")
+    assert soft and response is page.responses[0]
+    assert page.path == "/explore/n1"
+    assert page.gotos == []
+    assert pacer.stats()["soft_navigations_total"] == 1
+
+
+def test_soft_goto_captcha_does_not_reload(pacer):
+    page = FakePage(api_response(461, body=NOTE_BODY))
+    response, soft = navigate.soft_goto(page, "https://www.xiaohongshu.com/explore/n1", NOTE_API, pacer, match="n1")
+    # 完整导航同样会遇到验证页面，并再占用一次导航预算
+    assert soft and response.status == 461
+    assert page.gotos == []
+    stats = pacer.stats()
+    assert stats["captchas_total"] == 1
+    assert stats["soft_fallbacks_total"] == 0
+
+
+def test_soft_goto_error_falls_back_to_full_navigation(pacer):
+    page = FakePage(api_response(500, body=NOTE_BODY))
+    response, soft = navigate.soft_goto(page, "https://www.xiaohongshu.com/explore/n1", NOTE_API, pacer, match="n1")
+    assert not soft and response.status == 200
+    assert page.gotos == ["https://www.xiaohongshu.com/explore/n1"]
+    assert pacer.stats()["soft_fallbacks_total"] == 1
+
+
+def test_response_matches_pattern_and_request():
+    note = api_response(200, body=json.dumps({"source_note_id": "n1", "image_formats": ["jpg"]}))
+    assert response_matches(note, NOTE_API)
+    assert response_matches(note, NOTE_API, "n1")
+    assert not response_matches(note, NOTE_API, "n2")
+    assert not response_matches(note, SEARCH_API_PATTERN)
+    # 详情接口的正则不匹配推荐列表接口
+    assert not response_matches(api_response(200, f"{API_URL}/api/sns/web/v1/feeds"), NOTE_API)
+
+
+def test_response_matches_encoded_keyword():
+    search_url = f"{API_URL}/api/sns/web/v1/search/notes"
+    # 请求体中的中文被 JSON 转义
+    escaped = api_response(200, search_url, json.dumps({"keyword": "杭州 旅行", "page": 1}))
+    assert response_matches(escaped, SEARCH_API_PATTERN, "杭州 旅行")
+    # 查询参数中的关键词被 URL 编码
+    encoded = api_response(200, f"{search_url}?keyword=%E6%9D%AD%E5%B7%9E+%E6%97%85%E8%A1%8C")
+    assert response_matches(encoded, SEARCH_API_PATTERN, "杭州 旅行")
+    assert not response_matches(encoded, SEARCH_API_PATTERN, "成都")
+
+
+def test_soft_goto_skips_previous_page_response(pacer):
+    # 上一个笔记尚未返回的请求不能当作本次导航的响应
+    stale = api_response(200, body=json.dumps({"source_note_id": "n1"}))
+    current = api_response(200, body=json.dumps({"source_note_id": "n2"}))
+    page = FakePage(stale, current)
+    response, soft = navigate.soft_goto(page, "https://www.xiaohongshu.com/explore/n2", NOTE_API, pacer, match="n2")
+    assert soft and response is current
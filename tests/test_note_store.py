@@ -0,0 +1,83 @@
+import pytest
+from xiaohongshu_mcp_py.note_store import NoteStore
+
+
+DETAIL = {
+    "note_id": "n1",
+    "url": "https://www.xiaohongshu.com/explore/n1",
+    "title": "杭州三日游",
+    "content": "西湖边的咖啡馆推荐",
+    "user": {"user_id": "u1", "username": "小红", "avatar": "https://img/avatar.jpg"},
+    "images": [{"url": "https://img/1.jpg", "width": 1080, "height": 1440}],
+    "tags": [{"tag_id": "t1", "name": "旅行", "type": 1}],
+    "interaction": {"likes": 100, "comments": 5, "collections": 30, "share_count": 2},
+    "create_time": "2026-01-01 10:00:00"
+}
+
+CARD = {
+    "note_id": "n1",
+    "title": "",
+    "username": "小红",
+    "cover_url": "",
+    "likes": "1.2万"
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NoteStore(str(tmp_path / "notes.db"))
+    yield store
+    store.close()
+
+
+def test_disabled_store_is_noop():
+    store = NoteStore("")
+    assert not store.enabled
+    assert store.upsert_notes([DETAIL], "detail") == 0
+    assert store.get_note("n1") is None
+    assert store.list_notes() == ([], 0)
+
+
+def test_card_upsert_keeps_detail_fields(store):
+    store.upsert_notes([DETAIL], "detail")
+    store.upsert_notes([CARD], "feed")
+
+    note = store.get_note("n1")
+    assert note["has_detail"] is True
+    assert note["title"] == "杭州三日游"
+    assert note["content"] == "西湖边的咖啡馆推荐"
+    assert note["user"]["user_id"] == "u1"
+    assert note["images"][0]["url"] == "https://img/1.jpg"
+    assert [tag["name"] for tag in note["tags"]] == ["旅行"]
+    assert note["interaction"]["collections"] == 30
+    assert note["interaction"]["comments"] == 5
+    # 列表中的新计数会覆盖旧值
+    assert note["interaction"]["likes"] == 12000
+    # 来源保持为详情
+    assert note["source"] == "detail"
+
+
+def test_detail_fills_in_card(store):
+    store.upsert_notes([CARD], "search", keyword="杭州")
+    assert store.get_note("n1")["has_detail"] is False
+
+    store.upsert_notes([DETAIL], "detail")
+    note = store.get_note("n1")
+    assert note["has_detail"] is True
+    assert note["content"] == "西湖边的咖啡馆推荐"
+    assert note["keyword"] == "杭州"
+    assert note["source"] == "detail"
+    assert note["first_scraped_at"] <= note["scraped_at"]
+
+
+def test_list_notes_filters(store):
+    store.upsert_notes([DETAIL], "detail")
+    store.upsert_notes([{"note_id": "n2", "title": "成都火锅", "username": "阿明"}], "search", keyword="火锅")
+
+    assert store.list_notes(tag="旅行")[1] == 1
+    assert store.list_notes(user_id="u1")[0][0]["note_id"] == "n1"
+    notes, total = store.list_notes(keyword="火锅")
+    assert total == 1 and notes[0]["note_id"] == "n2"
+    assert store.list_notes(size=1, page=2)[1] == 2
+    assert store.contains("n2") and not store.contains("n3")
+    assert store.stats()["notes_with_detail"] == 1
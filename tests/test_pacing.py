@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+import pytest
+from xiaohongshu_mcp_py import pacing
+from xiaohongshu_mcp_py.pacing import NavigationPacer, SUCCESS, FAILURE, CAPTCHA, is_captcha, is_transient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.delenv('BROWSER_PROCESSES', raising=False)
+    clock = FakeClock()
+    monkeypatch.setattr(pacing.time, 'monotonic', clock)
+    return clock
+
+
+def make_pacer(**kwargs):
+    options = {"rate": 60, "min_rate": 6, "max_rate": 240, "burst": 2, "retries": 2,
+               "backoff": 1, "max_backoff": 8, "captcha_pause": 30, "window": 5}
+    options.update(kwargs)
+    return NavigationPacer(**options)
+
+
+def test_disabled_pacer_never_waits(clock):
+    pacer = make_pacer(rate=0)
+    assert not pacer.enabled
+    assert [pacer.reserve() for _ in range(5)] == [0.0] * 5
+    pacer.record(CAPTCHA)
+    assert pacer.rate == 0
+
+
+def test_reserve_spaces_navigations_after_burst(clock):
+    pacer = make_pacer()
+    # 60 次/分钟，突发 2 次，之后的导航按预约顺序间隔 1 秒
+    assert [round(pacer.reserve(), 6) for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+    clock.now += 10
+    assert pacer.reserve() == 0.0
+
+
+def test_failures_decrease_rate_once_per_interval(clock):
+    pacer = make_pacer()
+    pacer.record(FAILURE)
+    assert pacer.rate == pytest.approx(42)
+    # 同时失败的导航只下降一次
+    pacer.record(FAILURE)
+    assert pacer.rate == pytest.approx(42)
+    clock.now += 60 / 42
+    pacer.record(FAILURE)
+    assert pacer.rate == pytest.approx(42 * 0.7)
+
+
+def test_rate_never_leaves_bounds(clock):
+    pacer = make_pacer(min_rate=20, max_rate=62)
+    for _ in range(10):
+        clock.now += 60
+        pacer.record(CAPTCHA)
+    assert pacer.rate == 20
+
+    pacer = make_pacer(max_rate=62)
+    for _ in range(100):
+        pacer.record(SUCCESS)
+    assert pacer.rate == 62
+
+
+def test_captcha_pauses_and_recovers(clock):
+    pacer = make_pacer()
+    pacer.record(CAPTCHA)
+    assert pacer.rate == 30
+    assert pacer.stats()["paused_for"] == 30
+
+    # 暂停期间的导航等到暂停结束，积累的令牌作废
+    assert pacer.reserve() == pytest.approx(30)
+    clock.now += 40
+    assert pacer.reserve() == 0.0
+
+    # 最近的导航中仍有验证页面时保持速率，验证页面移出窗口后开始回升
+    for _ in range(4):
+        pacer.record(SUCCESS)
+    assert pacer.rate == 30
+    pacer.record(SUCCESS)
+    assert pacer.rate > 30
+    stats = pacer.stats()
+    assert stats["captchas_total"] == 1
+    assert stats["captcha_rate"] == 0.0
+
+
+def test_backoff_delay_is_bounded_and_jittered(clock):
+    pacer = make_pacer(backoff=1, max_backoff=8)
+    for attempt, delay in enumerate([1, 2, 4, 8, 8, 8]):
+        for _ in range(20):
+            assert delay / 2 <= pacer.backoff_delay(attempt) <= delay
+
+
+def test_processes_share_rate(clock, monkeypatch):
+    monkeypatch.setenv('BROWSER_PROCESSES', '4')
+    pacer = make_pacer()
+    assert pacer.rate == 15
+    assert pacer.min_rate == 1.5
+
+
+def test_captcha_and_transient_detection():
+    assert is_captcha(SimpleNamespace(status=461, url="https://www.xiaohongshu.com/explore"))
+    assert is_captcha(SimpleNamespace(status=200, url="https://www.xiaohongshu.com/website-login/captcha?redirect=x"))
+    assert not is_captcha(SimpleNamespace(status=200, url="https://www.xiaohongshu.com/explore"))
+    assert not is_captcha(None)
+
+    assert is_transient(Exception("page.goto: net::ERR_CONNECTION_RESET at https://www.xiaohongshu.com"))
+    assert not is_transient(Exception("net::ERR_NAME_NOT_RESOLVED"))
@@ -0,0 +1,120 @@
+import queue
+import threading
+import pytest
+from xiaohongshu_mcp_py import process_executor
+from xiaohongshu_mcp_py.executor import ExecutorQueueFullError, WorkerCrashedError
+from xiaohongshu_mcp_py.process_executor import ProcessBrowserExecutor, RESTART_DELAY, MAX_RESTART_DELAY, STABLE_UPTIME
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def kill(self):
+        self.exitcode = -9
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(process_executor.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def executor(clock):
+    """不启动子进程的执行器，工作进程和任务队列由假对象代替"""
+    executor = ProcessBrowserExecutor(object, workers=2, queue_size=4)
+    pids = iter(range(100, 200))
+
+    def spawn(worker):
+        worker.tasks = queue.Queue()
+        worker.stop_stream = threading.Event()
+        worker.process = FakeProcess(next(pids))
+
+    executor._spawn = spawn
+    for worker in executor._processes:
+        executor._ready[worker.index] = threading.Event()
+        spawn(worker)
+        executor._handle(('ready', worker.index, {}, None))
+    return executor
+
+
+def crash(executor, index):
+    executor._processes[index].process.kill()
+    executor._supervise()
+
+
+def test_crashed_worker_fails_pending_jobs(executor):
+    future = executor.submit('get_feeds', worker=0)
+    crash(executor, 0)
+    with pytest.raises(WorkerCrashedError):
+        future.result(timeout=0)
+    assert executor._processes[0].jobs == set()
+
+
+def test_restarting_worker_rejects_jobs(executor, clock):
+    crash(executor, 0)
+
+    # 指定进程的任务在重启期间直接拒绝，不会投递到即将被替换的队列
+    with pytest.raises(ExecutorQueueFullError) as e:
+        executor.submit('get_feeds', worker=0)
+    assert e.value.retry_after == RESTART_DELAY
+    # 未指定进程的任务投递给其他进程
+    executor.submit('get_feeds')
+    assert executor._processes[1].jobs
+
+    # 所有进程都在重启时全部拒绝
+    crash(executor, 1)
+    with pytest.raises(ExecutorQueueFullError):
+        executor.submit('get_feeds')
+    assert all(not p.jobs for p in executor._processes)
+    assert executor.stats()["rejected_total"] == 2
+
+    clock.now += RESTART_DELAY
+    executor._supervise()
+    executor.submit('get_feeds', worker=0)
+    worker = executor._processes[0]
+    assert worker.restart_at is None
+    assert worker.tasks.qsize() == 1 and len(worker.jobs) == 1
+
+
+def test_restart_delay_grows_until_worker_is_stable(executor, clock):
+    worker = executor._processes[0]
+    delays = []
+    for _ in range(8):
+        crash(executor, 0)
+        delays.append(worker.restart_at - clock.now)
+        clock.now = worker.restart_at
+        executor._supervise()
+        # 重启后立即回传 ready 不清零连续崩溃次数
+        executor._handle(('ready', 0, {}, None))
+    assert delays == [min(RESTART_DELAY * 2 ** i, MAX_RESTART_DELAY) for i in range(8)]
+
+    clock.now += STABLE_UPTIME
+    executor._supervise()
+    assert worker.crashes == 0
+
+
+def test_successful_job_resets_crashes(executor):
+    worker = executor._processes[0]
+    crash(executor, 0)
+    worker.restart_at = process_executor.time.monotonic()
+    executor._supervise()
+    future = executor.submit('get_feeds', worker=0)
+    job_id = next(iter(worker.jobs))
+    executor._handle(('result', 0, job_id, {"feeds": []}, None))
+    assert future.result(timeout=0) == {"feeds": []}
+    assert worker.crashes == 0
@@ -0,0 +1,117 @@
+import threading
+import time
+import pytest
+from xiaohongshu_mcp_py import result_cache
+from xiaohongshu_mcp_py.result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache.time, 'monotonic', clock)
+    return clock
+
+
+def make_cache(**kwargs):
+    options = {"ttls": {"get_feeds": 60}, "max_entries": 100, "max_bytes": 1024 * 1024, "stale_ttl": 0}
+    options.update(kwargs)
+    return ResultCache(**options)
+
+
+def test_hit_until_ttl_expires(clock):
+    cache = make_cache()
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {"feeds": [len(calls)]}
+
+    assert cache.fetch("get_feeds", (1, 20), load) == ({"feeds": [1]}, "miss")
+    clock.now += 59
+    assert cache.fetch("get_feeds", (1, 20), load) == ({"feeds": [1]}, "hit")
+    clock.now += 2
+    assert cache.fetch("get_feeds", (1, 20), load) == ({"feeds": [2]}, "miss")
+    assert len(calls) == 2
+
+
+def test_disabled_endpoint_and_errors_are_not_cached(clock):
+    cache = make_cache()
+    assert cache.fetch("search_content", ("猫",), lambda: {"results": []}) == ({"results": []}, "bypass")
+    assert cache.stats()["entries"] == 0
+
+    cache.fetch("get_feeds", (1, 20), lambda: {"feeds": [], "error": "超时"})
+    assert cache.lookup(cache.key("get_feeds", (1, 20)))[0] == "miss"
+
+
+def test_bypass_reloads_and_stores(clock):
+    cache = make_cache()
+    cache.fetch("get_feeds", (1, 20), lambda: {"feeds": ["old"]})
+    assert cache.fetch("get_feeds", (1, 20), lambda: {"feeds": ["new"]}, bypass=True) == ({"feeds": ["new"]}, "bypass")
+    assert cache.fetch("get_feeds", (1, 20), lambda: {"feeds": ["unused"]}) == ({"feeds": ["new"]}, "hit")
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = make_cache(max_entries=2)
+    for page in (1, 2):
+        cache.fetch("get_feeds", (page,), lambda: {"feeds": []})
+    # 读取第 1 页后，第 2 页成为最久未使用的条目
+    cache.fetch("get_feeds", (1,), lambda: {"feeds": []})
+    cache.fetch("get_feeds", (3,), lambda: {"feeds": []})
+
+    assert cache.lookup(cache.key("get_feeds", (1,)))[0] == "hit"
+    assert cache.lookup(cache.key("get_feeds", (2,)))[0] == "miss"
+    assert cache.lookup(cache.key("get_feeds", (3,)))[0] == "hit"
+    assert cache.stats()["evictions_total"] == 1
+
+
+def test_byte_limit_evicts_and_skips_oversized_values(clock):
+    cache = make_cache(max_bytes=60)
+    assert not cache.store(("get_feeds", 1), {"feeds": ["x" * 100]})
+    assert cache.store(("get_feeds", 2), {"feeds": ["a" * 20]})
+    assert cache.store(("get_feeds", 3), {"feeds": ["b" * 20]})
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] <= 60
+    assert cache.lookup(("get_feeds", 3))[0] == "hit"
+
+
+def test_stale_while_revalidate_refreshes_once_in_background(clock):
+    cache = make_cache(stale_ttl=300)
+    cache.fetch("get_feeds", (1,), lambda: {"feeds": ["old"]})
+    clock.now += 120
+
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {"feeds": ["new"]}
+
+    # 过期但仍在 stale_ttl 内，立即返回旧结果，同一个键只启动一次后台刷新
+    assert cache.fetch("get_feeds", (1,), load) == ({"feeds": ["old"]}, "stale")
+    assert cache.fetch("get_feeds", (1,), load) == ({"feeds": ["old"]}, "stale")
+    release.set()
+
+    key = cache.key("get_feeds", (1,))
+    deadline = time.time() + 5
+    while cache.lookup(key) != ("hit", {"feeds": ["new"]}) and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 1
+    assert cache.fetch("get_feeds", (1,), lambda: {"feeds": ["unused"]}) == ({"feeds": ["new"]}, "hit")
+
+
+def test_entries_past_stale_window_are_reloaded(clock):
+    cache = make_cache(stale_ttl=30)
+    cache.fetch("get_feeds", (1,), lambda: {"feeds": ["old"]})
+    clock.now += 100
+    assert cache.fetch("get_feeds", (1,), lambda: {"feeds": ["new"]}) == ({"feeds": ["new"]}, "miss")
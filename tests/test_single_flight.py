@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from xiaohongshu_mcp_py.executor import JobDeadlineExceededError
+from xiaohongshu_mcp_py.single_flight import SingleFlight
+from xiaohongshu_mcp_py.aio.single_flight import AsyncSingleFlight
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"feeds": [1]}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "key", load)
+        assert started.wait(5)
+        followers = [pool.submit(flight.do, "key", load) for _ in range(3)]
+        # 等待者进入等待后再放行
+        wait_until(lambda: flight.stats()["coalesced_total"] == 3)
+        release.set()
+
+        assert leader.result() == ({"feeds": [1]}, False)
+        assert [future.result() for future in followers] == [({"feeds": [1]}, True)] * 3
+
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executed_total": 1, "coalesced_total": 3}
+
+
+def test_error_is_raised_to_all_waiters_and_key_is_released():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("浏览器已断开")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", fail)
+        assert started.wait(5)
+        follower = pool.submit(flight.do, "key", fail)
+        wait_until(lambda: flight.stats()["coalesced_total"] == 1)
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    # 失败后不保留结果，下一次调用重新执行
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+def test_waiter_gives_up_at_its_own_deadline():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def load():
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "key", load)
+        assert started.wait(5)
+        with pytest.raises(JobDeadlineExceededError):
+            flight.do("key", load, timeout=0.01)
+        # 等待者超时不影响正在执行的调用
+        release.set()
+        assert leader.result() == ("result", False)
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["executed_total"] == 2
+
+
+def test_async_concurrent_calls_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", load) for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert results[0] == ("result", False)
+    assert results[1:] == [("result", True)] * 3
+    assert len(calls) == 1
+
+
+def test_async_cancelled_waiter_does_not_cancel_leader():
+    flight = AsyncSingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == ("result", False)
+
+
+def test_async_waiter_gives_up_at_its_own_deadline():
+    flight = AsyncSingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        with pytest.raises(JobDeadlineExceededError):
+            await flight.do("key", load, timeout=0.01)
+        return await leader
+
+    assert asyncio.run(main()) == ("result", False)
@@ -0,0 +1,69 @@
+import pytest
+from xiaohongshu_mcp_py.tokenizer import tokenize, index_text, match_query
+from xiaohongshu_mcp_py.note_store import NoteStore
+
+
+def test_tokenize_cjk_bigrams_and_words():
+    assert tokenize("杭州旅行vlog") == ["杭州", "州旅", "旅行", "行", "vlog"]
+    assert tokenize("Hello, 猫!") == ["hello", "猫"]
+    assert tokenize("") == []
+    assert tokenize(None) == []
+    assert index_text("川菜馆 2026") == "川菜 菜馆 馆 2026"
+
+
+def test_match_query():
+    assert match_query("川菜馆") == '"川菜 菜馆"'
+    assert match_query("杭州 旅行") == '"杭州" "旅行"'
+    assert match_query("猫") == '"猫"*'
+    assert match_query("VLOG") == '"vlog"*'
+    assert match_query('"*()') is None
+    assert match_query("") is None
+
+
+def detail(note_id, title, content, tags=()):
+    return {"note_id": note_id, "title": title, "content": content, "user": {}, "tags": [{"name": tag} for tag in tags]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NoteStore(str(tmp_path / "notes.db"))
+    store.upsert_notes([
+        detail("n1", "杭州旅行攻略", "西湖边的川菜馆", ["美食"]),
+        detail("n2", "成都火锅", "老牌川菜馆推荐 vlog"),
+        detail("n3", "猫咖探店", "上海的猫咖")
+    ], "detail")
+    yield store
+    store.close()
+
+
+def ids(results):
+    return sorted(note["note_id"] for note in results[0])
+
+
+def test_search_matches_cjk_substrings(store):
+    if not store.fts_enabled:
+        pytest.skip("SQLite 未编译 FTS5")
+    assert ids(store.search("川菜馆")) == ["n1", "n2"]
+    assert ids(store.search("杭州 川菜")) == ["n1"]
+    assert ids(store.search("猫")) == ["n3"]
+    assert ids(store.search("美食")) == ["n1"]
+    assert ids(store.search("VLO")) == ["n2"]
+    assert ids(store.search("北京")) == []
+
+
+def test_search_ranks_title_matches_first(store):
+    if not store.fts_enabled:
+        pytest.skip("SQLite 未编译 FTS5")
+    store.upsert_notes([detail("n4", "火锅", "测试"), detail("n5", "晚餐", "吃了一顿火锅")], "detail")
+    results, total = store.search("火锅")
+    assert total == 3
+    assert results[-1]["note_id"] == "n5"
+    assert all("score" in note for note in results)
+
+
+@pytest.mark.parametrize("query", ['"', '川菜"馆', 'AND', 'OR 川菜', 'NEAR(川菜', '川菜*', '-川菜', "col:川菜", '^川菜', "'; DROP TABLE notes; --"])
+def test_search_special_characters_do_not_raise(store, query):
+    results, total = store.search(query)
+    assert total == len(results)
+    # 特殊字符被忽略，不会被当作 FTS5 语法
+    assert store.stats()["notes"] == 3
@@ -0,0 +1,250 @@
+from loguru import logger
+import itertools
+import os
+import threading
+import time
+import zlib
+from xiaohongshu_mcp_py.login_cache import LoginStateCache
+from xiaohongshu_mcp_py.session_store import SessionStore
+
+ACCOUNT_STRATEGIES = ('round_robin', 'lru')
+
+# 未配置账号时使用的账号名
+DEFAULT_ACCOUNT = 'default'
+
+
+class UnknownAccountError(ValueError):
+    """请求指定的账号不存在"""
+
+
+class AccountBudgetExceededError(Exception):
+    """账号的请求预算已用完"""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        # 多进程模式下传回主进程时保留 retry_after
+        return type(self), (str(self), self.retry_after)
+
+
+def account_worker(name, workers):
+    """指定账号的请求由哪个工作线程或工作进程执行，同一账号始终相同
+
+    参数:
+        name: 账号名
+        workers: 工作线程或工作进程数量
+    """
+    return zlib.crc32(name.encode('utf-8')) % max(1, workers)
+
+
+class RateBudget:
+    # 同一进程内的所有服务实例（工作线程）共用同一个账号的预算
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate):
+        """账号的请求预算，令牌桶，每分钟补充 rate 个，最多积累 rate 个（至少 1 个）
+
+        参数:
+            rate: 每分钟的请求数，为 0 时不限制，可以小于 1
+        """
+        self.rate = rate
+        # 容量不足 1 个时永远无法积累到一次请求，如每分钟 0.5 次
+        self.capacity = max(1.0, rate) if rate else 0.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        # 统计数据
+        self._granted = 0
+        self._throttled = 0
+
+    @classmethod
+    def shared(cls, name, rate):
+        """获取进程内共用的预算
+
+        多进程模式下指定该账号的请求始终由同一个进程执行（见 account_worker），
+        该进程持有完整预算，其他进程只在请求未指定账号时选择该账号，平分预算。
+        """
+        processes = max(1, int(os.environ.get('BROWSER_PROCESSES', '1')))
+        index = os.environ.get('BROWSER_PROCESS_INDEX')
+        if processes > 1 and (index is None or account_worker(name, processes) != int(index)):
+            rate = rate / processes
+        with cls._shared_lock:
+            if name not in cls._shared:
+                cls._shared[name] = cls(rate)
+            return cls._shared[name]
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate / 60)
+        self._updated_at = now
+
+    def try_acquire(self):
+        """尝试使用一次预算
+
+        返回:
+            0 表示已获得预算，否则为还需等待的秒数
+        """
+        if not self.rate:
+            with self._lock:
+                self._granted += 1
+            return 0
+
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._granted += 1
+                return 0
+            self._throttled += 1
+            return (1 - self._tokens) * 60 / self.rate
+
+    def available(self):
+        """当前可用的预算，不限制时返回 None"""
+        if not self.rate:
+            return None
+        with self._lock:
+            self._refill(time.monotonic())
+            return int(self._tokens)
+
+    def stats(self):
+        return {
+            "rate_per_minute": self.rate,
+            "available": self.available(),
+            "granted_total": self._granted,
+            "throttled_total": self._throttled
+        }
+
+
+class Account:
+    def __init__(self, name, storage_path=None, rate=0):
+        """一个登录身份，拥有独立的浏览器上下文、会话文件、登录状态缓存和请求预算
+
+        参数:
+            name: 账号名
+            storage_path: 会话文件路径，默认读取 STORAGE_STATE_PATH
+            rate: 每分钟的请求数，为 0 时不限制
+        """
+        self.name = name
+        self.session_store = SessionStore(storage_path)
+        self.login_cache = LoginStateCache()
+        self.budget = RateBudget.shared(name, rate)
+        self.last_used = 0.0
+        # 浏览器启动后由服务创建
+        self.context = None
+        self.contexts = []
+        self.page_pool = None
+
+    def stats(self):
+        stats = self.budget.stats()
+        stats["pool"] = self.page_pool.stats() if self.page_pool else {}
+        status = self.login_cache.peek()
+        stats["is_logged_in"] = status.get("is_logged_in") if status else None
+        return stats
+
+
+def account_storage_path(path, name):
+    """账号的会话文件路径，路径中的 {account} 替换为账号名，否则在文件名后追加账号名"""
+    if not path:
+        return path
+    if '{account}' in path:
+        return path.replace('{account}', name)
+    root, ext = os.path.splitext(path)
+    return f"{root}_{name}{ext}"
+
+
+def load_accounts():
+    """读取 ACCOUNTS 配置的账号列表
+
+    格式为逗号分隔的账号名，可以用 名称:每分钟请求数 单独指定预算，如 "alice,bob:60"，
+    未单独指定时使用 ACCOUNT_RATE。未配置时返回只包含默认账号的列表，使用 STORAGE_STATE_PATH。
+    """
+    rate = float(os.environ.get('ACCOUNT_RATE', '0'))
+    path = os.environ.get('STORAGE_STATE_PATH', 'storage_state.json')
+    accounts = []
+    for item in os.environ.get('ACCOUNTS', '').split(','):
+        name, _, account_rate = item.strip().partition(':')
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            account_rate = float(account_rate) if account_rate.strip() else rate
+        except ValueError:
+            logger.warning(f"忽略无效的账号预算: {item}")
+            account_rate = rate
+        accounts.append(Account(name, account_storage_path(path, name), account_rate))
+
+    if not accounts:
+        accounts.append(Account(DEFAULT_ACCOUNT, path, rate))
+    return accounts
+
+
+class AccountRegistry:
+    def __init__(self, accounts=None, strategy=None, wait=None):
+        """账号注册表，为每个请求选择账号并扣减预算
+
+        参数:
+            accounts: Account 列表，默认读取 ACCOUNTS 配置
+            strategy: 未指定账号时的选择方式，round_robin（轮询）或 lru（最久未使用），默认读取 ACCOUNT_STRATEGY
+            wait: 所有账号预算都已用完时最多等待的秒数，默认读取 ACCOUNT_BUDGET_WAIT
+        """
+        self.accounts = load_accounts() if accounts is None else accounts
+        self.strategy = strategy or os.environ.get('ACCOUNT_STRATEGY', 'round_robin')
+        if self.strategy not in ACCOUNT_STRATEGIES:
+            logger.warning(f"未知的账号选择方式: {self.strategy}，改为 round_robin")
+            self.strategy = 'round_robin'
+        self.wait = float(os.environ.get('ACCOUNT_BUDGET_WAIT', '5')) if wait is None else wait
+        self._by_name = {account.name: account for account in self.accounts}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """第一个账号，登录流程和游标分页会话使用该账号"""
+        return self.accounts[0]
+
+    @property
+    def multiple(self):
+        """是否配置了多个账号（或显式配置了账号名）"""
+        return self.primary.name != DEFAULT_ACCOUNT or len(self.accounts) > 1
+
+    def get(self, name=None):
+        """按名称获取账号，未配置账号时忽略名称，始终返回默认账号"""
+        if not name or not self.multiple:
+            return self.primary
+        account = self._by_name.get(name)
+        if account is None:
+            raise UnknownAccountError(f"账号不存在: {name}")
+        return account
+
+    def _candidates(self, name):
+        if name and self.multiple:
+            return [self.get(name)]
+        if self.strategy == 'lru':
+            return sorted(self.accounts, key=lambda account: account.last_used)
+        start = next(self._next) % len(self.accounts)
+        return self.accounts[start:] + self.accounts[:start]
+
+    def reserve(self, name=None):
+        """选择一个有预算的账号并扣减一次预算，不等待
+
+        返回:
+            (账号, 0)，所有候选账号都没有预算时返回 (None, 最短等待秒数)
+        """
+        with self._lock:
+            waits = []
+            for account in self._candidates(name):
+                wait = account.budget.try_acquire()
+                if wait == 0:
+                    account.last_used = time.monotonic()
+                    return account, 0
+                waits.append(wait)
+            return None, min(waits)
+
+    def stats(self):
+        return {
+            "strategy": self.strategy,
+            "accounts": {account.name: account.stats() for account in self.accounts}
+        }
@@ -0,0 +1,5 @@
+# Xiaohongshu 异步服务模块
+"""
+基于 playwright.async_api 的异步服务实现
+多个页面操作可以在同一个事件循环和浏览器进程中并发执行
+"""
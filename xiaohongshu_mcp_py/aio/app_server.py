@@ -0,0 +1,493 @@
+from loguru import logger
+from xiaohongshu_mcp_py import metrics
+from xiaohongshu_mcp_py.accounts import AccountBudgetExceededError, UnknownAccountError
+from xiaohongshu_mcp_py.aio.result_cache import AsyncResultCache
+from xiaohongshu_mcp_py.aio.single_flight import AsyncSingleFlight
+from xiaohongshu_mcp_py.batch import parse_batch, effective_concurrency, batch_item, batch_summary
+from xiaohongshu_mcp_py.streaming import MEDIA_TYPES, STREAM_HEADERS, format_event, stream_format, stream_params
+from urllib.parse import parse_qs
+import asyncio
+import json
+import time
+
+
+class AsyncRequest:
+    def __init__(self, scope, body):
+        """ASGI 请求的简单封装，接口与 Flask 的 request 保持一致"""
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.body = body
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self._query = parse_qs(scope.get('query_string', b'').decode('utf-8'), keep_blank_values=True)
+
+    def arg(self, name, default=None, type=None):
+        """读取查询参数，类型转换失败时返回默认值"""
+        values = self._query.get(name)
+        if not values:
+            return default
+        if type is None:
+            return values[0]
+        try:
+            return type(values[0])
+        except (TypeError, ValueError):
+            return default
+
+    @property
+    def json(self):
+        """解析 JSON 请求体，解析失败返回 None"""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+class AsyncStream:
+    def __init__(self, events, fmt):
+        """流式响应，处理函数返回此对象时逐条发送事件
+
+        参数:
+            events: 产出 (事件名, 数据) 的异步生成器
+            fmt: 输出格式，ndjson 或 sse
+        """
+        self.events = events
+        self.fmt = fmt
+
+
+class AsyncAppServer:
+    def __init__(self, xiaohongshu_service):
+        """初始化 ASGI 应用，路由与 AppServer 保持一致
+
+        参数:
+            xiaohongshu_service: AsyncXiaohongshuService 实例，在 lifespan 启动阶段于后台启动浏览器
+        """
+        self.service = xiaohongshu_service
+        self.result_cache = AsyncResultCache()
+        self.single_flight = AsyncSingleFlight()
+        self.routes = {}
+
+        # 注册路由
+        self._register_routes()
+
+    def route(self, path, methods=('GET',)):
+        """注册路由的装饰器"""
+        def decorator(handler):
+            for method in methods:
+                self.routes[(method, path)] = handler
+            return handler
+        return decorator
+
+    def _account(self, request):
+        """请求指定的账号名，来自查询参数 account 或请求头 X-Account，未指定时返回 None"""
+        account = request.arg('account', '').strip() or request.headers.get('x-account', '').strip()
+        return account or None
+
+    async def _cached_call(self, request, method, *args):
+        """通过结果缓存调用只读的服务方法，与 AppServer._cached_call 相同"""
+        account = self._account(request)
+        if account:
+            args += (account,)
+        bypass = 'no-cache' in request.headers.get('cache-control', '').lower()
+        result, status, coalesced = await self._cached_fetch(method, args, bypass)
+        headers = {'X-Cache': status.upper()}
+        if coalesced:
+            headers['X-Coalesced'] = 'true'
+        return result, headers
+
+    async def _cached_fetch(self, method, args, bypass=False):
+        """_cached_call 的实现，返回 (结果, 缓存状态, 是否共享了其他请求的结果)"""
+        key = self.result_cache.key(method, args)
+        coalesced = []
+
+        async def load():
+            result, shared = await self.single_flight.do(key, lambda: self.service.run(method, *args))
+            coalesced.append(shared)
+            return result
+
+        result, status = await self.result_cache.fetch(method, args, load, bypass=bypass)
+        return result, status, any(coalesced)
+
+    async def _note_details(self, request, note_ids, concurrency, requested=None):
+        """并发获取多个笔记详情，按完成顺序产出结果的异步生成器
+
+        同时进行中的笔记不超过 concurrency 个，各自从页面池借出页面，
+        单个笔记失败不影响其他笔记。依次产出 ("note", 结果)，最后产出 ("end", 统计信息)，
+        requested 为降低前请求的并发数。
+        """
+        bypass = 'no-cache' in request.headers.get('cache-control', '').lower()
+        account = self._account(request)
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+
+        async def fetch(index, note_id):
+            async with semaphore:
+                try:
+                    args = (note_id, account) if account else (note_id,)
+                    result, status, _ = await self._cached_fetch('get_note_detail', args, bypass)
+                    return batch_item(index, note_id, result, cache=status)
+                except Exception as e:
+                    logger.warning(f"获取笔记详情失败，ID: {note_id}: {str(e)}")
+                    return batch_item(index, note_id, error=str(e) or type(e).__name__)
+
+        tasks = [asyncio.create_task(fetch(i, note_id)) for i, note_id in enumerate(note_ids)]
+        items = []
+        try:
+            for task in asyncio.as_completed(tasks):
+                items.append(await task)
+                yield "note", items[-1]
+        finally:
+            # 客户端断开时取消未完成的笔记
+            for task in tasks:
+                task.cancel()
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        yield "end", batch_summary(items, elapsed_ms, concurrency, requested)
+
+    def _stream(self, request, events):
+        """将服务的流式抓取生成器包装为流式响应"""
+        return AsyncStream(events, stream_format(request.arg('format'), request.headers.get('accept')))
+
+    def _stream_params(self, request):
+        params = stream_params(
+            request.arg('limit', type=int),
+            request.arg('time_budget', type=float),
+            request.arg('dedup')
+        )
+        params['account'] = self._account(request)
+        return params
+
+    def _register_routes(self):
+        # Prometheus 指标，异步服务只有一个进程
+        @self.route('/metrics')
+        async def prometheus_metrics(request):
+            samples = metrics.collect_samples(pool_stats=[self.service.get_pool_stats()])
+            return metrics.render(metrics.registry.snapshot(), samples), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+        # 健康检查
+        @self.route('/health')
+        async def health(request):
+            return {'status': 'ok'}, 200
+
+        # 就绪检查，与 AppServer 相同
+        @self.route('/ready')
+        async def ready(request):
+            readiness = self.service.readiness()
+            if readiness['ready']:
+                return {'status': 'ready', **readiness}, 200
+            status = 'failed' if len(readiness['errors']) >= readiness['workers'] else 'starting'
+            return {'status': status, **readiness}, 503, {'Retry-After': '1'}
+
+        # 页面池状态
+        @self.route('/api/v1/pool_stats')
+        async def pool_stats(request):
+            stats = {
+                'pools': [self.service.get_pool_stats()],
+                'result_cache': self.result_cache.stats(),
+                'single_flight': self.single_flight.stats(),
+                'note_store': await asyncio.to_thread(self.service.note_store.stats)
+            }
+            return {'success': True, 'data': stats}, 200
+
+        # API v1 路由组
+        @self.route('/api/v1/check_login')
+        async def check_login(request):
+            force = request.arg('force', 'false').lower() == 'true'
+            status = await self.service.run('check_login_status', force, self._account(request))
+            return {'success': True, 'data': status}, 200
+
+        @self.route('/api/v1/publish', methods=('POST',))
+        async def publish(request):
+            data = request.json
+            if not data:
+                return {'success': False, 'message': '未提供数据'}, 400
+
+            # 请求体中的 account 字段指定发布使用的账号
+            account = data.pop('account', None) or self._account(request)
+            result = await self.service.run('publish_content', data, account)
+            return {'success': True, 'data': result}, 200
+
+        @self.route('/api/v1/feeds')
+        async def get_feeds(request):
+            page = request.arg('page', 1, type=int)
+            size = request.arg('size', 20, type=int)
+
+            # 游标分页: 空游标创建新会话
+            cursor = request.arg('cursor')
+            if cursor is not None:
+                try:
+                    feeds = await self.service.run('get_feeds_by_cursor', cursor, size, self._account(request))
+                except ValueError as e:
+                    return {'success': False, 'message': str(e)}, 400
+                return {'success': True, 'data': feeds}, 200
+
+            feeds, headers = await self._cached_call(request, 'get_feeds', page, size)
+            return {'success': True, 'data': feeds}, 200, headers
+
+        @self.route('/api/v1/search')
+        async def search(request):
+            keyword = request.arg('keyword', '').strip()
+            page = request.arg('page', 1, type=int)
+            size = request.arg('size', 20, type=int)
+
+            if not keyword:
+                return {'success': False, 'message': '请输入搜索关键词'}, 400
+
+            # 本地全文索引中有足够的结果时直接返回，不访问浏览器
+            note_store = self.service.note_store
+            if request.arg('prefer_local', 'false').lower() == 'true' and note_store.enabled:
+                local_min = request.arg('local_min', size, type=int)
+                results = await asyncio.to_thread(note_store.search_result, keyword, page, size)
+                if results['total_count'] and results['total_count'] >= local_min:
+                    return {'success': True, 'data': results}, 200, {'X-Source': 'local'}
+
+            results, headers = await self._cached_call(request, 'search_content', keyword, page, size)
+            return {'success': True, 'data': results}, 200, headers
+
+        # 流式抓取，逐条返回 NDJSON 或 SSE
+        @self.route('/api/v1/feeds/stream')
+        async def stream_feeds(request):
+            return self._stream(request, self.service.run_stream('stream_feeds', **self._stream_params(request)))
+
+        @self.route('/api/v1/search/stream')
+        async def stream_search(request):
+            keyword = request.arg('keyword', '').strip()
+
+            if not keyword:
+                return {'success': False, 'message': '请输入搜索关键词'}, 400
+
+            return self._stream(request, self.service.run_stream('stream_search', keyword, **self._stream_params(request)))
+
+        @self.route('/api/v1/note_detail')
+        async def get_note_detail(request):
+            note_id = request.arg('note_id', '').strip()
+
+            if not note_id:
+                return {'success': False, 'message': '请输入笔记ID'}, 400
+
+            detail, headers = await self._cached_call(request, 'get_note_detail', note_id)
+            return {'success': True, 'data': detail}, 200, headers
+
+        @self.route('/api/v1/note_details', methods=('POST',))
+        async def get_note_details(request):
+            try:
+                note_ids, requested = parse_batch(request.json)
+            except ValueError as e:
+                return {'success': False, 'message': str(e)}, 400
+
+            # 每个笔记占用一个页面，并发数不超过页面池大小
+            await self.service.start()
+            concurrency = effective_concurrency(requested, self.service.page_pool.size, "页面池大小")
+            events = self._note_details(request, note_ids, concurrency, requested)
+            if request.arg('stream', 'false').lower() == 'true':
+                return self._stream(request, events)
+
+            items = []
+            async for event, data in events:
+                if event == 'note':
+                    items.append(data)
+            items.sort(key=lambda item: item['index'])
+            return {'success': True, 'data': {'results': items, **data}}, 200
+
+        # 本地笔记存储查询，无需浏览器，数据库读写在线程池中执行
+        @self.route('/api/v1/stored_notes')
+        async def stored_notes(request):
+            note_store = self.service.note_store
+            if not note_store.enabled:
+                return {'success': False, 'message': '未启用本地笔记存储'}, 404
+
+            page = max(1, request.arg('page', 1, type=int))
+            size = min(max(1, request.arg('size', 20, type=int)), 100)
+            notes, total = await asyncio.to_thread(
+                note_store.list_notes,
+                user_id=request.arg('user_id'),
+                username=request.arg('username'),
+                tag=request.arg('tag'),
+                keyword=request.arg('keyword'),
+                since=request.arg('since', type=float),
+                until=request.arg('until', type=float),
+                page=page,
+                size=size
+            )
+            return {'success': True, 'data': {
+                'page': page,
+                'size': size,
+                'notes': notes,
+                'total_count': total
+            }}, 200
+
+        @self.route('/api/v1/local_search')
+        async def local_search(request):
+            keyword = request.arg('keyword', '').strip()
+            page = max(1, request.arg('page', 1, type=int))
+            size = min(max(1, request.arg('size', 20, type=int)), 100)
+
+            if not keyword:
+                return {'success': False, 'message': '请输入搜索关键词'}, 400
+            if not self.service.note_store.enabled:
+                return {'success': False, 'message': '未启用本地笔记存储'}, 404
+
+            notes, total = await asyncio.to_thread(self.service.note_store.search, keyword, page, size)
+            return {'success': True, 'data': {
+                'keyword': keyword,
+                'page': page,
+                'size': size,
+                'notes': notes,
+                'total_count': total
+            }}, 200
+
+        @self.route('/api/v1/stored_note')
+        async def stored_note(request):
+            note_id = request.arg('note_id', '').strip()
+
+            if not note_id:
+                return {'success': False, 'message': '请输入笔记ID'}, 400
+            if not self.service.note_store.enabled:
+                return {'success': False, 'message': '未启用本地笔记存储'}, 404
+
+            note = await asyncio.to_thread(self.service.note_store.get_note, note_id)
+            if note is None:
+                return {'success': False, 'message': '本地未保存该笔记'}, 404
+            return {'success': True, 'data': note}, 200
+
+        @self.route('/api/v1/comment', methods=('POST',))
+        async def comment(request):
+            data = request.json
+            if not data or 'note_id' not in data or 'content' not in data:
+                return {'success': False, 'message': '缺少必要的字段'}, 400
+
+            account = data.get('account') or self._account(request)
+            result = await self.service.run('post_comment', data['note_id'], data['content'], account)
+            return {'success': True, 'data': result}, 200
+
+    async def __call__(self, scope, receive, send):
+        """ASGI 入口"""
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        # 记录每个请求的耗时，按路由区分
+        start = time.perf_counter()
+        handler = self.routes.get((scope['method'], scope['path']))
+        status = await self._handle(handler, scope, receive, send)
+        metrics.registry.observe('xhs_http_request_duration_seconds', time.perf_counter() - start,
+                                 route=scope['path'] if handler is not None else 'unmatched',
+                                 method=scope['method'], status=status)
+
+    async def _handle(self, handler, scope, receive, send):
+        """执行处理函数并发送响应，返回状态码"""
+        if handler is None:
+            if any(path == scope['path'] for _, path in self.routes):
+                await self._send_json(send, {'success': False, 'message': '不支持的请求方法'}, 405)
+                return 405
+            await self._send_json(send, {'success': False, 'message': '接口不存在'}, 404)
+            return 404
+
+        body = await self._read_body(receive)
+        request = AsyncRequest(scope, body)
+        headers = None
+        try:
+            # 处理函数返回 (数据, 状态码) 或 (数据, 状态码, 响应头)
+            result = await handler(request)
+            if isinstance(result, AsyncStream):
+                await self._send_stream(receive, send, result)
+                return 200
+            payload, status = result[:2]
+            if len(result) > 2:
+                headers = result[2]
+        except AccountBudgetExceededError as e:
+            logger.warning(f"处理请求 {request.path} 失败: {str(e)}")
+            payload, status = {'success': False, 'message': str(e)}, 429
+            headers = {'Retry-After': str(e.retry_after)}
+        except UnknownAccountError as e:
+            payload, status = {'success': False, 'message': str(e)}, 400
+        except Exception as e:
+            logger.error(f"处理请求 {request.path} 失败: {str(e)}")
+            payload, status = {'success': False, 'message': str(e)}, 500
+
+        await self._send_json(send, payload, status, headers)
+        return status
+
+    async def _read_body(self, receive):
+        """读取完整请求体"""
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                return body
+
+    async def _send_json(self, send, payload, status, headers=None):
+        """发送 JSON 响应，payload 为字符串时作为文本发送，类型由 headers 中的 Content-Type 指定"""
+        headers = dict(headers or {})
+        content_type = headers.pop('Content-Type', 'application/json; charset=utf-8')
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        raw_headers = [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1'))
+        ]
+        for key, value in headers.items():
+            raw_headers.append((key.lower().encode('latin-1'), str(value).encode('latin-1')))
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_stream(self, receive, send, stream):
+        """逐条发送流式响应，客户端断开时关闭生成器，停止抓取"""
+        raw_headers = [(b'content-type', MEDIA_TYPES[stream.fmt].encode('latin-1'))]
+        for key, value in STREAM_HEADERS.items():
+            raw_headers.append((key.lower().encode('latin-1'), value.encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': 200, 'headers': raw_headers})
+
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            try:
+                async for event, data in stream.events:
+                    if disconnected.is_set():
+                        logger.info("客户端已断开，结束流式抓取")
+                        break
+                    await send({'type': 'http.response.body', 'body': format_event(event, data, stream.fmt).encode('utf-8'), 'more_body': True})
+            except Exception as e:
+                logger.error(f"流式抓取失败: {str(e)}")
+                if not disconnected.is_set():
+                    error = format_event('error', {'message': str(e)}, stream.fmt)
+                    await send({'type': 'http.response.body', 'body': error.encode('utf-8'), 'more_body': True})
+            finally:
+                await stream.events.aclose()
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            watcher.cancel()
+
+    async def _lifespan(self, receive, send):
+        """处理 ASGI lifespan 事件，启动时在后台启动浏览器，关闭时释放资源
+
+        启动阶段不等待浏览器，服务立即开始监听，浏览器启动完成前 /ready 返回503，
+        请求等待启动完成后再执行。
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if not self.service.lazy:
+                    self.service.launch()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.service.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def start(self, host='0.0.0.0', port=18060):
+        """使用 uvicorn 启动服务器"""
+        import uvicorn
+
+        uvicorn.run(self, host=host, port=port, log_level='info')
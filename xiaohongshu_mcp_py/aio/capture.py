@@ -0,0 +1,73 @@
+from loguru import logger
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu.capture import ResponseCaptureBase, FEED_API_PATTERN, SEARCH_API_PATTERN, SCROLL_SCRIPT
+from xiaohongshu_mcp_py.xiaohongshu.waits import max_wait_ms
+
+# 接口正则和滚动脚本与同步版本共用，从这里一并导出
+__all__ = ['AsyncResponseCapture', 'FEED_API_PATTERN', 'SEARCH_API_PATTERN', 'SCROLL_SCRIPT']
+
+
+class AsyncResponseCapture(ResponseCaptureBase):
+    """监听页面的接口响应，直接收集列表数据（异步版本）
+
+    用法:
+        async with AsyncResponseCapture(page, FEED_API_PATTERN, limit=20) as capture:
+            await page.goto(url)
+            async for note in capture.iter_notes():
+                ...
+    """
+
+    async def __aenter__(self):
+        self.page.on('response', self._on_response)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.page.remove_listener('response', self._on_response)
+        return False
+
+    async def drain(self):
+        """读取已捕获的响应体，返回新增的笔记"""
+        added = []
+        while self._pending:
+            response = self._pending.pop(0)
+            try:
+                added.extend(self._add_body(await response.json()))
+            except Exception as e:
+                logger.debug(f"解析接口响应失败 {response.url}: {str(e)}")
+        return added
+
+    async def wait_for_response(self, timeout=None):
+        """等待下一个匹配的接口响应，超时返回 False"""
+        if self._pending:
+            return True
+        try:
+            await self.page.wait_for_event('response', predicate=self._matches, timeout=max_wait_ms() if timeout is None else timeout)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    async def iter_notes(self, max_scrolls=20):
+        """边滚动边产出新到达的笔记，收集满、没有更多数据或滚动无新响应时结束"""
+        if not self.notes:
+            await self.wait_for_response()
+
+        scrolls = 0
+        while True:
+            for note in await self.drain():
+                yield note
+            if self.full or not self.has_more or scrolls >= max_scrolls:
+                return
+
+            await self.page.evaluate(SCROLL_SCRIPT)
+            scrolls += 1
+            if not await self.wait_for_response():
+                for note in await self.drain():
+                    yield note
+                return
+
+    async def collect(self, max_scrolls=20):
+        """收集笔记直到达到数量上限，返回全部已收集的笔记"""
+        async for _ in self.iter_notes(max_scrolls):
+            if self.full:
+                break
+        return self.notes
@@ -0,0 +1,16 @@
+from xiaohongshu_mcp_py.xiaohongshu.extract import (
+    CARDS_SCRIPT, NOTE_ITEM_SELECTOR, NOTE_DETAIL_SCRIPT,
+    card_script_args, build_cards, note_detail_script_args, build_note
+)
+
+
+async def extract_cards(page, fields, start=0, end=None, item_selector=NOTE_ITEM_SELECTOR):
+    """在一次 evaluate 调用中提取卡片数据，参数与同步版本相同"""
+    raw_cards = await page.evaluate(CARDS_SCRIPT, card_script_args(fields, start, end, item_selector))
+    return build_cards(raw_cards, fields)
+
+
+async def extract_note_detail(page, note_id=None, url=None):
+    """在一次 evaluate 调用中提取笔记详情，返回 Note 模型"""
+    raw = await page.evaluate(NOTE_DETAIL_SCRIPT, note_detail_script_args())
+    return build_note(raw, note_id, url)
@@ -0,0 +1,348 @@
+from loguru import logger
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.aio import waits
+from xiaohongshu_mcp_py.aio import navigate
+from xiaohongshu_mcp_py.aio import extract
+from xiaohongshu_mcp_py.aio import initial_state
+from xiaohongshu_mcp_py.aio.capture import AsyncResponseCapture, FEED_API_PATTERN
+from xiaohongshu_mcp_py.xiaohongshu.capture import NOTE_API_PATTERN, parse_payload
+from xiaohongshu_mcp_py.aio.harvest import iter_cards
+from xiaohongshu_mcp_py.xiaohongshu.extract import FEED_CARD_FIELDS, to_dict
+from xiaohongshu_mcp_py.metrics import instrument
+
+
+class AsyncFeedAction:
+    def __init__(self, service, page=None):
+        """初始化Feed操作"""
+        self.service = service
+        self.page = page or service.page
+        self.feed_url = "https://www.xiaohongshu.com/explore"
+        # 从结构化数据中获取到的完整笔记模型，供本地笔记存储使用
+        self.notes = []
+    
+    @instrument('get_feeds')
+    async def get_feeds(self, page=1, size=20):
+        """获取推荐列表
+        
+        参数:
+            page: 页码
+            size: 每页数量
+        
+        返回:
+            推荐内容列表
+        """
+        try:
+            logger.info(f"正在获取推荐列表，第 {page} 页，每页 {size} 条")
+            
+            start_idx = (page - 1) * size
+            end_idx = start_idx + size
+            
+            feeds = None
+            if initial_state.enabled():
+                # 优先使用结构化数据，导航和滚动在其中完成
+                feeds = await self._get_structured_feeds(start_idx, end_idx)
+            else:
+                # 导航到探索页
+                self.timer.stage('goto')
+                await navigate.goto(self.page, self.feed_url)
+            
+            if feeds is None:
+                # 等待feed内容加载，并等待列表渲染稳定
+                self.timer.stage('wait')
+                await self.page.wait_for_selector('.note-item', timeout=10000)
+                await waits.wait_for_dom_stable(self.page, '.note-item')
+                
+                # 如果需要翻页，执行滚动操作
+                if page > 1:
+                    await self._scroll_to_page(page)
+                
+                self.timer.stage('extract')
+                if initial_state.enabled():
+                    state = await initial_state.read_page(self.page)
+                    feeds = initial_state.feed_cards(state, 'feed', FEED_CARD_FIELDS, start_idx, end_idx)
+            
+            if feeds is None:
+                # 初始状态不可用时，回退到一次性提取DOM中的feed数据
+                feeds = await extract.extract_cards(self.page, FEED_CARD_FIELDS, start_idx, end_idx)
+            
+            return {
+                "page": page,
+                "size": size,
+                "feeds": feeds,
+                "total_count": len(feeds)
+            }
+            
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
+            logger.error("推荐内容未找到或超时")
+            return {
+                "page": page,
+                "size": size,
+                "feeds": [],
+                "total_count": 0,
+                "error": "推荐内容加载超时"
+            }
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"获取推荐列表失败: {str(e)}")
+            return {
+                "page": page,
+                "size": size,
+                "feeds": [],
+                "total_count": 0,
+                "error": str(e)
+            }
+    
+    @instrument('stream_feeds')
+    async def iter_feeds(self, harvest):
+        """打开探索页，边滚动边产出 (卡片, Note 模型) 的异步生成器，用于流式接口"""
+        logger.info(f"正在流式获取推荐列表，上限 {harvest.limit} 条")
+        cards = iter_cards(self.page, self.feed_url, FEED_API_PATTERN, 'feed', FEED_CARD_FIELDS, harvest, self.timer)
+        try:
+            async for item in cards:
+                yield item
+        except Exception as e:
+            self.timer.fail(e)
+            raise
+        finally:
+            await cards.aclose()
+
+    @instrument('get_feeds_by_cursor')
+    async def get_feeds_by_cursor(self, session, offset=0, size=20):
+        """在会话页面上按游标获取推荐列表
+
+        会话页面保持在上次停下的滚动位置，已收集的笔记按 note_id 去重保存在会话中，
+        只有已收集的数量不足时才继续向下滚动，因此每一页的开销与第一页相同。
+
+        参数:
+            session: FeedSession
+            offset: 已返回的条数
+            size: 每页数量
+
+        返回:
+            推荐内容列表，has_more 表示是否还有下一页
+        """
+        try:
+            end = offset + size
+            if not session.started:
+                logger.info(f"游标会话 {session.id} 导航到探索页")
+                self.timer.stage('goto')
+                response = await navigate.goto(self.page, self.feed_url)
+                session.started = True
+                self.timer.stage('extract')
+                if initial_state.enabled():
+                    session.capture.add_notes(initial_state.feed_notes(await initial_state.read_response(response), 'feed'))
+                    session.sync_capture()
+
+            if len(session.items) < end and session.has_more and not session.full:
+                self.timer.stage('wait')
+                await self._fill_session(session, end)
+
+            self.timer.stage('serialize')
+            feeds = session.items[offset:end]
+            note_ids = {card["note_id"] for card in feeds}
+            self.notes = [note for note in session.notes if note.note_id in note_ids]
+            return {
+                "offset": offset,
+                "size": size,
+                "feeds": feeds,
+                "total_count": len(feeds),
+                "has_more": len(session.items) > end or (session.has_more and not session.full)
+            }
+
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
+            logger.error("推荐内容未找到或超时")
+            return {
+                "offset": offset,
+                "size": size,
+                "feeds": [],
+                "total_count": 0,
+                "has_more": session.has_more,
+                "error": "推荐内容加载超时"
+            }
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"获取推荐列表失败: {str(e)}")
+            return {
+                "offset": offset,
+                "size": size,
+                "feeds": [],
+                "total_count": 0,
+                "has_more": session.has_more,
+                "error": str(e)
+            }
+
+    async def _fill_session(self, session, end, max_scrolls=20):
+        """从当前滚动位置继续向下，直到会话中收集到 end 条"""
+        if initial_state.enabled():
+            capture = session.capture
+            capture.limit = len(capture.notes) + (end - len(session.items))
+            await capture.collect(max_scrolls)
+            session.sync_capture()
+            if len(session.items) >= end:
+                return
+            if capture.responses_total and not capture.has_more:
+                session.has_more = False
+                return
+
+        # 接口数据不可用时，从页面元素中提取，按 note_id 去重后继续滚动
+        await self.page.wait_for_selector('.note-item', timeout=10000)
+        for _ in range(max_scrolls):
+            session.add_cards(await extract.extract_cards(self.page, FEED_CARD_FIELDS))
+            if len(session.items) >= end or session.full:
+                return
+
+            count = await self.page.evaluate("document.querySelectorAll('.note-item').length")
+            await self.page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+            if not await waits.wait_for_count_increase(self.page, '.note-item', count):
+                await waits.wait_for_dom_stable(self.page, '.note-item')
+                if not session.add_cards(await extract.extract_cards(self.page, FEED_CARD_FIELDS)):
+                    logger.info("滚动后没有加载出新内容，停止滚动")
+                    session.has_more = False
+                    return
+
+    @instrument('get_note_detail')
+    async def get_note_detail(self, note_id):
+        """获取帖子详情
+        
+        参数:
+            note_id: 帖子ID
+        
+        返回:
+            帖子详细信息
+        """
+        try:
+            if not note_id:
+                raise ValueError("帖子ID不能为空")
+            
+            # 构建帖子详情URL
+            note_url = f"https://www.xiaohongshu.com/explore/{note_id}"
+            logger.info(f"正在获取笔记详情，ID: {note_id}")
+            
+            # 优先从服务端渲染的初始状态中提取，无需等待页面渲染
+            if initial_state.enabled():
+                # 页面已预热时使用站内导航，直接读取详情接口的响应
+                self.timer.stage('goto')
+                response, soft = await navigate.soft_goto(self.page, note_url, NOTE_API_PATTERN, match=note_id)
+                self.timer.stage('extract')
+                start = time.perf_counter()
+                if soft:
+                    note = await self._note_from_api(response, note_id)
+                else:
+                    note = initial_state.note_detail(await initial_state.read_response(response), note_id)
+                self.timer.stage('serialize')
+                if note:
+                    note.url = note_url
+                    extract_ms = round((time.perf_counter() - start) * 1000, 2)
+                    logger.info(f"笔记详情从{'详情接口' if soft else '初始状态'}提取，耗时: {extract_ms}ms，ID: {note_id}")
+                    return {
+                        "note_id": note_id,
+                        "detail": to_dict(note),
+                        "extract_ms": extract_ms
+                    }
+            else:
+                # 导航到帖子详情页
+                self.timer.stage('goto')
+                await navigate.goto(self.page, note_url)
+            
+            # 等待页面加载完成
+            self.timer.stage('wait')
+            await self.page.wait_for_selector('.note-detail', timeout=10000)
+            await waits.wait_for_dom_stable(self.page, '.note-detail')
+            
+            # 一次性提取帖子详细信息
+            self.timer.stage('extract')
+            detail, extract_ms = await self._extract_note_detail(note_id, note_url)
+            
+            return {
+                "note_id": note_id,
+                "detail": detail,
+                "extract_ms": extract_ms
+            }
+            
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
+            logger.error(f"笔记详情未找到或超时，ID: {note_id}")
+            return {
+                "note_id": note_id,
+                "detail": {},
+                "error": "帖子详情加载超时"
+            }
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"获取笔记详情失败: {str(e)}")
+            return {
+                "note_id": note_id,
+                "detail": {},
+                "error": str(e)
+            }
+    
+    async def _note_from_api(self, response, note_id):
+        """从笔记详情接口的响应中提取笔记，没有数据时返回 None"""
+        try:
+            notes, _, _ = parse_payload(await response.json())
+        except Exception as e:
+            self.timer.extraction_failed()
+            logger.debug(f"解析笔记详情接口响应失败: {str(e)}")
+            return None
+        return next((note for note in notes if note.note_id == note_id), None)
+
+    async def _get_structured_feeds(self, start_idx, end_idx):
+        """从结构化数据中获取推荐列表
+
+        首屏数据来自导航响应中的初始状态，后续数据来自滚动时站点接口返回的JSON，
+        收集到 end_idx 条后立即停止滚动。
+
+        返回:
+            卡片数据列表，结构化数据不足时返回 None
+        """
+        async with AsyncResponseCapture(self.page, FEED_API_PATTERN, limit=end_idx) as capture:
+            # 导航到探索页
+            self.timer.stage('goto')
+            response = await navigate.goto(self.page, self.feed_url)
+            self.timer.stage('extract')
+            capture.add_notes(initial_state.feed_notes(await initial_state.read_response(response), 'feed'))
+            await capture.collect()
+        
+        if len(capture.notes) <= start_idx:
+            return None
+        
+        logger.info(f"从结构化数据获取推荐列表，已收集 {len(capture.notes)} 条，接口响应 {capture.responses_total} 个")
+        self.timer.stage('serialize')
+        result = capture.feed_response(start_idx, end_idx)
+        self.notes = [feed.note for feed in result.feeds]
+        return [initial_state.note_to_card(feed.note, FEED_CARD_FIELDS) for feed in result.feeds]
+    
+    async def _scroll_to_page(self, page):
+        """滚动到指定页码位置"""
+        try:
+            # 每次滚动到底部，等待新内容加载出来后再继续
+            for _ in range(page - 1):
+                count = await self.page.evaluate("document.querySelectorAll('.note-item').length")
+                await self.page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+                if not await waits.wait_for_count_increase(self.page, '.note-item', count):
+                    logger.info("滚动后没有加载出新内容，停止滚动")
+                    break
+        except Exception as e:
+            logger.warning(f"滚动失败: {str(e)}")
+    
+    async def _extract_note_detail(self, note_id, note_url):
+        """提取帖子详细信息
+
+        返回:
+            (Note 模型字典, 提取耗时毫秒)
+        """
+        start = time.perf_counter()
+        try:
+            note = await extract.extract_note_detail(self.page, note_id, note_url)
+            detail = to_dict(note)
+        except Exception as e:
+            self.timer.extraction_failed()
+            logger.warning(f"提取笔记详情数据失败: {str(e)}")
+            detail = {}
+        
+        extract_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"笔记详情提取耗时: {extract_ms}ms，ID: {note_id}")
+        return detail, extract_ms
@@ -0,0 +1,36 @@
+from loguru import logger
+import asyncio
+from xiaohongshu_mcp_py.aio.capture import AsyncResponseCapture, FEED_API_PATTERN
+from xiaohongshu_mcp_py.feed_session import FeedSession, FeedSessionsBase
+
+
+class AsyncFeedSessions(FeedSessionsBase):
+    async def open(self, context, setup_page=None):
+        """在上下文中创建会话独占的页面，先关闭过期和多余的会话"""
+        await self.prune(reserve=1)
+        page = await context.new_page()
+        if setup_page:
+            setup_page(page)
+        capture = await AsyncResponseCapture(page, FEED_API_PATTERN).__aenter__()
+        session = FeedSession(page, capture, self.max_notes)
+        session.lock = asyncio.Lock()
+        self._register(session)
+        return session
+
+    async def close(self, session):
+        """关闭会话和其页面"""
+        self._unregister(session)
+        try:
+            await session.capture.__aexit__(None, None, None)
+            await session.page.close()
+        except Exception as e:
+            logger.warning(f"关闭游标会话失败: {str(e)}")
+
+    async def prune(self, reserve=0):
+        """关闭过期的会话，reserve 为即将创建的会话数"""
+        for session in self._stale(reserve):
+            await self.close(session)
+
+    async def close_all(self):
+        for session in list(self.sessions.values()):
+            await self.close(session)
@@ -0,0 +1,76 @@
+from loguru import logger
+from xiaohongshu_mcp_py.aio import waits
+from xiaohongshu_mcp_py.aio import navigate
+from xiaohongshu_mcp_py.aio import extract
+from xiaohongshu_mcp_py.aio import initial_state
+from xiaohongshu_mcp_py.aio.capture import AsyncResponseCapture, SCROLL_SCRIPT
+from xiaohongshu_mcp_py.xiaohongshu.extract import NOTE_ITEM_SELECTOR
+from xiaohongshu_mcp_py.xiaohongshu.harvest import Harvest, MAX_SCROLLS, COUNT_SCRIPT
+
+# Harvest 与同步版本共用，从这里一并导出
+__all__ = ['iter_cards', 'Harvest']
+
+
+async def iter_cards(page, url, url_pattern, branch, fields, harvest, timer):
+    """打开列表页并边滚动边产出 (卡片, Note 模型)，与同步版本相同
+
+    优先使用初始状态和接口响应中的结构化数据，不可用时从页面元素中提取，
+    此时 Note 模型为 None。达到 harvest 的数量上限或时间预算时结束。
+
+    参数:
+        url: 列表页地址
+        url_pattern: 列表接口 URL 正则
+        branch: 初始状态分支，'feed' 或 'search'
+        fields: 卡片字段定义
+        harvest: Harvest
+        timer: 记录各阶段耗时的 StageTimer，滚动等待新内容计入 scroll 阶段
+    """
+    if initial_state.enabled():
+        async with AsyncResponseCapture(page, url_pattern) as capture:
+            timer.stage('goto')
+            response = await navigate.goto(page, url)
+            timer.stage('extract')
+            initial = capture.add_notes(initial_state.feed_notes(await initial_state.read_response(response), branch))
+            for note in initial:
+                if harvest.accept(note.note_id):
+                    yield initial_state.note_to_card(note, fields), note
+                if harvest.done:
+                    return
+
+            timer.stage('scroll')
+            async for note in capture.iter_notes(MAX_SCROLLS):
+                if harvest.accept(note.note_id):
+                    yield initial_state.note_to_card(note, fields), note
+                if harvest.done:
+                    return
+
+            if capture.notes:
+                return
+        logger.info("未获取到结构化数据，改为从页面元素中提取")
+    else:
+        timer.stage('goto')
+        await navigate.goto(page, url)
+
+    timer.stage('wait')
+    await page.wait_for_selector(NOTE_ITEM_SELECTOR, timeout=10000)
+    idle = 0
+    for _ in range(MAX_SCROLLS):
+        seen = harvest.seen
+        timer.stage('extract')
+        for card in await extract.extract_cards(page, fields):
+            if harvest.accept(card["note_id"]):
+                yield card, None
+            if harvest.done:
+                return
+
+        # 虚拟列表中元素数量可能不变，以是否出现新笔记判断，连续两次没有新笔记时结束
+        idle = 0 if harvest.seen > seen else idle + 1
+        if idle >= 2:
+            logger.info("滚动后没有加载出新内容，停止抓取")
+            return
+
+        timer.stage('scroll')
+        count = await page.evaluate(COUNT_SCRIPT)
+        await page.evaluate(SCROLL_SCRIPT)
+        if not await waits.wait_for_count_increase(page, NOTE_ITEM_SELECTOR, count):
+            await waits.wait_for_dom_stable(page, NOTE_ITEM_SELECTOR)
@@ -0,0 +1,28 @@
+from loguru import logger
+from xiaohongshu_mcp_py.xiaohongshu.initial_state import INITIAL_STATE_SCRIPT, parse_html, enabled, feed_notes, feed_cards, note_detail, note_to_card
+
+# 不涉及页面的解析函数与同步版本共用，从这里一并导出
+__all__ = [
+    'read_response', 'read_page',
+    'INITIAL_STATE_SCRIPT', 'parse_html', 'enabled', 'feed_notes', 'feed_cards', 'note_detail', 'note_to_card'
+]
+
+
+async def read_response(response):
+    """从导航响应的 HTML 中读取初始状态，无需等待页面渲染"""
+    try:
+        if response is None or not response.ok:
+            return None
+        return parse_html(await response.text())
+    except Exception as e:
+        logger.debug(f"读取导航响应失败: {str(e)}")
+        return None
+
+
+async def read_page(page):
+    """通过 evaluate 读取当前页面的初始状态"""
+    try:
+        return await page.evaluate(INITIAL_STATE_SCRIPT)
+    except Exception as e:
+        logger.debug(f"读取页面初始状态失败: {str(e)}")
+        return None
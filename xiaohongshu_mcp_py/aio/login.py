@@ -0,0 +1,92 @@
+from loguru import logger
+import asyncio
+from xiaohongshu_mcp_py.aio import waits
+from xiaohongshu_mcp_py.aio import navigate
+from xiaohongshu_mcp_py.metrics import instrument
+
+
+class AsyncLoginAction:
+    def __init__(self, service, page=None):
+        """初始化登录操作"""
+        self.service = service
+        self.page = page or service.page
+        self.login_url = "https://www.xiaohongshu.com/explore"
+        self.login_button_selector = 'button:has-text("登录")'
+        self.avatar_selector = '.avatar'
+        self.status_selectors = [self.login_button_selector, self.avatar_selector]
+    
+    @instrument('check_login_status')
+    async def check_login_status(self):
+        """检查登录状态"""
+        try:
+            # 导航到主页
+            self.timer.stage('goto')
+            await navigate.goto(self.page, self.login_url)
+            
+            # 等待登录按钮或用户头像出现，页头稳定后再判断，登录按钮优先
+            self.timer.stage('wait')
+            matched = await waits.wait_for_any_selector(self.page, self.status_selectors, timeout=6000)
+            if matched:
+                await waits.wait_for_dom_stable(self.page, timeout=1000)
+                matched = await waits.wait_for_any_selector(self.page, self.status_selectors, timeout=1000)
+            
+            if matched == self.login_button_selector:
+                logger.info("未登录")
+                return {
+                    "is_logged_in": False,
+                    "message": "未登录"
+                }
+            if matched == self.avatar_selector:
+                logger.info("已登录")
+                return {
+                    "is_logged_in": True,
+                    "message": "已登录"
+                }
+            
+            # 超时或其他情况，默认返回未登录
+            logger.warning("无法确定登录状态")
+            return {
+                "is_logged_in": False,
+                "message": "无法确定登录状态"
+            }
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"检查登录状态失败: {str(e)}")
+            return {
+                "is_logged_in": False,
+                "message": f"检查登录状态失败: {str(e)}"
+            }
+    
+    async def login(self):
+        """手动登录 - 打开浏览器让用户手动登录"""
+        try:
+            # 打开登录页面
+            await navigate.goto(self.page, self.login_url)
+            logger.info("请在浏览器窗口中手动登录")
+            
+            # 等待用户登录完成
+            # 这里会一直等待直到用户手动登录或超时
+            # 实际实现中可能需要根据实际情况调整等待逻辑
+            while True:
+                # 会话 Cookie 出现前无需打开页面检查
+                if not await self.service._session_cookie():
+                    await asyncio.sleep(5)
+                    continue
+                
+                login_status = await self.check_login_status()
+                if login_status["is_logged_in"]:
+                    logger.info("登录成功")
+                    await self.service.save_storage_state()
+                    return True
+                
+                # 每5秒检查一次
+                await asyncio.sleep(5)
+                
+                # 可以添加超时逻辑
+                # if time.time() - start_time > timeout:
+                #     logger.error("Login timeout")
+                #     return False
+                     
+        except Exception as e:
+            logger.error(f"登录失败: {str(e)}")
+            return False
\ No newline at end of file
@@ -0,0 +1,97 @@
+from loguru import logger
+import asyncio
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.pacing import NavigationPacer, SUCCESS, FAILURE, CAPTCHA, RETRYABLE_STATUS, is_captcha, is_transient
+from xiaohongshu_mcp_py.login_cache import SITE_URL
+from xiaohongshu_mcp_py.xiaohongshu.capture import response_matches
+from xiaohongshu_mcp_py.xiaohongshu.navigate import PREWARM_URL, SOFT_NAVIGATE_SCRIPT, prewarm_enabled, is_warm
+from xiaohongshu_mcp_py.xiaohongshu.waits import max_wait_ms
+
+
+async def goto(page, url, pacer=None, **kwargs):
+    """限速导航，与同步版本相同，等待时不阻塞事件循环"""
+    pacer = pacer or NavigationPacer.shared()
+    attempt = 0
+    while True:
+        wait = pacer.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+        try:
+            response = await page.goto(url, **kwargs)
+        except PlaywrightError as e:
+            if not isinstance(e, PlaywrightTimeoutError) and not is_transient(e):
+                raise
+            pacer.record(FAILURE)
+            if attempt >= pacer.retries:
+                raise
+            reason = str(e).splitlines()[0]
+        else:
+            if is_captcha(response):
+                logger.warning(f"导航遇到验证页面: {url}")
+                pacer.record(CAPTCHA)
+                return response
+            if response is None or response.status not in RETRYABLE_STATUS:
+                pacer.record(SUCCESS)
+                return response
+            pacer.record(FAILURE)
+            if attempt >= pacer.retries:
+                return response
+            reason = f"状态码 {response.status}"
+
+        delay = pacer.backoff_delay(attempt)
+        attempt += 1
+        pacer.record_retry()
+        logger.warning(f"导航失败（{reason}），{delay:.1f}s 后第 {attempt} 次重试: {url}")
+        await asyncio.sleep(delay)
+
+
+async def prewarm(page, pacer=None):
+    """页面不在站点上时打开探索页，与同步版本相同"""
+    if not prewarm_enabled():
+        return False
+    if is_warm(page):
+        return True
+    try:
+        await goto(page, PREWARM_URL, pacer)
+        return is_warm(page)
+    except Exception as e:
+        logger.warning(f"预热页面失败: {str(e)}")
+        return False
+
+
+async def soft_goto(page, url, api_pattern, pacer=None, match=None, **kwargs):
+    """页面已预热时通过站内导航打开 url，与同步版本相同
+
+    返回:
+        (响应, 是否为站内导航)，站内导航时响应为目标页面请求的接口响应，否则为完整导航的响应
+    """
+    pacer = pacer or NavigationPacer.shared()
+    if not prewarm_enabled() or not url.startswith(SITE_URL) or not is_warm(page):
+        return await goto(page, url, pacer, **kwargs), False
+
+    wait = pacer.reserve()
+    if wait:
+        await asyncio.sleep(wait)
+
+    try:
+        async with page.expect_response(lambda response: response_matches(response, api_pattern, match), timeout=max_wait_ms()) as info:
+            await page.evaluate(SOFT_NAVIGATE_SCRIPT, url[len(SITE_URL):])
+        response = await info.value
+    except PlaywrightError as e:
+        logger.debug(f"站内导航未完成，改为完整导航: {str(e).splitlines()[0]}")
+        pacer.record_soft(False)
+        return await goto(page, url, pacer, **kwargs), False
+
+    if is_captcha(response):
+        logger.warning(f"站内导航遇到验证页面: {url}")
+        pacer.record(CAPTCHA)
+        pacer.record_soft(True)
+        return response, True
+    if response.ok:
+        pacer.record(SUCCESS)
+        pacer.record_soft(True)
+        return response, True
+    pacer.record(FAILURE)
+    pacer.record_soft(False)
+    return await goto(page, url, pacer, **kwargs), False
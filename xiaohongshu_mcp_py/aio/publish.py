@@ -0,0 +1,154 @@
+from loguru import logger
+import os
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.aio import waits
+from xiaohongshu_mcp_py.aio import navigate
+from xiaohongshu_mcp_py.metrics import instrument
+
+
+class AsyncPublishAction:
+    def __init__(self, service, page=None):
+        """初始化发布操作"""
+        self.service = service
+        self.page = page or service.page
+        self.publish_url = "https://creator.xiaohongshu.com/publish/publish-note"
+    
+    @instrument('publish_content')
+    async def publish_content(self, data):
+        """发布内容到小红书
+        
+        参数:
+            data: 包含发布内容的字典，应包含以下字段:
+                - images: 图片路径列表
+                - title: 标题
+                - content: 正文内容
+                - tags: 标签列表
+                - topics: 话题列表
+        """
+        try:
+            # 检查必要字段
+            if not data or 'images' not in data or 'title' not in data or 'content' not in data:
+                raise ValueError("缺少必要的发布字段")
+            
+            # 导航到发布页面
+            self.timer.stage('goto')
+            await navigate.goto(self.page, self.publish_url)
+            
+            # 1. 上传图片
+            self.timer.stage('upload')
+            logger.info(f"正在上传 {len(data['images'])} 张图片")
+            await self._upload_images(data['images'])
+            
+            # 2. 填写标题
+            self.timer.stage('input')
+            if 'title' in data:
+                logger.info(f"正在设置标题: {data['title']}")
+                await self.page.fill('input[placeholder="添加标题"]', data['title'])
+            
+            # 3. 填写内容
+            if 'content' in data:
+                logger.info("正在设置内容")
+                await self.page.fill('textarea[placeholder="分享你的想法..."]', data['content'])
+            
+            # 4. 添加标签
+            if 'tags' in data and data['tags']:
+                logger.info(f"正在添加 {len(data['tags'])} 个标签")
+                for tag in data['tags']:
+                    await self._add_tag(tag)
+            
+            # 5. 添加话题
+            if 'topics' in data and data['topics']:
+                logger.info(f"正在添加 {len(data['topics'])} 个话题")
+                for topic in data['topics']:
+                    await self._add_topic(topic)
+            
+            # 6. 发布
+            # 注意：实际发布操作可能需要额外的确认步骤
+            # 这里仅作为示例，实际实现需要根据网页实际结构调整
+            logger.info("正在发布内容")
+            # await self.page.click('button:has-text("发布")')
+            # await asyncio.sleep(5)
+            
+            # 由于可能需要用户确认或有安全验证，这里不实际点击发布按钮
+            # 可以返回预览信息或要求用户手动确认
+            
+            return {
+                "success": True,
+                "message": "内容准备发布成功，请在浏览器中确认发布",
+                "preview": {
+                    "title": data.get('title'),
+                    "image_count": len(data['images']),
+                    "tag_count": len(data.get('tags', [])),
+                    "topic_count": len(data.get('topics', []))
+                }
+            }
+            
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"发布内容失败: {str(e)}")
+            return {
+                "success": False,
+                "message": f"发布失败: {str(e)}"
+            }
+    
+    async def _upload_images(self, image_paths):
+        """上传图片"""
+        try:
+            # 确保图片路径存在
+            valid_paths = []
+            for path in image_paths:
+                if os.path.exists(path):
+                    valid_paths.append(os.path.abspath(path))
+                else:
+                    logger.warning(f"Image file not found: {path}")
+            
+            if not valid_paths:
+                raise ValueError("没有有效的图片文件")
+            
+            # 找到文件上传区域并上传文件
+            file_input = await self.page.wait_for_selector('input[type="file"]', timeout=5000)
+            await file_input.set_input_files(valid_paths)
+            
+            # 等待上传请求结束，最长等待配置的上限
+            await waits.wait_for_network_idle(self.page)
+            
+        except PlaywrightTimeoutError:
+            logger.error("未找到上传区域")
+            raise
+        except Exception as e:
+            logger.error(f"上传图片失败: {str(e)}")
+            raise
+    
+    async def _add_tag(self, tag):
+        """添加标签"""
+        try:
+            # 点击标签输入区域
+            await self.page.click('button:has-text("添加标签")')
+            
+            # 输入标签内容，fill 会自动等待输入框可用
+            await self.page.fill('input[placeholder="添加标签"]', tag)
+            
+            # 按回车确认，等待标签渲染完成
+            await self.page.keyboard.press('Enter')
+            await waits.wait_for_dom_stable(self.page, timeout=1000)
+            
+        except Exception as e:
+            logger.warning(f"添加标签 {tag} 失败: {str(e)}")
+            # 继续尝试其他标签，不中断流程
+    
+    async def _add_topic(self, topic):
+        """添加话题"""
+        try:
+            # 点击话题输入区域
+            await self.page.click('button:has-text("添加话题")')
+            
+            # 输入话题内容，fill 会自动等待输入框可用
+            await self.page.fill('input[placeholder="搜索话题"]', topic)
+            
+            # 选择第一个搜索结果，click 会等待搜索结果出现
+            await self.page.click('.topic-item')
+            await waits.wait_for_dom_stable(self.page, timeout=1000)
+            
+        except Exception as e:
+            logger.warning(f"添加话题 {topic} 失败: {str(e)}")
+            # 继续尝试其他话题，不中断流程
\ No newline at end of file
@@ -0,0 +1,20 @@
+from xiaohongshu_mcp_py.resource_blocker import ResourceBlockerBase
+
+
+class AsyncResourceBlocker(ResourceBlockerBase):
+    async def attach(self, context):
+        """在上下文上注册请求拦截"""
+        if not self.active:
+            return
+        await context.route('**/*', self._handle_route)
+        context.on('response', self._on_response)
+
+    async def _handle_route(self, route):
+        category = self._block_category(route.request)
+        if category:
+            self._record_blocked(category)
+            await route.abort('blockedbyclient')
+            return
+
+        self._record_allowed()
+        await route.continue_()
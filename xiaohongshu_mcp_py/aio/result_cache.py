@@ -0,0 +1,41 @@
+import asyncio
+from xiaohongshu_mcp_py.result_cache import ResultCacheBase
+
+
+class AsyncResultCache(ResultCacheBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 保存后台刷新任务的引用，避免任务在完成前被回收
+        self._tasks = set()
+
+    async def fetch(self, endpoint, params, load, bypass=False):
+        """读取缓存，未命中时等待 load() 返回的协程并写入缓存，参数与 ResultCache.fetch 相同"""
+        if not self.enabled(endpoint):
+            return await load(), "bypass"
+
+        key = self.key(endpoint, params)
+        if bypass:
+            self.record_bypass()
+            status = "bypass"
+        else:
+            status, value = self.lookup(key)
+            if status == "hit":
+                return value, status
+            if status == "stale":
+                if self._begin_refresh(key):
+                    task = asyncio.create_task(self._refresh(key, load))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return value, status
+
+        value = await load()
+        self.store(key, value)
+        return value, status
+
+    async def _refresh(self, key, load):
+        try:
+            value = await load()
+        except Exception as e:
+            self._end_refresh(key, error=e)
+            return
+        self._end_refresh(key, value)
@@ -0,0 +1,147 @@
+from loguru import logger
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.aio import waits
+from xiaohongshu_mcp_py.aio import navigate
+from xiaohongshu_mcp_py.aio import extract
+from xiaohongshu_mcp_py.aio import initial_state
+from xiaohongshu_mcp_py.aio.capture import AsyncResponseCapture, SEARCH_API_PATTERN
+from xiaohongshu_mcp_py.aio.harvest import iter_cards
+from xiaohongshu_mcp_py.xiaohongshu.extract import SEARCH_CARD_FIELDS
+from xiaohongshu_mcp_py.metrics import instrument
+
+
+class AsyncSearchAction:
+    def __init__(self, service, page=None):
+        """初始化搜索操作"""
+        self.service = service
+        self.page = page or service.page
+        self.search_url = "https://www.xiaohongshu.com/search_result/"
+        # 从结构化数据中获取到的完整笔记模型，供本地笔记存储使用
+        self.notes = []
+    
+    @instrument('search_content')
+    async def search_content(self, keyword, page=1, size=20):
+        """搜索小红书内容
+        
+        参数:
+            keyword: 搜索关键词
+            page: 页码
+            size: 每页数量
+        
+        返回:
+            搜索结果列表
+        """
+        try:
+            if not keyword:
+                raise ValueError("搜索关键词不能为空")
+            
+            # 构建搜索URL
+            search_url = f"https://www.xiaohongshu.com/search_result/{keyword}?page={page}"
+            logger.info(f"正在搜索关键词: {keyword} (第 {page} 页)")
+            
+            results = None
+            if initial_state.enabled():
+                # 优先使用初始状态和搜索接口返回的JSON，收集到 size 条后立即停止
+                async with AsyncResponseCapture(self.page, SEARCH_API_PATTERN, limit=size, match=keyword) as capture:
+                    # 导航到搜索页面，页面已预热时使用站内导航，搜索接口的响应由 capture 收集
+                    self.timer.stage('goto')
+                    response, soft = await navigate.soft_goto(self.page, search_url, SEARCH_API_PATTERN, match=keyword)
+                    self.timer.stage('extract')
+                    if not soft:
+                        capture.add_notes(initial_state.feed_notes(await initial_state.read_response(response), 'search'))
+                    await capture.collect()
+                
+                if capture.notes:
+                    self.timer.stage('serialize')
+                    result = capture.search_result(keyword, page, size)
+                    self.notes = list(result.results)
+                    results = [initial_state.note_to_card(note, SEARCH_CARD_FIELDS) for note in result.results]
+            else:
+                # 导航到搜索页面
+                self.timer.stage('goto')
+                await navigate.goto(self.page, search_url)
+            
+            if results is None:
+                # 等待搜索结果加载，并等待列表渲染稳定
+                self.timer.stage('wait')
+                await self.page.wait_for_selector('.note-item', timeout=10000)
+                await waits.wait_for_dom_stable(self.page, '.note-item')
+                
+                self.timer.stage('extract')
+                if initial_state.enabled():
+                    state = await initial_state.read_page(self.page)
+                    results = initial_state.feed_cards(state, 'search', SEARCH_CARD_FIELDS, 0, size)
+            
+            if results is None:
+                # 初始状态不可用时，回退到一次性提取DOM中的搜索结果，限制返回数量
+                results = await extract.extract_cards(self.page, SEARCH_CARD_FIELDS, 0, size)
+            
+            # 获取总页数信息（如果有）
+            total_pages = await self._get_total_pages()
+            
+            return {
+                "keyword": keyword,
+                "page": page,
+                "total_pages": total_pages,
+                "results": results,
+                "total_count": len(results)
+            }
+            
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
+            logger.error("搜索结果未找到或超时")
+            return {
+                "keyword": keyword,
+                "page": page,
+                "results": [],
+                "total_count": 0,
+                "error": "搜索结果加载超时"
+            }
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"搜索失败: {str(e)}")
+            return {
+                "keyword": keyword,
+                "page": page,
+                "results": [],
+                "total_count": 0,
+                "error": str(e)
+            }
+    
+    @instrument('stream_search')
+    async def iter_results(self, keyword, harvest):
+        """打开搜索结果页，边滚动边产出 (卡片, Note 模型) 的异步生成器，用于流式接口"""
+        if not keyword:
+            raise ValueError("搜索关键词不能为空")
+
+        logger.info(f"正在流式搜索关键词: {keyword}，上限 {harvest.limit} 条")
+        cards = iter_cards(self.page, f"{self.search_url}{keyword}", SEARCH_API_PATTERN, 'search', SEARCH_CARD_FIELDS, harvest, self.timer)
+        try:
+            async for item in cards:
+                yield item
+        except Exception as e:
+            self.timer.fail(e)
+            raise
+        finally:
+            await cards.aclose()
+
+    async def _get_total_pages(self):
+        """获取总页数"""
+        try:
+            # 检查是否有分页控件
+            pagination = await self.page.query_selector('.pagination')
+            if not pagination:
+                return 1
+            
+            # 提取最大页码
+            page_links = await pagination.query_selector_all('a')
+            if not page_links:
+                return 1
+            
+            # 假设最后一个链接是总页数
+            # 实际实现需要根据具体的分页结构调整
+            return 10  # 简单返回一个默认值，实际应该从页面提取
+            
+        except Exception as e:
+            logger.warning(f"获取总页数失败: {str(e)}")
+            return 1
\ No newline at end of file
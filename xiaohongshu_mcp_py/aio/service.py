@@ -0,0 +1,611 @@
+from playwright.async_api import async_playwright
+from loguru import logger
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from xiaohongshu_mcp_py.aio.login import AsyncLoginAction
+from xiaohongshu_mcp_py.aio.publish import AsyncPublishAction
+from xiaohongshu_mcp_py.aio.search import AsyncSearchAction
+from xiaohongshu_mcp_py.aio.feed import AsyncFeedAction
+from xiaohongshu_mcp_py.aio.comment import AsyncCommentAction
+from xiaohongshu_mcp_py.aio.page_pool import AsyncPagePool
+from xiaohongshu_mcp_py.page_pool import PagePoolTimeoutError
+from xiaohongshu_mcp_py.aio.resource_blocker import AsyncResourceBlocker
+from xiaohongshu_mcp_py.login_cache import SITE_URL
+from xiaohongshu_mcp_py.accounts import AccountRegistry, AccountBudgetExceededError
+from xiaohongshu_mcp_py.note_store import NoteStore
+from xiaohongshu_mcp_py.browser_health import BrowserHealth, HEAP_SCRIPT, RETRYABLE_METHODS
+from xiaohongshu_mcp_py.pacing import NavigationPacer
+from xiaohongshu_mcp_py.aio import navigate
+from xiaohongshu_mcp_py.aio.harvest import Harvest
+from xiaohongshu_mcp_py.aio.feed_session import AsyncFeedSessions
+from xiaohongshu_mcp_py.feed_session import FeedCursorError, encode_cursor, parse_cursor
+
+
+class AsyncXiaohongshuService:
+    def __init__(self):
+        """初始化异步小红书服务
+
+        浏览器需要在运行服务的事件循环中创建，因此初始化拆分到 init_browser 中，
+        由 launch 在后台启动，或在延迟启动时由第一个请求启动。
+        """
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.contexts = []
+        self.page_pool = None
+        # 每个账号拥有独立的上下文、页面池和请求预算，第一个账号为主账号
+        self.accounts = AccountRegistry()
+        self.session_store = self.accounts.primary.session_store
+        self.login_cache = self.accounts.primary.login_cache
+        self.note_store = NoteStore()
+        # 游标中的工作线程编号，异步服务只有一个浏览器，固定为 0
+        self.worker_id = 0
+        self.resource_blocker = AsyncResourceBlocker()
+        self.health = BrowserHealth()
+        self.feed_sessions = AsyncFeedSessions(on_close=self._forget_session_page)
+        self._restart_lock = asyncio.Lock()
+        # 浏览器启动任务，延迟启动时由第一个请求创建
+        self.lazy = os.environ.get('BROWSER_LAZY_LAUNCH', 'false').lower() == 'true'
+        self._launch = None
+
+    async def init_browser(self):
+        """初始化浏览器"""
+        try:
+            self.playwright = await async_playwright().start()
+            await self._launch_browser()
+        except Exception as e:
+            logger.error(f"初始化浏览器失败: {str(e)}")
+            await self.close()
+            # 下一个请求重新尝试启动
+            self.playwright = None
+            raise
+
+    def launch(self):
+        """在后台启动浏览器，返回启动任务
+
+        正在启动或已经启动时返回同一个任务，上次启动失败时重新启动。
+        """
+        task = self._launch
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = self._launch = asyncio.ensure_future(self.init_browser())
+            # 启动失败已在 init_browser 中记录，异常由等待启动的请求读取
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def start(self):
+        """等待浏览器启动完成，尚未启动时立即启动"""
+        # 请求被取消时不取消共用的启动任务
+        await asyncio.shield(self.launch())
+
+    def readiness(self):
+        """启动进度，与 BrowserExecutor.readiness 相同，延迟启动且尚未启动时视为可以接收请求"""
+        task = self._launch
+        failed = task is not None and task.done() and (task.cancelled() or task.exception() is not None)
+        if task is None:
+            ready = self.lazy
+        else:
+            ready = task.done() and not failed
+        return {
+            "ready": ready,
+            "workers": 1,
+            "ready_workers": int(ready),
+            "errors": [str(task.exception()) or type(task.exception()).__name__] if failed and not task.cancelled() else []
+        }
+
+    async def _launch_browser(self):
+        """启动浏览器，创建上下文和页面池"""
+        headless = os.environ.get('HEADLESS_MODE', 'true').lower() == 'true'
+        browser_bin_path = os.environ.get('BROWSER_BIN_PATH', '')
+
+        logger.info(f"正在初始化异步浏览器，无头模式: {headless}")
+        browser_kwargs = {
+            'headless': headless,
+            'args': [
+                '--no-sandbox',
+                '--disable-setuid-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+                '--window-size=1920,1080'
+            ]
+        }
+
+        if browser_bin_path:
+            browser_kwargs['executable_path'] = browser_bin_path
+
+        self.browser = await self.playwright.chromium.launch(**browser_kwargs)
+        self.health.watch_browser(self.browser)
+        for account in self.accounts.accounts:
+            await self._init_page_pool(account)
+
+        # 主账号的上下文和页面池，供登录流程和游标分页会话使用
+        primary = self.accounts.primary
+        self.context = primary.context
+        self.contexts = [context for account in self.accounts.accounts for context in account.contexts]
+        self.page_pool = primary.page_pool
+        self.page = self.page_pool.pages[0]
+
+    async def _init_page_pool(self, account):
+        """初始化账号的上下文和页面池，配置项与同步服务相同"""
+        pool_size = max(1, int(os.environ.get('PAGE_POOL_SIZE', '1')))
+        context_count = max(1, min(pool_size, int(os.environ.get('CONTEXT_POOL_SIZE', '1'))))
+        wait_timeout = float(os.environ.get('PAGE_POOL_WAIT_TIMEOUT', '30'))
+
+        # 主上下文从账号保存的会话恢复登录状态
+        account.context = await self._new_context(account=account)
+        account.contexts = [account.context]
+        if account.session_store.exists():
+            logger.info(f"已从 {account.session_store.path} 恢复会话状态")
+
+        if context_count > 1:
+            # 额外的上下文都从主上下文的同一份会话快照创建
+            storage_state = await account.context.storage_state()
+            for _ in range(context_count - 1):
+                account.contexts.append(await self._new_context(storage_state, account))
+
+        pages = []
+        for i in range(pool_size):
+            page = await account.contexts[i % context_count].new_page()
+            # 设置默认超时
+            page.set_default_timeout(60000)
+            pages.append(page)
+
+        for page in pages:
+            self.health.watch_page(page)
+        # 页面之间互不影响，并发预热
+        await asyncio.gather(*(self._prewarm(page) for page in pages))
+        if account.page_pool is None:
+            account.page_pool = AsyncPagePool(pages, wait_timeout=wait_timeout)
+        else:
+            # 浏览器重启后沿用同一个页面池，正在等待页面的请求随之被唤醒
+            await account.page_pool.reset(pages)
+        logger.info(f"账号 {account.name} 异步页面池初始化完成，页面数: {pool_size}，上下文数: {context_count}")
+
+    async def _new_context(self, storage_state=None, account=None):
+        """创建浏览器上下文并注册资源拦截
+
+        参数:
+            storage_state: 会话快照，为空时从账号保存的会话文件恢复
+            account: 上下文所属的账号，默认为主账号
+        """
+        account = account or self.accounts.primary
+        kwargs = {'storage_state': storage_state} if storage_state else account.session_store.context_kwargs()
+        context = await self.browser.new_context(**kwargs)
+        await self.resource_blocker.attach(context)
+        context.on('response', account.login_cache.on_response)
+        return context
+
+    async def save_storage_state(self, account=None):
+        """将账号主上下文的会话状态保存到磁盘，默认为主账号"""
+        account = account or self.accounts.primary
+        if not account.context:
+            return False
+        try:
+            return account.session_store.write(await account.context.storage_state())
+        except Exception as e:
+            logger.error(f"读取会话状态失败: {str(e)}")
+            return False
+
+    async def _save_all_storage_states(self):
+        for account in self.accounts.accounts:
+            await self.save_storage_state(account)
+
+    async def _reserve_account(self, name=None):
+        """选择账号并扣减一次请求预算，与同步服务相同，等待时不阻塞事件循环"""
+        deadline = time.monotonic() + self.accounts.wait
+        while True:
+            account, wait = self.accounts.reserve(name)
+            if account is not None:
+                return account
+            if time.monotonic() + wait > deadline:
+                raise AccountBudgetExceededError(
+                    f"账号 {name} 的请求预算已用完" if name else "所有账号的请求预算已用完",
+                    retry_after=math.ceil(wait)
+                )
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def _checkout(self, endpoint, account=None):
+        """选择账号，借出其页面并应用接口对应的资源拦截配置
+
+        参数:
+            account: 指定的账号名
+        """
+        await self.start()
+        account = await self._reserve_account(account)
+        async with account.page_pool.acquire() as page:
+            self.resource_blocker.set_profile(page, endpoint)
+            try:
+                yield page
+            finally:
+                await self._after_use(page, account.page_pool)
+
+    async def _after_use(self, page, page_pool):
+        """记录页面使用次数并定期读取内存，超过阈值或渲染进程崩溃时换用新页面"""
+        heap = None
+        if self.health.should_sample(page):
+            try:
+                heap = await page.evaluate(HEAP_SCRIPT)
+            except Exception as e:
+                logger.debug(f"读取页面内存失败: {str(e)}")
+
+        reason = self.health.record_use(page, heap)
+        if reason:
+            await self._recycle_page(page, reason, page_pool)
+
+    async def _recycle_page(self, page, reason, page_pool):
+        """在同一个上下文中创建新页面替换旧页面"""
+        logger.info(f"回收页面: {reason}")
+        try:
+            new_page = await page.context.new_page()
+            new_page.set_default_timeout(60000)
+        except Exception as e:
+            # 浏览器已断开时由 maintain 重启浏览器
+            logger.warning(f"创建新页面失败: {str(e)}")
+            return
+
+        self.health.forget(page)
+        self.resource_blocker.forget(page)
+        self.health.watch_page(new_page)
+        await self._prewarm(new_page)
+        await page_pool.replace(page, new_page)
+        if page is self.page:
+            self.page = new_page
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    def _forget_session_page(self, page):
+        """游标会话关闭后不再跟踪其页面"""
+        self.resource_blocker.forget(page)
+        self.health.forget(page, recycled=False)
+
+    async def _prewarm(self, page):
+        """让页面停留在站点上，之后的搜索和笔记详情可以使用站内导航"""
+        self.resource_blocker.set_profile(page, 'prewarm')
+        await navigate.prewarm(page)
+
+    async def run(self, method, *args, **kwargs):
+        """执行服务方法，与同步执行器的 invoke 相同: 执行前后检查浏览器健康状态，
+        浏览器或页面在执行期间崩溃时，重建后重新执行一次只读操作"""
+        await self.start()
+        await self.maintain()
+        crashes = self.health.crash_count
+        try:
+            result = await getattr(self, method)(*args, **kwargs)
+            failed = isinstance(result, dict) and bool(result.get("error"))
+        except Exception:
+            result, failed = None, True
+            if self.health.crash_count == crashes or method not in RETRYABLE_METHODS:
+                await self.maintain(failed)
+                raise
+
+        await self.maintain(failed)
+        if self.health.crash_count != crashes and method in RETRYABLE_METHODS:
+            logger.warning(f"{method} 执行期间浏览器崩溃，重建后重新执行")
+            self.health.record_rerun()
+            result = await getattr(self, method)(*args, **kwargs)
+        return result
+
+    async def run_stream(self, method, *args, **kwargs):
+        """逐条产出流式服务方法（如 stream_feeds）的事件，与 run 相同在执行前后检查浏览器健康状态
+
+        已经推送的结果无法撤回，因此浏览器崩溃时不重新执行，客户端断开不计为失败。
+        """
+        await self.start()
+        await self.maintain()
+        events = getattr(self, method)(*args, **kwargs)
+        failed = False
+        try:
+            async for event in events:
+                yield event
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # 先关闭生成器归还页面，重启浏览器时需要等待所有页面归还
+            await events.aclose()
+            await self.maintain(failed)
+
+    async def maintain(self, failed=None):
+        """检查浏览器健康状态，超过阈值、错误率过高或崩溃时重启浏览器
+
+        参数:
+            failed: 刚结束的操作是否失败，操作开始前调用时为 None
+        """
+        if failed is not None:
+            self.health.record_outcome(failed)
+        if self._restart_reason() is None:
+            return
+
+        async with self._restart_lock:
+            # 等待期间其他请求可能已经完成重启
+            reason = self._restart_reason()
+            if reason:
+                await self.restart_browser(reason)
+
+    def _restart_reason(self):
+        reason = self.health.restart_reason()
+        if reason is None and (self.browser is None or not self.browser.is_connected()):
+            reason = "浏览器未启动"
+        return reason
+
+    async def restart_browser(self, reason=""):
+        """等待所有页面归还后关闭并重新启动浏览器，登录状态从保存的会话恢复"""
+        logger.warning(f"正在重启浏览器: {reason}")
+        # 借出所有账号的全部页面，等待进行中的操作结束，并阻止新的操作开始
+        held = []
+        try:
+            for account in self.accounts.accounts:
+                for _ in range(account.page_pool.size if account.page_pool else 0):
+                    held.append((account.page_pool, await account.page_pool.checkout()))
+
+            if self.browser is not None and self.browser.is_connected():
+                await self._save_all_storage_states()
+            self.health.begin_close()
+            await self._close_browser()
+            # 先清空计数，再由 _launch_browser 登记新页面
+            self.health.reset()
+            await self._launch_browser()
+            logger.info("浏览器重启完成")
+        except PagePoolTimeoutError:
+            logger.warning("等待页面归还超时，稍后重试重启浏览器")
+        finally:
+            # 重启成功后旧页面已不在池中，归还时被忽略
+            for page_pool, page in held:
+                await page_pool.checkin(page)
+
+    async def check_login_status(self, force=False, account=None):
+        """检查登录状态
+
+        先根据会话 Cookie 和缓存判断，只有缓存未命中或强制检查时才打开页面。
+
+        参数:
+            force: 跳过缓存，直接打开页面检查
+            account: 账号名，默认为主账号
+        """
+        account = self.accounts.get(account)
+        session_cookie = await self._session_cookie(account)
+        if not force:
+            # 没有会话 Cookie 一定未登录，无需打开页面
+            if not session_cookie:
+                return {
+                    "is_logged_in": False,
+                    "message": "未登录",
+                    "source": "cookie"
+                }
+
+            status = account.login_cache.get(session_cookie)
+            if status:
+                return status
+
+        async with self._checkout('check_login_status', account.name) as page:
+            status = await AsyncLoginAction(self, page).check_login_status()
+        status["source"] = "page"
+
+        # 检查后 Cookie 可能已刷新，以最新值写入缓存
+        account.login_cache.set(status, await self._session_cookie(account))
+
+        # 确认已登录后保存会话，重启后无需重新登录
+        if status.get("is_logged_in"):
+            await self.save_storage_state(account)
+        return status
+
+    async def _session_cookie(self, account=None):
+        """读取账号主上下文中的会话 Cookie，不访问页面，默认为主账号"""
+        account = account or self.accounts.primary
+        try:
+            return account.login_cache.session_cookie(await account.context.cookies(SITE_URL))
+        except Exception as e:
+            logger.warning(f"读取会话 Cookie 失败: {str(e)}")
+            return None
+
+    def cached_login_status(self, account=None):
+        """读取账号缓存的登录状态，不访问浏览器，未命中返回 None"""
+        return self.accounts.get(account).login_cache.get(match_cookie=False)
+
+    async def publish_content(self, data, account=None):
+        """发布内容，account 为发布使用的账号名"""
+        async with self._checkout('publish_content', account) as page:
+            return await AsyncPublishAction(self, page).publish_content(data)
+
+    async def get_feeds(self, page=1, size=20, account=None):
+        """获取推荐列表"""
+        async with self._checkout('get_feeds', account) as tab:
+            action = AsyncFeedAction(self, tab)
+            result = await action.get_feeds(page, size)
+        await self._store_notes(action.notes or result.get("feeds"), "feed")
+        return result
+
+    async def get_feeds_by_cursor(self, cursor=None, size=20, account=None):
+        """按游标获取推荐列表，与同步服务相同
+
+        参数:
+            cursor: 上一页返回的 next_cursor，为空时创建新的会话从头开始
+            size: 每页数量
+            account: 创建新会话时使用的账号名，带游标时必须与会话的账号相同
+        """
+        await self.start()
+        await self.feed_sessions.prune()
+        session, offset = None, 0
+        if cursor:
+            _, session_id, offset = parse_cursor(cursor)
+            session = self.feed_sessions.get(session_id)
+            if session is None:
+                raise FeedCursorError("游标已失效，请不带游标重新开始")
+            if account and account != session.account:
+                raise FeedCursorError(f"游标不属于账号 {account}")
+            await self._reserve_account(session.account)
+        else:
+            selected = await self._reserve_account(account)
+            session = await self.feed_sessions.open(selected.context, self._setup_session_page)
+            session.account = selected.name
+
+        # 同一个会话的请求依次执行，避免在同一个页面上并发滚动
+        async with session.lock:
+            try:
+                action = AsyncFeedAction(self, session.page)
+                result = await action.get_feeds_by_cursor(session, offset, size)
+            finally:
+                await self._after_session_use(session)
+        next_offset = offset + len(result["feeds"])
+        result["next_cursor"] = encode_cursor(self.worker_id, session.id, next_offset) if result["has_more"] else None
+        await self._store_notes(action.notes or result.get("feeds"), "feed")
+        return result
+
+    def _setup_session_page(self, page):
+        """初始化游标会话独占的页面"""
+        page.set_default_timeout(60000)
+        self.resource_blocker.set_profile(page, 'get_feeds')
+        self.health.watch_page(page)
+
+    async def _after_session_use(self, session):
+        """记录会话页面的使用次数并定期读取内存，需要回收时直接关闭会话"""
+        heap = None
+        if self.health.should_sample(session.page):
+            try:
+                heap = await session.page.evaluate(HEAP_SCRIPT)
+            except Exception as e:
+                logger.debug(f"读取页面内存失败: {str(e)}")
+
+        reason = self.health.record_use(session.page, heap)
+        if reason and session.id in self.feed_sessions.sessions:
+            logger.info(f"关闭游标会话 {session.id}: {reason}")
+            await self.feed_sessions.close(session)
+
+    async def search_content(self, keyword, page=1, size=20, account=None):
+        """搜索内容"""
+        async with self._checkout('search_content', account) as tab:
+            action = AsyncSearchAction(self, tab)
+            result = await action.search_content(keyword, page, size)
+        await self._store_notes(action.notes or result.get("results"), "search", keyword)
+        return result
+
+    async def stream_feeds(self, limit=100, time_budget=60, skip_stored=False, account=None):
+        """边滚动边推送推荐列表的异步生成器，参数与同步服务相同
+
+        依次产出 ("note", 卡片)，最后产出 ("end", 推送统计)
+        """
+        harvest = self._harvest(limit, time_budget, skip_stored)
+        async with self._checkout('get_feeds', account) as tab:
+            async for event in self._stream(AsyncFeedAction(self, tab).iter_feeds(harvest), harvest, "feed"):
+                yield event
+
+    async def stream_search(self, keyword, limit=100, time_budget=60, skip_stored=False, account=None):
+        """边滚动边推送搜索结果的异步生成器，参数与 stream_feeds 相同"""
+        harvest = self._harvest(limit, time_budget, skip_stored)
+        async with self._checkout('search_content', account) as tab:
+            cards = AsyncSearchAction(self, tab).iter_results(keyword, harvest)
+            async for event in self._stream(cards, harvest, "search", keyword):
+                yield event
+
+    def _harvest(self, limit, time_budget, skip_stored):
+        # 按主键查询很快，直接在事件循环中执行
+        skip = self.note_store.contains if skip_stored and self.note_store.enabled else None
+        return Harvest(limit, time_budget, skip)
+
+    async def _stream(self, cards, harvest, source, keyword=None):
+        """逐条产出抓取到的卡片，结束后写入本地笔记存储"""
+        start = time.perf_counter()
+        notes = []
+        try:
+            async for card, note in cards:
+                notes.append(note or card)
+                yield "note", card
+        finally:
+            # 提前结束时关闭生成器，移除页面上的响应监听
+            await cards.aclose()
+            await self._store_notes(notes, source, keyword)
+
+        yield "end", {
+            "total_count": len(notes),
+            "skipped": harvest.skipped,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    async def get_note_detail(self, note_id, account=None):
+        """获取帖子详情"""
+        async with self._checkout('get_note_detail', account) as page:
+            result = await AsyncFeedAction(self, page).get_note_detail(note_id)
+        if result.get("detail"):
+            await self._store_notes([result["detail"]], "detail")
+        return result
+
+    async def _store_notes(self, notes, source, keyword=None):
+        """在线程池中将抓取到的笔记写入本地笔记存储，避免阻塞事件循环，写入失败不影响接口返回"""
+        if not self.note_store.enabled or not notes:
+            return
+        try:
+            await asyncio.to_thread(self.note_store.upsert_notes, notes, source, keyword)
+        except Exception as e:
+            logger.warning(f"保存笔记到本地存储失败: {str(e)}")
+
+    async def post_comment(self, note_id, content, account=None):
+        """发表评论，account 为评论使用的账号名"""
+        async with self._checkout('post_comment', account) as page:
+            return await AsyncCommentAction(self, page).post_comment(note_id, content)
+
+    def get_pool_stats(self):
+        """获取页面池统计信息"""
+        stats = self.page_pool.stats() if self.page_pool else {}
+        stats["contexts"] = len(self.contexts)
+        stats["resource_blocking"] = self.resource_blocker.stats()
+        stats["login_cache"] = self.login_cache.stats()
+        stats["feed_sessions"] = self.feed_sessions.stats()
+        stats["health"] = self.health.stats()
+        stats["pacing"] = NavigationPacer.shared().stats()
+        if self.accounts.multiple:
+            stats["accounts"] = self.accounts.stats()
+        return stats
+
+    async def close(self):
+        """关闭浏览器资源"""
+        # 浏览器仍在后台启动时先取消启动
+        task = self._launch
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # 关闭前保存各账号的会话状态
+        await self._save_all_storage_states()
+        self.note_store.close()
+        self.health.begin_close()
+        await self._close_browser()
+
+        try:
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception as e:
+            logger.error(f"关闭资源时出错: {str(e)}")
+
+    async def _close_browser(self):
+        """关闭页面、上下文和浏览器，浏览器已崩溃时忽略关闭错误"""
+        await self.feed_sessions.close_all()
+
+        try:
+            for account in self.accounts.accounts:
+                if account.page_pool:
+                    for page in account.page_pool.pages:
+                        self.resource_blocker.forget(page)
+                        await page.close()
+                for context in account.contexts:
+                    await context.close()
+                account.context = None
+                account.contexts = []
+        except Exception as e:
+            logger.error(f"关闭资源时出错: {str(e)}")
+
+        # 页面关闭失败时仍然关闭浏览器，避免残留进程
+        try:
+            if self.browser:
+                await self.browser.close()
+        except Exception as e:
+            logger.error(f"关闭浏览器时出错: {str(e)}")
+
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.contexts = []
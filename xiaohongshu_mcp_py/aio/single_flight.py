@@ -0,0 +1,34 @@
+import asyncio
+from xiaohongshu_mcp_py.executor import JobDeadlineExceededError
+from xiaohongshu_mcp_py.single_flight import SingleFlightBase
+
+
+class AsyncSingleFlight(SingleFlightBase):
+    async def do(self, key, fn, timeout=None):
+        """等待 fn() 返回的协程，同一个键已有进行中的调用时等待其结果，参数和返回值与 SingleFlight.do 相同"""
+        future = self._calls.get(key)
+        if future is not None:
+            self._coalesced += 1
+            # shield 避免某个等待者被取消或超时时影响其他请求
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout), True
+            except asyncio.TimeoutError:
+                raise JobDeadlineExceededError(f"等待合并的请求超过截止时间 ({timeout}s)")
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self._executed += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时也要取出异常，避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._calls.pop(key, None)
@@ -0,0 +1,60 @@
+from loguru import logger
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu.waits import DOM_STABLE_SCRIPT, COUNT_INCREASED_SCRIPT, DOM_QUIET_MS, max_wait_ms
+
+
+async def wait_for_any_selector(page, selectors, timeout=None):
+    """等待任意一个选择器出现
+
+    返回:
+        最先匹配到的选择器，超时返回 None
+    """
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        await page.wait_for_selector(', '.join(selectors), timeout=timeout)
+    except PlaywrightTimeoutError:
+        return None
+
+    for selector in selectors:
+        if await page.query_selector(selector):
+            return selector
+    return None
+
+
+async def wait_for_dom_stable(page, selector=None, quiet_ms=DOM_QUIET_MS, timeout=None):
+    """等待 DOM 变化停止
+
+    参数:
+        selector: 观察该元素所在的容器，为空时观察整个 body
+        quiet_ms: 持续无变化多久视为稳定
+        timeout: 等待上限（毫秒）
+
+    返回:
+        是否在上限内稳定
+    """
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        return await page.evaluate(DOM_STABLE_SCRIPT, [selector, quiet_ms, timeout])
+    except Exception as e:
+        logger.debug(f"等待 DOM 稳定失败: {str(e)}")
+        return False
+
+
+async def wait_for_network_idle(page, timeout=None):
+    """等待网络空闲，超时返回 False"""
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        await page.wait_for_load_state('networkidle', timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def wait_for_count_increase(page, selector, count, timeout=None):
+    """等待匹配元素数量超过 count（用于滚动加载），超时返回 False"""
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        await page.wait_for_function(COUNT_INCREASED_SCRIPT, arg=[selector, count], timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
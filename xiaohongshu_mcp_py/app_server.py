@@ -1,34 +1,368 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from loguru import logger
+import queue
 import threading
 import time
+from xiaohongshu_mcp_py.executor import ExecutorQueueFullError, JobDeadlineExceededError
+from xiaohongshu_mcp_py.accounts import AccountBudgetExceededError, UnknownAccountError, account_worker
+from xiaohongshu_mcp_py import metrics
+from xiaohongshu_mcp_py.result_cache import ResultCache
+from xiaohongshu_mcp_py.single_flight import SingleFlight
+from xiaohongshu_mcp_py.batch import parse_batch, effective_concurrency, batch_item, batch_summary
+from xiaohongshu_mcp_py.streaming import MEDIA_TYPES, STREAM_HEADERS, format_event, stream_format, stream_params
+
+# 流式响应缓冲的事件数，客户端读取过慢时抓取线程最多等待 STREAM_EMIT_TIMEOUT 秒
+STREAM_QUEUE_SIZE = 256
+STREAM_EMIT_TIMEOUT = 30
 
 
 class AppServer:
-    def __init__(self, xiaohongshu_service):
+    def __init__(self, xiaohongshu_service=None, executor=None):
+        """初始化应用服务器
+
+        参数:
+            xiaohongshu_service: 直接调用的服务实例
+            executor: 浏览器执行器，提供时所有浏览器操作都投递到执行器的工作线程
+        """
+        if xiaohongshu_service is None and executor is None:
+            raise ValueError("必须提供服务实例或浏览器执行器")
+        
         self.app = Flask(__name__)
         self.service = xiaohongshu_service
+        self.executor = executor
+        self.result_cache = ResultCache()
+        self.single_flight = SingleFlight()
+        self._note_store = None
+        self._note_store_lock = threading.Lock()
         self.server_thread = None
         self.stop_event = threading.Event()
         
         # 注册路由
         self._register_routes()
     
+    @property
+    def note_store(self):
+        """本地笔记存储，第一次使用时才导入和打开，不拖慢服务启动"""
+        with self._note_store_lock:
+            if self._note_store is None:
+                from xiaohongshu_mcp_py.note_store import NoteStore
+                self._note_store = NoteStore()
+            return self._note_store
+    
+    def _readiness(self):
+        """浏览器启动进度，直接调用服务实例时服务已经创建完成"""
+        if self.executor is None:
+            return {'ready': True, 'workers': 1, 'ready_workers': 1, 'errors': []}
+        return self.executor.readiness()
+    
+    def _call(self, method, *args, worker=None, **kwargs):
+        """调用服务方法，配置了执行器时投递到工作线程执行
+
+        参数:
+            worker: 指定执行的工作线程编号
+        """
+        if self.executor is None:
+            return getattr(self.service, method)(*args, **kwargs)
+        
+        deadline = request.headers.get('X-Request-Deadline', type=float)
+        worker = self._account_worker() if worker is None else worker
+        return self.executor.call(method, *args, deadline=deadline, worker=worker, **kwargs)
+    
+    def _account(self):
+        """请求指定的账号名，来自查询参数 account 或请求头 X-Account，未指定时返回 None"""
+        account = request.args.get('account', '').strip() or request.headers.get('X-Account', '').strip()
+        return account or None
+    
+    def _account_worker(self, account=None):
+        """请求指定账号时，同一账号的请求始终由同一个工作线程或工作进程执行
+
+        参数:
+            account: 已确定的账号名，如请求体中的 account 字段，默认读取查询参数和请求头
+
+        返回:
+            工作线程编号，未指定账号时返回 None，由空闲的工作线程执行
+        """
+        account = account or self._account()
+        if not account or self.executor is None:
+            return None
+        return account_worker(account, self.executor.worker_count)
+    
+    def _cached_call(self, method, *args):
+        """通过结果缓存调用只读的服务方法
+
+        请求头 Cache-Control: no-cache 时跳过缓存读取。缓存未命中时，
+        接口和参数相同的并发请求合并为一次浏览器调用，共享同一个结果。
+        请求指定账号时，账号名作为最后一个参数传给服务方法，各账号的结果分别缓存。
+
+        返回:
+            (结果, 响应头)，响应头 X-Cache 表示缓存状态，X-Coalesced 表示是否共享了其他请求的结果
+        """
+        account = self._account()
+        if account:
+            args += (account,)
+        bypass = 'no-cache' in request.headers.get('Cache-Control', '').lower()
+        # 后台刷新在请求上下文之外执行，预先读取截止时间
+        deadline = request.headers.get('X-Request-Deadline', type=float)
+        result, status, coalesced = self._cached_fetch(method, args, bypass, deadline, self._account_worker())
+        headers = {'X-Cache': status.upper()}
+        if coalesced:
+            headers['X-Coalesced'] = 'true'
+        return result, headers
+    
+    def _cached_fetch(self, method, args, bypass=False, deadline=None, worker=None):
+        """_cached_call 的实现，不依赖请求上下文，可以在其他线程中调用
+
+        参数:
+            worker: 指定执行的工作线程编号，各工作线程的登录会话可能不同，结果分别缓存
+
+        返回:
+            (结果, 缓存状态, 是否共享了其他请求的结果)
+        """
+        params = args if worker is None else args + (('worker', worker),)
+        key = self.result_cache.key(method, params)
+        coalesced = []
+        # 共享其他请求的结果时同样遵守本请求的截止时间
+        timeout = None
+        if self.executor is not None:
+            timeout = self.executor.default_deadline if deadline is None else deadline
+        
+        def call():
+            if self.executor is None:
+                return getattr(self.service, method)(*args)
+            return self.executor.call(method, *args, deadline=deadline, worker=worker)
+        
+        def load():
+            result, shared = self.single_flight.do(key, call, timeout=timeout)
+            coalesced.append(shared)
+            return result
+        
+        result, status = self.result_cache.fetch(method, params, load, bypass=bypass)
+        return result, status, any(coalesced)
+    
+    def _submit(self, method, *args, **kwargs):
+        """异步调用服务方法，返回 Future，配置了执行器时投递到工作线程执行"""
+        if self.executor is not None:
+            deadline = request.headers.get('X-Request-Deadline', type=float)
+            return self.executor.submit(method, *args, deadline=deadline, worker=self._account_worker(), **kwargs)
+        
+        future = Future()
+        
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(getattr(self.service, method)(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, daemon=True).start()
+        return future
+    
+    def _stream_response(self, method, *args, **kwargs):
+        """调用服务的流式抓取方法，将抓取到的笔记边抓取边写入响应
+
+        抓取在工作线程中执行，通过有界队列交给响应生成器。客户端断开或读取过慢时，
+        emit 返回 False，抓取随之停止。
+        """
+        fmt = stream_format(request.args.get('format'), request.headers.get('Accept'))
+        events = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        closed = threading.Event()
+        
+        def emit(card):
+            if closed.is_set():
+                return False
+            try:
+                events.put(('note', card), timeout=STREAM_EMIT_TIMEOUT)
+                return True
+            except queue.Full:
+                return False
+        
+        # 队列已满时在响应开始前抛出 ExecutorQueueFullError
+        future = self._submit(method, *args, emit=emit, **kwargs)
+        
+        def finish(done):
+            if closed.is_set():
+                return
+            try:
+                event = ('end', done.result())
+            except Exception as e:
+                logger.error(f"流式抓取失败: {str(e)}")
+                event = ('error', {'message': str(e) or type(e).__name__})
+            try:
+                events.put(event, timeout=STREAM_EMIT_TIMEOUT)
+            except queue.Full:
+                pass
+        
+        future.add_done_callback(finish)
+        
+        def generate():
+            try:
+                while True:
+                    event, data = events.get()
+                    yield format_event(event, data, fmt)
+                    if event != 'note':
+                        break
+            finally:
+                closed.set()
+        
+        return Response(generate(), mimetype=MEDIA_TYPES[fmt], headers=STREAM_HEADERS)
+    
+    def _stream_params(self):
+        params = stream_params(
+            request.args.get('limit', type=int),
+            request.args.get('time_budget', type=float),
+            request.args.get('dedup')
+        )
+        params['account'] = self._account()
+        return params
+    
+    def _note_details(self, note_ids, concurrency):
+        """并发获取多个笔记详情
+
+        每个笔记作为独立的任务投递，由空闲的工作线程执行，同时进行中的任务不超过 concurrency 个，
+        单个笔记失败不影响其他笔记。结果经过结果缓存，重复的笔记ID只访问一次浏览器。
+
+        返回:
+            (按请求顺序排列的 Future 列表, 线程池)
+        """
+        bypass = 'no-cache' in request.headers.get('Cache-Control', '').lower()
+        deadline = request.headers.get('X-Request-Deadline', type=float)
+        account = self._account()
+        worker = self._account_worker()
+        
+        def fetch(index, note_id):
+            try:
+                args = (note_id, account) if account else (note_id,)
+                result, status, _ = self._cached_fetch('get_note_detail', args, bypass, deadline, worker)
+                return batch_item(index, note_id, result, cache=status)
+            except Exception as e:
+                logger.warning(f"获取笔记详情失败，ID: {note_id}: {str(e)}")
+                return batch_item(index, note_id, error=str(e) or type(e).__name__)
+        
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='note-details')
+        return [pool.submit(fetch, i, note_id) for i, note_id in enumerate(note_ids)], pool
+    
+    def _cached_login_status(self):
+        """读取各工作线程缓存的登录状态，不访问浏览器"""
+        services = self.executor.services if self.executor is not None else [self.service]
+        for service in list(services):
+            status = service.cached_login_status()
+            if status:
+                return status
+        return None
+    
+    def _error_response(self, action, e):
+        """将异常转换为错误响应"""
+        if isinstance(e, ExecutorQueueFullError):
+            logger.warning(f"{action}失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+        if isinstance(e, JobDeadlineExceededError):
+            logger.warning(f"{action}失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 504
+        if isinstance(e, AccountBudgetExceededError):
+            logger.warning(f"{action}失败: {str(e)}")
+            return jsonify({'success': False, 'message': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+        if isinstance(e, UnknownAccountError):
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        logger.error(f"{action}失败: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    def _metrics_text(self):
+        """合并本进程和各工作进程的指标，连同执行器、页面池和浏览器内存的当前值输出为 Prometheus 文本格式"""
+        if self.executor is None:
+            executor_stats, pools, snapshots = None, [self.service.get_pool_stats()], []
+        else:
+            executor_stats = self.executor.stats()
+            pools = [service.get_pool_stats() for service in self.executor.services]
+            snapshots = self.executor.metrics_snapshots()
+        snapshot = metrics.merge([metrics.registry.snapshot()] + snapshots)
+        return metrics.render(snapshot, metrics.collect_samples(executor_stats, pools))
+    
     def _register_routes(self):
+        # 记录每个请求的耗时，按路由区分
+        @self.app.before_request
+        def start_timer():
+            g.request_started_at = time.perf_counter()
+        
+        @self.app.after_request
+        def record_latency(response):
+            started_at = g.get('request_started_at')
+            if started_at is None:
+                return response
+            labels = {
+                'route': request.url_rule.rule if request.url_rule else 'unmatched',
+                'method': request.method,
+                'status': response.status_code
+            }
+            
+            def observe():
+                metrics.registry.observe('xhs_http_request_duration_seconds', time.perf_counter() - started_at, **labels)
+            
+            # 流式响应在此时只返回了生成器，推送结束、连接关闭后才记录耗时
+            if response.is_streamed:
+                response.call_on_close(observe)
+            else:
+                observe()
+            return response
+        
         # 健康检查
         @self.app.route('/health', methods=['GET'])
         def health():
             return jsonify({'status': 'ok'}), 200
         
+        # 就绪检查，/health 只表示进程存活，浏览器启动完成前返回503
+        @self.app.route('/ready', methods=['GET'])
+        def ready():
+            readiness = self._readiness()
+            if readiness['ready']:
+                return jsonify({'status': 'ready', **readiness}), 200
+            status = 'failed' if len(readiness['errors']) >= readiness['workers'] else 'starting'
+            return jsonify({'status': status, **readiness}), 503, {'Retry-After': '1'}
+        
+        # Prometheus 指标
+        @self.app.route('/metrics', methods=['GET'])
+        def prometheus_metrics():
+            try:
+                return Response(self._metrics_text(), content_type=metrics.CONTENT_TYPE)
+            except Exception as e:
+                return self._error_response("获取指标", e)
+        
+        # 页面池状态
+        @self.app.route('/api/v1/pool_stats', methods=['GET'])
+        def pool_stats():
+            try:
+                if self.executor is None:
+                    stats = {'pools': [self.service.get_pool_stats()]}
+                else:
+                    stats = {
+                        'executor': self.executor.stats(),
+                        'pools': [service.get_pool_stats() for service in self.executor.services]
+                    }
+                stats['result_cache'] = self.result_cache.stats()
+                stats['single_flight'] = self.single_flight.stats()
+                stats['note_store'] = self.note_store.stats()
+                return jsonify({'success': True, 'data': stats}), 200
+            except Exception as e:
+                return self._error_response("获取页面池状态", e)
+        
         # API v1 路由组
         @self.app.route('/api/v1/check_login', methods=['GET'])
         def check_login():
             try:
-                status = self.service.check_login_status()
+                force = request.args.get('force', 'false').lower() == 'true'
+                account = self._account()
+                if not force and not account:
+                    # 缓存未过期时直接返回，无需排队等待浏览器
+                    status = self._cached_login_status()
+                    if status:
+                        return jsonify({'success': True, 'data': status}), 200
+                
+                status = self._call('check_login_status', force, account)
                 return jsonify({'success': True, 'data': status}), 200
             except Exception as e:
-                logger.error(f"检查登录状态失败: {str(e)}")
-                return jsonify({'success': False, 'message': str(e)}), 500
+                return self._error_response("检查登录状态", e)
         
         @self.app.route('/api/v1/publish', methods=['POST'])
         def publish():
@@ -37,11 +371,12 @@ class AppServer:
                 if not data:
                     return jsonify({'success': False, 'message': '未提供数据'}), 400
                 
-                result = self.service.publish_content(data)
+                # 请求体中的 account 字段指定发布使用的账号
+                account = data.pop('account', None) or self._account()
+                result = self._call('publish_content', data, account, worker=self._account_worker(account))
                 return jsonify({'success': True, 'data': result}), 200
             except Exception as e:
-                logger.error(f"发布失败: {str(e)}")
-                return jsonify({'success': False, 'message': str(e)}), 500
+                return self._error_response("发布", e)
         
         @self.app.route('/api/v1/feeds', methods=['GET'])
         def get_feeds():
@@ -49,41 +384,184 @@ class AppServer:
                 page = request.args.get('page', 1, type=int)
                 size = request.args.get('size', 20, type=int)
                 
-                feeds = self.service.get_feeds(page, size)
-                return jsonify({'success': True, 'data': feeds}), 200
+                # 游标分页: 空游标创建新会话，之后的请求送回创建会话的工作线程
+                cursor = request.args.get('cursor')
+                if cursor is not None:
+                    from xiaohongshu_mcp_py.feed_session import parse_cursor
+                    worker = parse_cursor(cursor)[0] if cursor else None
+                    feeds = self._call('get_feeds_by_cursor', cursor, size, self._account(), worker=worker)
+                    return jsonify({'success': True, 'data': feeds}), 200
+                
+                feeds, headers = self._cached_call('get_feeds', page, size)
+                return jsonify({'success': True, 'data': feeds}), 200, headers
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
             except Exception as e:
-                logger.error(f"获取推荐列表失败: {str(e)}")
-                return jsonify({'success': False, 'message': str(e)}), 500
+                return self._error_response("获取推荐列表", e)
         
         @self.app.route('/api/v1/search', methods=['GET'])
         def search():
             try:
-                keyword = request.args.get('keyword', '')
+                keyword = request.args.get('keyword', '').strip()
                 page = request.args.get('page', 1, type=int)
                 size = request.args.get('size', 20, type=int)
                 
                 if not keyword:
                     return jsonify({'success': False, 'message': '请输入搜索关键词'}), 400
                 
-                results = self.service.search_content(keyword, page, size)
-                return jsonify({'success': True, 'data': results}), 200
+                # 本地全文索引中有足够的结果时直接返回，不访问浏览器
+                if request.args.get('prefer_local', 'false').lower() == 'true' and self.note_store.enabled:
+                    local_min = request.args.get('local_min', size, type=int)
+                    results = self.note_store.search_result(keyword, page, size)
+                    if results['total_count'] and results['total_count'] >= local_min:
+                        return jsonify({'success': True, 'data': results}), 200, {'X-Source': 'local'}
+                
+                results, headers = self._cached_call('search_content', keyword, page, size)
+                return jsonify({'success': True, 'data': results}), 200, headers
+            except Exception as e:
+                return self._error_response("搜索", e)
+        
+        # 流式抓取，逐条返回 NDJSON 或 SSE
+        @self.app.route('/api/v1/feeds/stream', methods=['GET'])
+        def stream_feeds():
+            try:
+                return self._stream_response('stream_feeds', **self._stream_params())
+            except Exception as e:
+                return self._error_response("流式获取推荐列表", e)
+        
+        @self.app.route('/api/v1/search/stream', methods=['GET'])
+        def stream_search():
+            try:
+                keyword = request.args.get('keyword', '').strip()
+                
+                if not keyword:
+                    return jsonify({'success': False, 'message': '请输入搜索关键词'}), 400
+                
+                return self._stream_response('stream_search', keyword, **self._stream_params())
             except Exception as e:
-                logger.error(f"搜索失败: {str(e)}")
-                return jsonify({'success': False, 'message': str(e)}), 500
+                return self._error_response("流式搜索", e)
         
         @self.app.route('/api/v1/note_detail', methods=['GET'])
         def get_note_detail():
             try:
-                note_id = request.args.get('note_id', '')
+                note_id = request.args.get('note_id', '').strip()
+                
+                if not note_id:
+                    return jsonify({'success': False, 'message': '请输入笔记ID'}), 400
+                
+                detail, headers = self._cached_call('get_note_detail', note_id)
+                return jsonify({'success': True, 'data': detail}), 200, headers
+            except Exception as e:
+                return self._error_response("获取笔记详情", e)
+        
+        @self.app.route('/api/v1/note_details', methods=['POST'])
+        def get_note_details():
+            try:
+                note_ids, requested = parse_batch(request.json)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            
+            # 同步版每个工作线程同时只能执行一个任务，并发数不超过工作线程数
+            workers = self.executor.worker_count if self.executor is not None else 1
+            concurrency = effective_concurrency(requested, workers, "工作线程数")
+            
+            try:
+                start = time.perf_counter()
+                futures, pool = self._note_details(note_ids, concurrency)
+                
+                if request.args.get('stream', 'false').lower() != 'true':
+                    items = [future.result() for future in futures]
+                    pool.shutdown()
+                    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+                    data = {'results': items, **batch_summary(items, elapsed_ms, concurrency, requested)}
+                    return jsonify({'success': True, 'data': data}), 200
+                
+                # 流式返回，按完成顺序逐条输出，index 为请求中的位置
+                fmt = stream_format(request.args.get('format'), request.headers.get('Accept'))
+                
+                def generate():
+                    items = []
+                    try:
+                        for future in as_completed(futures):
+                            items.append(future.result())
+                            yield format_event('note', items[-1], fmt)
+                        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+                        yield format_event('end', batch_summary(items, elapsed_ms, concurrency, requested), fmt)
+                    finally:
+                        # 客户端断开时取消尚未开始的笔记
+                        pool.shutdown(wait=False, cancel_futures=True)
+                
+                return Response(generate(), mimetype=MEDIA_TYPES[fmt], headers=STREAM_HEADERS)
+            except Exception as e:
+                return self._error_response("批量获取笔记详情", e)
+        
+        # 本地笔记存储查询，无需浏览器
+        @self.app.route('/api/v1/stored_notes', methods=['GET'])
+        def stored_notes():
+            try:
+                if not self.note_store.enabled:
+                    return jsonify({'success': False, 'message': '未启用本地笔记存储'}), 404
+                
+                page = max(1, request.args.get('page', 1, type=int))
+                size = min(max(1, request.args.get('size', 20, type=int)), 100)
+                notes, total = self.note_store.list_notes(
+                    user_id=request.args.get('user_id'),
+                    username=request.args.get('username'),
+                    tag=request.args.get('tag'),
+                    keyword=request.args.get('keyword'),
+                    since=request.args.get('since', type=float),
+                    until=request.args.get('until', type=float),
+                    page=page,
+                    size=size
+                )
+                return jsonify({'success': True, 'data': {
+                    'page': page,
+                    'size': size,
+                    'notes': notes,
+                    'total_count': total
+                }}), 200
+            except Exception as e:
+                return self._error_response("查询本地笔记", e)
+        
+        @self.app.route('/api/v1/local_search', methods=['GET'])
+        def local_search():
+            try:
+                keyword = request.args.get('keyword', '').strip()
+                page = max(1, request.args.get('page', 1, type=int))
+                size = min(max(1, request.args.get('size', 20, type=int)), 100)
+                
+                if not keyword:
+                    return jsonify({'success': False, 'message': '请输入搜索关键词'}), 400
+                if not self.note_store.enabled:
+                    return jsonify({'success': False, 'message': '未启用本地笔记存储'}), 404
+                
+                notes, total = self.note_store.search(keyword, page, size)
+                return jsonify({'success': True, 'data': {
+                    'keyword': keyword,
+                    'page': page,
+                    'size': size,
+                    'notes': notes,
+                    'total_count': total
+                }}), 200
+            except Exception as e:
+                return self._error_response("本地搜索", e)
+        
+        @self.app.route('/api/v1/stored_note', methods=['GET'])
+        def stored_note():
+            try:
+                note_id = request.args.get('note_id', '').strip()
                 
                 if not note_id:
                     return jsonify({'success': False, 'message': '请输入笔记ID'}), 400
+                if not self.note_store.enabled:
+                    return jsonify({'success': False, 'message': '未启用本地笔记存储'}), 404
                 
-                detail = self.service.get_note_detail(note_id)
-                return jsonify({'success': True, 'data': detail}), 200
+                note = self.note_store.get_note(note_id)
+                if note is None:
+                    return jsonify({'success': False, 'message': '本地未保存该笔记'}), 404
+                return jsonify({'success': True, 'data': note}), 200
             except Exception as e:
-                logger.error(f"获取笔记详情失败: {str(e)}")
-                return jsonify({'success': False, 'message': str(e)}), 500
+                return self._error_response("查询本地笔记", e)
         
         @self.app.route('/api/v1/comment', methods=['POST'])
         def comment():
@@ -92,11 +570,11 @@ class AppServer:
                 if not data or 'note_id' not in data or 'content' not in data:
                     return jsonify({'success': False, 'message': '缺少必要的字段'}), 400
                 
-                result = self.service.post_comment(data['note_id'], data['content'])
+                account = data.get('account') or self._account()
+                result = self._call('post_comment', data['note_id'], data['content'], account, worker=self._account_worker(account))
                 return jsonify({'success': True, 'data': result}), 200
             except Exception as e:
-                logger.error(f"发表评论失败: {str(e)}")
-                return jsonify({'success': False, 'message': str(e)}), 500
+                return self._error_response("发表评论", e)
     
     def start(self, host='0.0.0.0', port=18060):
         """启动服务器"""
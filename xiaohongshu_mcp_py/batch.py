@@ -0,0 +1,81 @@
+from loguru import logger
+import os
+
+# 单次批量请求最多包含的笔记ID数
+MAX_BATCH_IDS = 500
+
+
+def max_concurrency():
+    """批量请求的并发上限，读取 NOTE_DETAILS_CONCURRENCY，默认 4"""
+    return max(1, int(os.environ.get('NOTE_DETAILS_CONCURRENCY', '4')))
+
+
+def parse_batch(data):
+    """解析批量笔记详情请求体
+
+    参数:
+        data: {"note_ids": [...], "concurrency": 4}，concurrency 可选且不超过配置的上限
+
+    返回:
+        (去除空白后的笔记ID列表, 并发数)，请求体无效时抛出 ValueError
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('note_ids'), list) or not data['note_ids']:
+        raise ValueError("请提供笔记ID列表 note_ids")
+
+    note_ids = [str(note_id).strip() for note_id in data['note_ids']]
+    if not all(note_ids):
+        raise ValueError("笔记ID不能为空")
+    if len(note_ids) > MAX_BATCH_IDS:
+        raise ValueError(f"单次最多请求 {MAX_BATCH_IDS} 个笔记")
+
+    limit = max_concurrency()
+    try:
+        concurrency = int(data.get('concurrency') or limit)
+    except (TypeError, ValueError):
+        raise ValueError("concurrency 必须为整数")
+    return note_ids, min(max(1, concurrency), limit, len(note_ids))
+
+
+def effective_concurrency(concurrency, capacity, unit):
+    """实际并发数，请求的并发数超过可同时执行的数量时降低并记录警告
+
+    参数:
+        concurrency: parse_batch 得到的并发数
+        capacity: 可同时执行的任务数，如工作线程数或页面池大小
+        unit: 日志中 capacity 的名称
+    """
+    capacity = max(1, capacity)
+    if concurrency > capacity:
+        logger.warning(f"批量获取笔记详情的并发数 {concurrency} 超过{unit} {capacity}，实际并发数为 {capacity}")
+        return capacity
+    return concurrency
+
+
+def batch_item(index, note_id, result=None, error=None, cache=None):
+    """单个笔记的结果，get_note_detail 返回的 error 也视为失败"""
+    if error is None and result is not None and result.get("error"):
+        error = result["error"]
+    item = {"index": index, "note_id": note_id, "success": error is None}
+    if error is None:
+        item["data"] = result
+        if cache:
+            item["cache"] = cache
+    else:
+        item["error"] = error
+    return item
+
+
+def batch_summary(items, elapsed_ms, concurrency, requested_concurrency=None):
+    """批量请求的统计信息
+
+    参数:
+        concurrency: 实际并发数
+        requested_concurrency: 请求体或配置给出的并发数，默认与实际并发数相同
+    """
+    return {
+        "total_count": len(items),
+        "failed_count": sum(1 for item in items if not item["success"]),
+        "concurrency": concurrency,
+        "requested_concurrency": requested_concurrency or concurrency,
+        "elapsed_ms": elapsed_ms
+    }
@@ -0,0 +1,179 @@
+from collections import deque
+from loguru import logger
+import os
+import threading
+
+# 读取页面 JS 堆占用（字节），Chromium 支持 performance.memory
+HEAP_SCRIPT = "performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+# 计算错误率至少需要的任务数
+MIN_OUTCOMES = 10
+
+# 浏览器或页面崩溃后可以安全重新执行的只读操作
+RETRYABLE_METHODS = ('check_login_status', 'get_feeds', 'search_content', 'get_note_detail')
+
+
+def _env_number(name, default, cast=float):
+    return cast(os.environ.get(name, str(default)))
+
+
+class BrowserHealth:
+    def __init__(self, page_max_uses=None, page_max_heap_mb=None, browser_max_uses=None,
+                 browser_max_heap_mb=None, max_error_rate=None, window=20, sample_every=None):
+        """浏览器健康状态，记录页面和浏览器的使用次数、内存和错误率，判断何时回收
+
+        长时间运行的 Chromium 内存会持续增长，并偶尔崩溃。页面超过使用次数或内存阈值时换用新页面，
+        整个浏览器超过阈值、错误率过高或崩溃时重启浏览器并从保存的会话恢复登录状态。
+        阈值为 0 时不检查对应项。
+
+        参数:
+            page_max_uses: 单个页面最多使用次数，默认读取 BROWSER_PAGE_MAX_USES
+            page_max_heap_mb: 单个页面 JS 堆上限（MB），默认读取 BROWSER_PAGE_MAX_HEAP_MB
+            browser_max_uses: 浏览器启动后最多执行的操作数，默认读取 BROWSER_MAX_USES
+            browser_max_heap_mb: 所有页面 JS 堆合计上限（MB），默认读取 BROWSER_MAX_HEAP_MB
+            max_error_rate: 最近 window 个任务的失败率上限，默认读取 BROWSER_MAX_ERROR_RATE
+            window: 计算错误率的任务数
+            sample_every: 每个页面每使用多少次读取一次内存，默认读取 BROWSER_HEALTH_SAMPLE_EVERY
+        """
+        self.page_max_uses = _env_number('BROWSER_PAGE_MAX_USES', 200, int) if page_max_uses is None else page_max_uses
+        self.page_max_heap_mb = _env_number('BROWSER_PAGE_MAX_HEAP_MB', 512) if page_max_heap_mb is None else page_max_heap_mb
+        self.browser_max_uses = _env_number('BROWSER_MAX_USES', 2000, int) if browser_max_uses is None else browser_max_uses
+        self.browser_max_heap_mb = _env_number('BROWSER_MAX_HEAP_MB', 2048) if browser_max_heap_mb is None else browser_max_heap_mb
+        self.max_error_rate = _env_number('BROWSER_MAX_ERROR_RATE', 0.8) if max_error_rate is None else max_error_rate
+        self.sample_every = max(1, _env_number('BROWSER_HEALTH_SAMPLE_EVERY', 10, int) if sample_every is None else sample_every)
+
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._crashed_pages = set()
+        self._outcomes = deque(maxlen=window)
+        self._uses = 0
+        self._disconnected = False
+        self._closing = False
+        # 每次崩溃加一，任务执行前后不一致说明执行期间发生了崩溃
+        self.crash_count = 0
+
+        # 统计数据
+        self._page_recycles = 0
+        self._browser_restarts = 0
+        self._reruns = 0
+
+    def watch_browser(self, browser):
+        """监听浏览器断开，主动关闭时不视为崩溃"""
+        browser.on('disconnected', lambda *_: self._on_disconnected())
+
+    def watch_page(self, page):
+        """监听页面渲染进程崩溃"""
+        with self._lock:
+            self._pages[page] = {"uses": 0, "heap_mb": 0.0}
+        page.on('crash', lambda *_: self._on_page_crash(page))
+
+    def _on_disconnected(self):
+        with self._lock:
+            if self._closing:
+                return
+            self._disconnected = True
+            self.crash_count += 1
+        logger.error("浏览器已断开连接")
+
+    def _on_page_crash(self, page):
+        with self._lock:
+            self._crashed_pages.add(page)
+            self.crash_count += 1
+        logger.error("页面渲染进程崩溃")
+
+    def should_sample(self, page):
+        """本次使用后是否读取页面内存"""
+        with self._lock:
+            info = self._pages.get(page)
+            return info is not None and (info["uses"] + 1) % self.sample_every == 0
+
+    def record_use(self, page, heap_bytes=None):
+        """记录页面使用一次
+
+        参数:
+            heap_bytes: 本次读取到的页面 JS 堆占用，未读取时为 None
+
+        返回:
+            页面需要回收的原因，不需要回收时返回 None
+        """
+        with self._lock:
+            self._uses += 1
+            info = self._pages.setdefault(page, {"uses": 0, "heap_mb": 0.0})
+            info["uses"] += 1
+            if heap_bytes:
+                info["heap_mb"] = round(heap_bytes / 1024 / 1024, 1)
+
+            if page in self._crashed_pages:
+                return "渲染进程崩溃"
+            if self.page_max_uses and info["uses"] >= self.page_max_uses:
+                return f"已使用 {info['uses']} 次"
+            if self.page_max_heap_mb and info["heap_mb"] >= self.page_max_heap_mb:
+                return f"JS 堆占用 {info['heap_mb']}MB"
+            return None
+
+    def record_outcome(self, failed):
+        """记录一个任务是否失败，用于计算错误率"""
+        with self._lock:
+            self._outcomes.append(bool(failed))
+
+    def forget(self, page, recycled=True):
+        """页面已回收或关闭，不再跟踪
+
+        参数:
+            recycled: 是否计入页面回收次数，游标会话正常关闭时为 False
+        """
+        with self._lock:
+            self._pages.pop(page, None)
+            self._crashed_pages.discard(page)
+            if recycled:
+                self._page_recycles += 1
+
+    def record_rerun(self):
+        with self._lock:
+            self._reruns += 1
+
+    def restart_reason(self):
+        """浏览器需要重启的原因，不需要重启时返回 None"""
+        with self._lock:
+            if self._disconnected:
+                return "浏览器已断开连接"
+            if self.browser_max_uses and self._uses >= self.browser_max_uses:
+                return f"浏览器已执行 {self._uses} 次操作"
+            heap_mb = sum(info["heap_mb"] for info in self._pages.values())
+            if self.browser_max_heap_mb and heap_mb >= self.browser_max_heap_mb:
+                return f"页面 JS 堆合计 {round(heap_mb, 1)}MB"
+            if self.max_error_rate and len(self._outcomes) >= MIN_OUTCOMES:
+                rate = sum(self._outcomes) / len(self._outcomes)
+                if rate >= self.max_error_rate:
+                    return f"最近 {len(self._outcomes)} 个任务失败率 {rate:.0%}"
+            return None
+
+    def begin_close(self):
+        """开始主动关闭浏览器，期间的断开事件不视为崩溃"""
+        with self._lock:
+            self._closing = True
+
+    def reset(self):
+        """浏览器重启时清空计数和已登记的页面，需要在关闭旧浏览器之后、启动新浏览器之前调用"""
+        with self._lock:
+            self._pages.clear()
+            self._crashed_pages.clear()
+            self._outcomes.clear()
+            self._uses = 0
+            self._disconnected = False
+            self._closing = False
+            self._browser_restarts += 1
+
+    def stats(self):
+        """健康状态统计信息"""
+        with self._lock:
+            outcomes = len(self._outcomes)
+            return {
+                "browser_uses": self._uses,
+                "page_heap_mb": [info["heap_mb"] for info in self._pages.values()],
+                "error_rate": round(sum(self._outcomes) / outcomes, 3) if outcomes else 0.0,
+                "crashes_total": self.crash_count,
+                "page_recycles_total": self._page_recycles,
+                "browser_restarts_total": self._browser_restarts,
+                "reruns_total": self._reruns
+            }
@@ -0,0 +1,303 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from loguru import logger
+from xiaohongshu_mcp_py.browser_health import RETRYABLE_METHODS
+import queue
+import threading
+import time
+
+
+class ExecutorQueueFullError(Exception):
+    """任务队列已满"""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobDeadlineExceededError(Exception):
+    """任务超过截止时间"""
+
+
+class WorkerCrashedError(Exception):
+    """执行任务的工作进程异常退出"""
+
+
+def invoke(service, method, args, kwargs):
+    """在服务实例上执行任务，任务前后由服务检查浏览器健康状态
+
+    浏览器或页面在执行期间崩溃时，服务重建浏览器后重新执行一次只读任务，
+    发布、评论等有副作用的任务不重新执行。
+    """
+    maintain = getattr(service, 'maintain', None)
+    if maintain is None:
+        return getattr(service, method)(*args, **kwargs)
+    
+    maintain()
+    crashes = service.health.crash_count
+    try:
+        result = getattr(service, method)(*args, **kwargs)
+        failed = isinstance(result, dict) and bool(result.get("error"))
+    except Exception:
+        result, failed = None, True
+        if service.health.crash_count == crashes or method not in RETRYABLE_METHODS:
+            maintain(failed)
+            raise
+    
+    maintain(failed)
+    if service.health.crash_count != crashes and method in RETRYABLE_METHODS:
+        logger.warning(f"任务 {method} 执行期间浏览器崩溃，重建后重新执行")
+        service.health.record_rerun()
+        result = getattr(service, method)(*args, **kwargs)
+    return result
+
+
+class _Job:
+    def __init__(self, method, args, kwargs, deadline):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.deadline = deadline
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BrowserExecutor:
+    def __init__(self, service_factory, workers=1, queue_size=64, default_deadline=120, retry_after=5):
+        """初始化浏览器执行器
+
+        同步版 Playwright 的对象只能在创建它的线程中使用，因此每个工作线程在自身线程内
+        通过 service_factory 创建独立的服务实例（浏览器、上下文、页面池），
+        HTTP 线程只负责投递任务并等待结果。
+
+        参数:
+            service_factory: 创建服务实例的无参可调用对象
+            workers: 工作线程数量
+            queue_size: 任务队列容量，队列满时拒绝新任务
+            default_deadline: 任务默认截止时间（秒）
+            retry_after: 队列满时建议客户端重试的间隔（秒）
+        """
+        self.service_factory = service_factory
+        self.worker_count = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.default_deadline = default_deadline
+        self.retry_after = retry_after
+
+        self.services = []
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        # 指定工作线程的任务，如游标分页会话绑定在创建它的工作线程上
+        self._worker_queues = [queue.Queue(maxsize=self.queue_size) for _ in range(self.worker_count)]
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._busy = 0
+        # 初始化失败的工作线程的错误信息
+        self._init_errors = []
+
+        # 统计数据
+        self._submitted = 0
+        self._rejected = 0
+        self._expired = 0
+        self._completed = 0
+        self._failed = 0
+
+    def start(self, wait=True):
+        """启动工作线程
+
+        参数:
+            wait: 是否等待所有浏览器初始化完成，为 False 时浏览器在后台启动，
+                期间投递的任务在队列中等待，可以通过 readiness 查询启动进度
+        """
+        ready = []
+        for i in range(self.worker_count):
+            event = threading.Event()
+            errors = []
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(i, event, errors),
+                name=f"browser-worker-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+            ready.append((event, errors))
+
+        if not wait:
+            logger.info(f"浏览器执行器已在后台启动，工作线程数: {self.worker_count}，队列容量: {self.queue_size}")
+            return
+
+        for event, errors in ready:
+            event.wait()
+            if errors:
+                self.shutdown()
+                raise errors[0]
+
+        logger.info(f"浏览器执行器已启动，工作线程数: {self.worker_count}，队列容量: {self.queue_size}")
+
+    def submit(self, method, *args, deadline=None, worker=None, **kwargs):
+        """投递任务，返回 Future
+
+        参数:
+            method: 服务实例上的方法名
+            deadline: 任务截止时间（秒），默认使用执行器配置
+            worker: 指定执行任务的工作线程编号，默认由空闲的工作线程执行
+        """
+        if worker is not None and not 0 <= worker < self.worker_count:
+            raise ValueError(f"无效的工作线程编号: {worker}")
+        with self._lock:
+            if len(self._init_errors) == self.worker_count:
+                # 后台启动时所有工作线程都初始化失败，任务不会被执行
+                raise RuntimeError(f"浏览器初始化失败: {self._init_errors[0]}")
+        
+        deadline = self.default_deadline if deadline is None else deadline
+        job = _Job(method, args, kwargs, time.monotonic() + deadline)
+        target = self._queue if worker is None else self._worker_queues[worker]
+        try:
+            target.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"任务队列已满，拒绝任务: {method}")
+            raise ExecutorQueueFullError("服务繁忙，请稍后重试", retry_after=self.retry_after)
+
+        with self._lock:
+            self._submitted += 1
+        return job.future
+
+    def call(self, method, *args, deadline=None, worker=None, **kwargs):
+        """投递任务并等待结果，超过截止时间抛出 JobDeadlineExceededError"""
+        deadline = self.default_deadline if deadline is None else deadline
+        future = self.submit(method, *args, deadline=deadline, worker=worker, **kwargs)
+        try:
+            return future.result(timeout=deadline)
+        except FutureTimeoutError:
+            # 尚未开始的任务可以直接取消，已在执行的任务只能放弃等待
+            future.cancel()
+            with self._lock:
+                self._expired += 1
+            raise JobDeadlineExceededError(f"任务 {method} 超过截止时间 ({deadline}s)")
+
+    def _worker_loop(self, index, ready_event, errors):
+        """工作线程主循环"""
+        try:
+            service = self.service_factory()
+            service.worker_id = index
+        except Exception as e:
+            logger.error(f"工作线程初始化服务失败: {str(e)}")
+            errors.append(e)
+            with self._lock:
+                self._init_errors.append(str(e) or type(e).__name__)
+                failed = len(self._init_errors) == self.worker_count
+            ready_event.set()
+            if failed:
+                self._fail_pending(RuntimeError(f"浏览器初始化失败: {str(e)}"))
+            return
+
+        with self._lock:
+            self.services.append(service)
+        ready_event.set()
+
+        try:
+            while not self._stop_event.is_set():
+                # 优先执行指定给本线程的任务
+                try:
+                    job = self._worker_queues[index].get_nowait()
+                except queue.Empty:
+                    try:
+                        job = self._queue.get(timeout=0.05)
+                    except queue.Empty:
+                        continue
+
+                if job is None:
+                    break
+                self._run_job(service, job)
+        finally:
+            service.close()
+
+    def _fail_pending(self, error):
+        """所有工作线程都初始化失败时，结束后台启动期间已投递的任务"""
+        for target in [self._queue] + self._worker_queues:
+            while True:
+                try:
+                    job = target.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None and job.future.set_running_or_notify_cancel():
+                    job.future.set_exception(error)
+
+    def _run_job(self, service, job):
+        """在当前工作线程中执行任务"""
+        if not job.future.set_running_or_notify_cancel():
+            return
+
+        if time.monotonic() > job.deadline:
+            with self._lock:
+                self._expired += 1
+            job.future.set_exception(JobDeadlineExceededError(f"任务 {job.method} 在队列中等待超时"))
+            return
+
+        with self._lock:
+            self._busy += 1
+        try:
+            result = invoke(service, job.method, job.args, job.kwargs)
+            job.future.set_result(result)
+            with self._lock:
+                self._completed += 1
+        except Exception as e:
+            logger.error(f"执行任务 {job.method} 失败: {str(e)}")
+            job.future.set_exception(e)
+            with self._lock:
+                self._failed += 1
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+    def metrics_snapshots(self):
+        """工作进程中的指标快照，工作线程与主线程共用同一个进程的指标，没有额外的快照"""
+        return []
+
+    def readiness(self):
+        """启动进度，至少一个工作线程完成初始化时可以接收请求"""
+        with self._lock:
+            ready = len(self.services)
+            return {
+                "ready": ready > 0,
+                "workers": self.worker_count,
+                "ready_workers": ready,
+                "errors": list(self._init_errors)
+            }
+
+    def stats(self):
+        """执行器统计信息"""
+        with self._lock:
+            return {
+                "workers": self.worker_count,
+                "busy_workers": self._busy,
+                "queue_depth": self._queue.qsize() + sum(q.qsize() for q in self._worker_queues),
+                "queue_size": self.queue_size,
+                "submitted_total": self._submitted,
+                "rejected_total": self._rejected,
+                "expired_total": self._expired,
+                "completed_total": self._completed,
+                "failed_total": self._failed
+            }
+
+    def shutdown(self, timeout=10):
+        """停止工作线程并关闭浏览器"""
+        self._stop_event.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+        # 取消仍在排队的任务
+        for pending in [self._queue] + self._worker_queues:
+            while True:
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job.future.cancel()
@@ -0,0 +1,182 @@
+from loguru import logger
+import os
+import time
+import uuid
+from xiaohongshu_mcp_py.xiaohongshu.capture import ResponseCapture, FEED_API_PATTERN
+from xiaohongshu_mcp_py.xiaohongshu.extract import FEED_CARD_FIELDS
+from xiaohongshu_mcp_py.xiaohongshu.initial_state import note_to_card
+
+
+class FeedCursorError(ValueError):
+    """游标格式错误或对应的会话已失效"""
+
+
+def encode_cursor(worker_id, session_id, offset):
+    """生成游标: 工作线程编号.会话ID.已返回条数"""
+    return f"{worker_id}.{session_id}.{offset}"
+
+
+def parse_cursor(cursor):
+    """解析游标，返回 (工作线程编号, 会话ID, 偏移)，格式错误时抛出 FeedCursorError"""
+    try:
+        worker_id, session_id, offset = cursor.split('.')
+        return int(worker_id), session_id, max(0, int(offset))
+    except ValueError:
+        raise FeedCursorError(f"无效的游标: {cursor}")
+
+
+class FeedSession:
+    def __init__(self, page, capture, max_notes):
+        """游标分页会话，独占一个页面并保持滚动位置
+
+        参数:
+            page: 会话独占的页面
+            capture: 页面上持续监听的接口响应捕获
+            max_notes: 会话最多收集的笔记数
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.page = page
+        self.capture = capture
+        self.max_notes = max_notes
+        # 创建会话的账号名，之后的请求都使用该账号的预算
+        self.account = None
+        self.started = False
+        self.has_more = True
+        # 按出现顺序去重后的卡片和结构化笔记
+        self.items = []
+        self.notes = []
+        self._seen = set()
+        self._captured = 0
+        self.last_used = time.monotonic()
+        # 异步服务中用于依次执行同一个会话的请求
+        self.lock = None
+
+    @property
+    def full(self):
+        return len(self.items) >= self.max_notes
+
+    def sync_capture(self):
+        """将接口响应中新捕获的笔记加入会话，返回新增数量"""
+        notes = self.capture.notes[self._captured:]
+        self._captured = len(self.capture.notes)
+        added = 0
+        for note in notes:
+            if note.note_id in self._seen or self.full:
+                continue
+            self._seen.add(note.note_id)
+            self.notes.append(note)
+            self.items.append(note_to_card(note, FEED_CARD_FIELDS))
+            added += 1
+        return added
+
+    def add_cards(self, cards):
+        """加入从页面元素中提取的卡片，虚拟列表会移除已滚出的元素，按 note_id 去重，返回新增数量"""
+        added = 0
+        for card in cards:
+            note_id = card.get("note_id")
+            if not note_id or note_id in self._seen or self.full:
+                continue
+            self._seen.add(note_id)
+            self.items.append(card)
+            added += 1
+        return added
+
+
+class FeedSessionsBase:
+    def __init__(self, max_sessions=None, ttl=None, max_notes=None, on_close=None):
+        """初始化游标分页会话管理
+
+        参数:
+            max_sessions: 同时保留的会话数，超出时关闭最久未使用的会话，默认读取 FEED_SESSION_LIMIT
+            ttl: 会话空闲多久后关闭（秒），默认读取 FEED_SESSION_TTL
+            max_notes: 单个会话最多收集的笔记数，默认读取 FEED_SESSION_MAX_NOTES
+            on_close: 会话关闭时以其页面调用的函数，如移除页面的资源拦截配置
+        """
+        self.max_sessions = max(1, int(os.environ.get('FEED_SESSION_LIMIT', '2'))) if max_sessions is None else max_sessions
+        self.ttl = float(os.environ.get('FEED_SESSION_TTL', '600')) if ttl is None else ttl
+        self.max_notes = int(os.environ.get('FEED_SESSION_MAX_NOTES', '2000')) if max_notes is None else max_notes
+        self.sessions = {}
+        self.on_close = on_close
+
+        # 统计数据
+        self._opened = 0
+        self._expired = 0
+
+    def get(self, session_id):
+        """获取会话并更新最近使用时间，不存在或已过期返回 None"""
+        session = self.sessions.get(session_id)
+        if session is None or time.monotonic() - session.last_used > self.ttl:
+            return None
+        session.last_used = time.monotonic()
+        return session
+
+    def _stale(self, reserve=0):
+        """需要关闭的会话: 空闲超时的会话，以及为新会话腾出位置时最久未使用的会话"""
+        now = time.monotonic()
+        stale = [session for session in self.sessions.values() if now - session.last_used > self.ttl]
+        active = sorted(
+            (session for session in self.sessions.values() if session not in stale),
+            key=lambda session: session.last_used
+        )
+        overflow = len(active) + reserve - self.max_sessions
+        if overflow > 0:
+            stale.extend(active[:overflow])
+        return stale
+
+    def _register(self, session):
+        self.sessions[session.id] = session
+        self._opened += 1
+        logger.info(f"已创建推荐列表游标会话: {session.id}")
+
+    def _unregister(self, session):
+        if self.sessions.pop(session.id, None) is not None:
+            self._expired += 1
+        if self.on_close:
+            self.on_close(session.page)
+
+    def stats(self):
+        """会话统计信息"""
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "notes": sum(len(session.items) for session in self.sessions.values()),
+            "opened_total": self._opened,
+            "closed_total": self._expired
+        }
+
+
+class FeedSessions(FeedSessionsBase):
+    def open(self, context, setup_page=None):
+        """在上下文中创建会话独占的页面，先关闭过期和多余的会话
+
+        参数:
+            context: 浏览器上下文
+            setup_page: 页面创建后的初始化函数，如设置超时和资源拦截配置
+        """
+        self.prune(reserve=1)
+        page = context.new_page()
+        if setup_page:
+            setup_page(page)
+        capture = ResponseCapture(page, FEED_API_PATTERN).__enter__()
+        session = FeedSession(page, capture, self.max_notes)
+        self._register(session)
+        return session
+
+    def close(self, session):
+        """关闭会话和其页面"""
+        self._unregister(session)
+        try:
+            session.capture.__exit__(None, None, None)
+            session.page.close()
+        except Exception as e:
+            logger.warning(f"关闭游标会话失败: {str(e)}")
+
+    def prune(self, reserve=0):
+        """关闭过期的会话，reserve 为即将创建的会话数"""
+        for session in self._stale(reserve):
+            self.close(session)
+
+    def close_all(self):
+        for session in list(self.sessions.values()):
+            self.close(session)
@@ -0,0 +1,112 @@
+from loguru import logger
+import os
+import threading
+import time
+
+
+# 登录后才会带有有效值的会话 Cookie
+DEFAULT_SESSION_COOKIES = ('web_session',)
+
+SITE_URL = "https://www.xiaohongshu.com"
+
+
+class LoginStateCache:
+    def __init__(self, ttl=None, session_cookies=None):
+        """初始化登录状态缓存
+
+        参数:
+            ttl: 缓存有效期（秒），默认读取 LOGIN_CACHE_TTL
+            session_cookies: 判断登录所用的 Cookie 名称，默认读取 LOGIN_SESSION_COOKIES
+        """
+        self.ttl = float(os.environ.get('LOGIN_CACHE_TTL', '300')) if ttl is None else ttl
+        if session_cookies is None:
+            names = os.environ.get('LOGIN_SESSION_COOKIES', '')
+            session_cookies = tuple(name.strip() for name in names.split(',') if name.strip()) or DEFAULT_SESSION_COOKIES
+        self.session_cookies = session_cookies
+
+        self._lock = threading.Lock()
+        self._status = None
+        self._cookie = None
+        self._expires_at = 0.0
+
+        # 统计数据
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, session_cookie=None, match_cookie=True):
+        """读取未过期的缓存状态，未命中返回 None
+
+        参数:
+            session_cookie: 当前的会话 Cookie 值，与写入缓存时不一致视为未命中
+            match_cookie: 为 False 时不比较 Cookie，用于无法访问浏览器时的快速查询
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._status is None or now >= self._expires_at or (match_cookie and session_cookie != self._cookie):
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            status = dict(self._status)
+            status["cached"] = True
+            status["expires_in"] = round(self._expires_at - now, 1)
+            return status
+
+    def peek(self):
+        """读取未过期的缓存状态，不比较 Cookie，也不计入命中统计"""
+        with self._lock:
+            now = time.monotonic()
+            if self._status is None or now >= self._expires_at:
+                return None
+            return dict(self._status, cached=True, expires_in=round(self._expires_at - now, 1))
+
+    def set(self, status, session_cookie=None):
+        """写入完整页面检查得到的登录状态
+
+        参数:
+            status: 登录状态
+            session_cookie: 检查时的会话 Cookie 值，Cookie 变化后缓存自动失效
+        """
+        with self._lock:
+            self._status = dict(status)
+            self._cookie = session_cookie
+            self._expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self, reason=""):
+        """使缓存失效，下次检查时重新打开页面判断"""
+        with self._lock:
+            if self._status is None:
+                return
+            self._status = None
+            self._cookie = None
+            self._invalidations += 1
+        logger.info(f"登录状态缓存已失效: {reason}")
+
+    def session_cookie(self, cookies):
+        """从 Cookie 列表中取出会话 Cookie 的值，不存在返回 None"""
+        for cookie in cookies or []:
+            if cookie.get('name') in self.session_cookies and cookie.get('value'):
+                return cookie['value']
+        return None
+
+    def on_response(self, response):
+        """监听其他操作的响应，出现未授权或跳转登录页时使缓存失效"""
+        try:
+            if response.status == 401:
+                self.invalidate(f"收到 401 响应: {response.url}")
+            elif response.request.is_navigation_request() and '/login' in response.url:
+                self.invalidate(f"页面跳转到登录页: {response.url}")
+        except Exception:
+            pass
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "cached": self._status is not None and time.monotonic() < self._expires_at,
+                "hits_total": self._hits,
+                "misses_total": self._misses,
+                "invalidations_total": self._invalidations
+            }
@@ -0,0 +1,289 @@
+from functools import wraps
+import bisect
+import inspect
+import threading
+import time
+
+# Prometheus 文本格式的响应类型
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 直方图的桶上限（秒），覆盖从毫秒级的数据提取到数十秒的页面导航
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# 指标名称、类型和说明，输出时按此顺序排列
+METRICS = {
+    'xhs_http_request_duration_seconds': ('histogram', 'HTTP 请求耗时，按路由、请求方法和状态码区分'),
+    'xhs_action_stage_duration_seconds': ('histogram', '浏览器操作各阶段的耗时，阶段为 goto、wait、extract、serialize，发布和评论另有 upload、input，流式抓取另有 scroll'),
+    'xhs_action_timeouts_total': ('counter', '浏览器操作超时次数，按超时发生的阶段区分'),
+    'xhs_extraction_failures_total': ('counter', '数据提取失败次数'),
+    'xhs_executor_workers': ('gauge', '执行器的工作线程或工作进程数'),
+    'xhs_executor_busy_workers': ('gauge', '正在执行任务的工作线程或工作进程数'),
+    'xhs_executor_queue_depth': ('gauge', '等待执行的任务数'),
+    'xhs_executor_queue_size': ('gauge', '任务队列容量'),
+    'xhs_executor_rejected_total': ('counter', '队列已满被拒绝的任务数'),
+    'xhs_executor_expired_total': ('counter', '超过截止时间的任务数'),
+    'xhs_page_pool_size': ('gauge', '页面池大小'),
+    'xhs_page_pool_in_use': ('gauge', '页面池中正在使用的页面数'),
+    'xhs_page_pool_waiting': ('gauge', '等待空闲页面的请求数'),
+    'xhs_page_pool_wait_timeouts_total': ('counter', '等待空闲页面超时的次数'),
+    'xhs_browser_heap_bytes': ('gauge', '浏览器所有页面的 JS 堆占用合计'),
+    'xhs_browser_crashes_total': ('counter', '浏览器或页面崩溃次数'),
+    'xhs_browser_restarts_total': ('counter', '浏览器重启次数')
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _is_timeout(error):
+    # Playwright 的 TimeoutError 不继承内置的 TimeoutError，按类名判断，不在这里导入 Playwright
+    return isinstance(error, TimeoutError) or type(error).__name__ == 'TimeoutError'
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """进程内的计数器和直方图
+
+        多进程模式下每个工作进程各有一个实例，快照随任务结果回传给主进程后合并输出。
+
+        参数:
+            buckets: 直方图的桶上限（秒）
+        """
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """计数器加 value"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """直方图记录一次观测值"""
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # 各桶的计数（不累计，最后一个为 +Inf）、总和、次数
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        """可以被 pickle 的快照"""
+        with self._lock:
+            return {
+                "buckets": self.buckets,
+                "counters": dict(self._counters),
+                "histograms": {key: [list(counts), total, count] for key, (counts, total, count) in self._histograms.items()}
+            }
+
+
+# 当前进程的指标
+registry = MetricsRegistry()
+
+
+def merge(snapshots):
+    """合并多个进程的快照，同名同标签的计数器和直方图相加"""
+    merged = {"buckets": DEFAULT_BUCKETS, "counters": {}, "histograms": {}}
+    for snapshot in snapshots:
+        if not snapshot:
+            continue
+        merged["buckets"] = snapshot["buckets"]
+        for key, value in snapshot["counters"].items():
+            merged["counters"][key] = merged["counters"].get(key, 0) + value
+        for key, (counts, total, count) in snapshot["histograms"].items():
+            current = merged["histograms"].get(key)
+            if current is None:
+                merged["histograms"][key] = [list(counts), total, count]
+                continue
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+            current[2] += count
+    return merged
+
+
+class StageTimer:
+    def __init__(self, action, registry=registry):
+        """按阶段记录一次浏览器操作的耗时
+
+        调用 stage 开始新的阶段，同时结束上一个阶段并记录其耗时。
+
+        参数:
+            action: 操作名，如 search_content
+            registry: 记录到的 MetricsRegistry
+        """
+        self.action = action
+        self.registry = registry
+        self.current = None
+        self._started_at = None
+
+    def stage(self, name):
+        """结束当前阶段并开始名为 name 的阶段"""
+        now = time.perf_counter()
+        self._close(now)
+        self.current = name
+        self._started_at = now
+
+    def _close(self, now):
+        if self.current is not None:
+            self.registry.observe('xhs_action_stage_duration_seconds', now - self._started_at, action=self.action, stage=self.current)
+        self.current = None
+
+    def fail(self, error):
+        """记录操作失败，超时计入超时次数，提取阶段的其他错误计入提取失败次数"""
+        if _is_timeout(error):
+            self.registry.inc('xhs_action_timeouts_total', action=self.action, stage=self.current or 'none')
+        elif self.current in ('extract', 'serialize'):
+            self.extraction_failed()
+
+    def extraction_failed(self):
+        """记录一次被忽略的提取失败，如回退到其他提取方式"""
+        self.registry.inc('xhs_extraction_failures_total', action=self.action)
+
+    def finish(self):
+        self._close(time.perf_counter())
+
+
+def instrument(action):
+    """为操作类的方法记录各阶段耗时的装饰器
+
+    调用期间 self.timer 为该次调用的 StageTimer，方法中通过 self.timer.stage 划分阶段，
+    同时支持普通方法、协程方法以及流式接口使用的生成器和异步生成器，生成器在关闭时结束计时。
+    """
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @wraps(func)
+            async def async_gen_wrapper(self, *args, **kwargs):
+                self.timer = StageTimer(action)
+                items = func(self, *args, **kwargs)
+                try:
+                    async for item in items:
+                        yield item
+                finally:
+                    # 提前结束时关闭内层生成器，使其 finally 中的清理立即执行
+                    await items.aclose()
+                    self.timer.finish()
+            return async_gen_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def gen_wrapper(self, *args, **kwargs):
+                self.timer = StageTimer(action)
+                try:
+                    return (yield from func(self, *args, **kwargs))
+                finally:
+                    self.timer.finish()
+            return gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                self.timer = StageTimer(action)
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    self.timer.finish()
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            self.timer = StageTimer(action)
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.timer.finish()
+        return wrapper
+    return decorator
+
+
+def collect_samples(executor_stats=None, pool_stats=()):
+    """从执行器和页面池的统计信息中生成采集时的指标
+
+    参数:
+        executor_stats: 执行器的 stats()，直接调用服务时为 None
+        pool_stats: 各工作线程或工作进程的 get_pool_stats() 列表
+
+    返回:
+        (指标名, 标签, 值) 列表
+    """
+    samples = []
+    if executor_stats:
+        for name, key in (('xhs_executor_workers', 'workers'), ('xhs_executor_busy_workers', 'busy_workers'),
+                          ('xhs_executor_queue_depth', 'queue_depth'), ('xhs_executor_queue_size', 'queue_size'),
+                          ('xhs_executor_rejected_total', 'rejected_total'), ('xhs_executor_expired_total', 'expired_total')):
+            samples.append((name, {}, executor_stats.get(key, 0)))
+
+    for index, stats in enumerate(pool_stats):
+        labels = {'worker': stats.get('worker_id', index)}
+        for name, key in (('xhs_page_pool_size', 'size'), ('xhs_page_pool_in_use', 'in_use'),
+                          ('xhs_page_pool_waiting', 'waiting'), ('xhs_page_pool_wait_timeouts_total', 'wait_timeouts_total')):
+            if key in stats:
+                samples.append((name, labels, stats[key]))
+
+        health = stats.get('health') or {}
+        if health:
+            samples.append(('xhs_browser_heap_bytes', labels, round(sum(health.get('page_heap_mb') or []) * 1024 * 1024)))
+            samples.append(('xhs_browser_crashes_total', labels, health.get('crashes_total', 0)))
+            samples.append(('xhs_browser_restarts_total', labels, health.get('browser_restarts_total', 0)))
+    return samples
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def render(snapshot, samples=()):
+    """按 Prometheus 文本格式输出指标
+
+    参数:
+        snapshot: 合并后的快照
+        samples: collect_samples 生成的采集时指标
+    """
+    lines = {name: [] for name in METRICS}
+
+    for (name, labels), value in sorted(snapshot["counters"].items()):
+        lines.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    buckets = snapshot["buckets"]
+    for (name, labels), (counts, total, count) in sorted(snapshot["histograms"].items()):
+        series = lines.setdefault(name, [])
+        cumulative = 0
+        for bound, bucket_count in zip(list(buckets) + [float('inf')], counts):
+            cumulative += bucket_count
+            bucket_labels = labels + (('le', _format_value(float(bound))),)
+            series.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        series.append(f"{name}_sum{_format_labels(labels)} {round(total, 6)}")
+        series.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    for name, labels, value in samples:
+        lines.setdefault(name, []).append(f"{name}{_format_labels(_label_key(labels))} {_format_value(value)}")
+
+    output = []
+    for name, series in lines.items():
+        if not series:
+            continue
+        kind, description = METRICS.get(name, ('untyped', ''))
+        output.append(f"# HELP {name} {description}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(series)
+    return '\n'.join(output) + '\n'
@@ -0,0 +1,460 @@
+from loguru import logger
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from xiaohongshu_mcp_py.xiaohongshu.types import Note, User, Interaction, Image, Tag
+from xiaohongshu_mcp_py.xiaohongshu.extract import SEARCH_CARD_FIELDS, parse_count, to_dict
+from xiaohongshu_mcp_py.xiaohongshu.initial_state import note_to_card
+from xiaohongshu_mcp_py.tokenizer import index_text, match_query
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT,
+    avatar TEXT,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS notes (
+    note_id TEXT PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    content TEXT,
+    user_id TEXT,
+    username TEXT,
+    avatar TEXT,
+    cover_url TEXT,
+    images TEXT,
+    videos TEXT,
+    likes INTEGER,
+    comments INTEGER,
+    collections INTEGER,
+    share_count INTEGER,
+    create_time TEXT,
+    update_time TEXT,
+    has_detail INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    keyword TEXT,
+    first_scraped_at REAL NOT NULL,
+    scraped_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS note_tags (
+    note_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tag_id TEXT,
+    type INTEGER,
+    PRIMARY KEY (note_id, name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes (user_id);
+CREATE INDEX IF NOT EXISTS idx_notes_username ON notes (username);
+CREATE INDEX IF NOT EXISTS idx_notes_scraped_at ON notes (scraped_at);
+CREATE INDEX IF NOT EXISTS idx_note_tags_name ON note_tags (name);
+"""
+
+# 列表卡片只带有部分字段，更新时空值不覆盖已保存的详情数据
+UPSERT_NOTE = """
+INSERT INTO notes (
+    note_id, url, title, content, user_id, username, avatar, cover_url, images, videos,
+    likes, comments, collections, share_count, create_time, update_time,
+    has_detail, source, keyword, first_scraped_at, scraped_at
+) VALUES (
+    :note_id, :url, :title, :content, :user_id, :username, :avatar, :cover_url, :images, :videos,
+    :likes, :comments, :collections, :share_count, :create_time, :update_time,
+    :has_detail, :source, :keyword, :scraped_at, :scraped_at
+)
+ON CONFLICT (note_id) DO UPDATE SET
+    url = COALESCE(NULLIF(excluded.url, ''), notes.url),
+    title = COALESCE(NULLIF(excluded.title, ''), notes.title),
+    content = COALESCE(NULLIF(excluded.content, ''), notes.content),
+    user_id = COALESCE(excluded.user_id, notes.user_id),
+    username = COALESCE(NULLIF(excluded.username, ''), notes.username),
+    avatar = COALESCE(NULLIF(excluded.avatar, ''), notes.avatar),
+    cover_url = COALESCE(NULLIF(excluded.cover_url, ''), notes.cover_url),
+    images = COALESCE(NULLIF(excluded.images, '[]'), notes.images),
+    videos = COALESCE(NULLIF(excluded.videos, '[]'), notes.videos),
+    likes = COALESCE(excluded.likes, notes.likes),
+    comments = COALESCE(excluded.comments, notes.comments),
+    collections = COALESCE(excluded.collections, notes.collections),
+    share_count = COALESCE(excluded.share_count, notes.share_count),
+    create_time = COALESCE(excluded.create_time, notes.create_time),
+    update_time = COALESCE(excluded.update_time, notes.update_time),
+    has_detail = MAX(excluded.has_detail, notes.has_detail),
+    source = CASE WHEN notes.source = 'detail' THEN 'detail' ELSE excluded.source END,
+    keyword = COALESCE(excluded.keyword, notes.keyword),
+    scraped_at = excluded.scraped_at
+"""
+
+# 全文索引，写入的文本已经按 tokenizer.index_text 切分为空格分隔的索引词
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    note_id UNINDEXED, title, content, tags, tokenize = 'unicode61'
+)
+"""
+
+# bm25 各列权重: note_id, title, content, tags
+FTS_RANK = "bm25(notes_fts, 0.0, 10.0, 1.0, 5.0)"
+
+UPSERT_USER = """
+INSERT INTO users (user_id, username, avatar, updated_at) VALUES (:user_id, :username, :avatar, :scraped_at)
+ON CONFLICT (user_id) DO UPDATE SET
+    username = COALESCE(NULLIF(excluded.username, ''), users.username),
+    avatar = COALESCE(NULLIF(excluded.avatar, ''), users.avatar),
+    updated_at = excluded.updated_at
+"""
+
+NOTE_COLUMNS = """
+    notes.note_id, notes.url, notes.title, notes.content, notes.user_id, notes.username, notes.avatar,
+    notes.cover_url, notes.images, notes.videos, notes.likes, notes.comments, notes.collections,
+    notes.share_count, notes.create_time, notes.update_time, notes.has_detail, notes.source,
+    notes.keyword, notes.first_scraped_at, notes.scraped_at
+"""
+
+
+def note_from_dict(item):
+    """将接口返回的数据转换为 Note 模型
+
+    支持 Note 模型字典（笔记详情）和列表卡片（推荐列表、搜索结果）两种结构
+    """
+    if 'interaction' in item or 'user' in item:
+        return Note(**item)
+
+    note_id = item.get('note_id')
+    return Note(
+        note_id=note_id,
+        url=item.get('url') or (f"/explore/{note_id}" if note_id else None),
+        title=item.get('title') or '',
+        user=User(username=item.get('username') or ''),
+        images=[Image(url=item['cover_url'])] if item.get('cover_url') else [],
+        interaction=Interaction(
+            likes=parse_count(item.get('likes')),
+            comments=parse_count(item.get('comments')) if 'comments' in item else None
+        )
+    )
+
+
+class NoteStore:
+    def __init__(self, path=None):
+        """初始化本地笔记存储
+
+        参数:
+            path: SQLite 数据库路径，默认读取 NOTE_STORE_PATH，为空字符串时不保存
+        """
+        self.path = os.environ.get('NOTE_STORE_PATH', '') if path is None else path
+        self._conn = None
+        self._lock = threading.Lock()
+        self.fts_enabled = False
+
+    @property
+    def enabled(self):
+        """是否启用本地笔记存储"""
+        return bool(self.path)
+
+    def _connection(self):
+        """首次使用时打开数据库并创建表结构，多个线程共用一个连接，由锁串行访问"""
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.row_factory = sqlite3.Row
+            # WAL 模式下读写互不阻塞，多个进程或服务实例可以共用同一个数据库文件
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._init_fts(conn)
+            logger.info(f"本地笔记存储已打开: {self.path}")
+        return self._conn
+
+    def _init_fts(self, conn):
+        """创建全文索引，SQLite 未编译 FTS5 时只禁用本地搜索"""
+        try:
+            conn.execute(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite 不支持 FTS5，本地搜索不可用: {str(e)}")
+            return
+        self.fts_enabled = True
+
+        # 旧数据库首次启用全文索引时补建索引
+        indexed = conn.execute('SELECT COUNT(*) FROM notes_fts').fetchone()[0]
+        if not indexed:
+            note_ids = [row[0] for row in conn.execute('SELECT note_id FROM notes')]
+            if note_ids:
+                with conn:
+                    self._index_notes(conn, note_ids)
+                logger.info(f"已为 {len(note_ids)} 条本地笔记建立全文索引")
+
+    def _index_notes(self, conn, note_ids):
+        """按数据库中合并后的数据重建笔记的全文索引"""
+        if not self.fts_enabled:
+            return
+        for note_id in note_ids:
+            row = conn.execute('SELECT title, content FROM notes WHERE note_id = ?', (note_id,)).fetchone()
+            tags = ' '.join(tag[0] for tag in conn.execute('SELECT name FROM note_tags WHERE note_id = ?', (note_id,)))
+            conn.execute('DELETE FROM notes_fts WHERE note_id = ?', (note_id,))
+            conn.execute(
+                'INSERT INTO notes_fts (note_id, title, content, tags) VALUES (?, ?, ?, ?)',
+                (note_id, index_text(row['title']), index_text(row['content']), index_text(tags))
+            )
+
+    def upsert_notes(self, notes, source, keyword=None):
+        """按 note_id 写入或更新笔记
+
+        参数:
+            notes: Note 模型、Note 模型字典或列表卡片组成的列表
+            source: 数据来源，如 feed / search / detail
+            keyword: 搜索关键词
+
+        返回:
+            写入的笔记数
+        """
+        if not self.enabled:
+            return 0
+
+        scraped_at = time.time()
+        note_rows, user_rows, tag_rows = [], [], []
+        for item in notes or []:
+            note = item if isinstance(item, Note) else note_from_dict(item)
+            if not note.note_id:
+                continue
+
+            user = note.user or User()
+            interaction = note.interaction or Interaction()
+            images = [to_dict(image) for image in note.images or []]
+            note_rows.append({
+                "note_id": note.note_id,
+                "url": note.url,
+                "title": note.title,
+                "content": note.content,
+                "user_id": user.user_id,
+                "username": user.username,
+                "avatar": user.avatar,
+                "cover_url": images[0]["url"] if images else None,
+                "images": json.dumps(images, ensure_ascii=False),
+                "videos": json.dumps(note.videos or [], ensure_ascii=False),
+                "likes": interaction.likes,
+                "comments": interaction.comments,
+                "collections": interaction.collections if source == 'detail' else None,
+                "share_count": interaction.share_count if source == 'detail' else None,
+                "create_time": note.create_time,
+                "update_time": note.update_time,
+                "has_detail": 1 if source == 'detail' else 0,
+                "source": source,
+                "keyword": keyword,
+                "scraped_at": scraped_at
+            })
+            if user.user_id:
+                user_rows.append({
+                    "user_id": user.user_id,
+                    "username": user.username,
+                    "avatar": user.avatar,
+                    "scraped_at": scraped_at
+                })
+            for tag in note.tags or []:
+                if tag.name:
+                    tag_rows.append((note.note_id, tag.name, tag.tag_id, tag.type))
+
+        if not note_rows:
+            return 0
+
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(UPSERT_NOTE, note_rows)
+                conn.executemany(UPSERT_USER, user_rows)
+                # 标签只在详情中出现，有新标签时整体替换
+                for note_id in {row[0] for row in tag_rows}:
+                    conn.execute('DELETE FROM note_tags WHERE note_id = ?', (note_id,))
+                conn.executemany(
+                    'INSERT OR REPLACE INTO note_tags (note_id, name, tag_id, type) VALUES (?, ?, ?, ?)',
+                    tag_rows
+                )
+                self._index_notes(conn, list(dict.fromkeys(row["note_id"] for row in note_rows)))
+        return len(note_rows)
+
+    def get_note(self, note_id):
+        """读取单条笔记，不存在时返回 None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(f'SELECT {NOTE_COLUMNS} FROM notes WHERE note_id = ?', (note_id,)).fetchone()
+            if row is None:
+                return None
+            return self._row_to_dict(conn, row)
+
+    def contains(self, note_id):
+        """本地是否已保存该笔记，按主键查询"""
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            conn = self._connection()
+            return conn.execute('SELECT 1 FROM notes WHERE note_id = ?', (note_id,)).fetchone() is not None
+
+    def list_notes(self, user_id=None, username=None, tag=None, keyword=None, since=None, until=None, page=1, size=20):
+        """按条件查询笔记，按抓取时间倒序
+
+        参数:
+            user_id / username: 作者
+            tag: 标签名
+            keyword: 抓取时使用的搜索关键词
+            since / until: 抓取时间范围（Unix 时间戳，秒）
+            page / size: 分页
+
+        返回:
+            (笔记列表, 符合条件的总数)
+        """
+        if not self.enabled:
+            return [], 0
+
+        joins, conditions, params = '', [], []
+        if tag:
+            joins = 'JOIN note_tags ON note_tags.note_id = notes.note_id'
+            conditions.append('note_tags.name = ?')
+            params.append(tag)
+        for column, value in (('notes.user_id', user_id), ('notes.username', username), ('notes.keyword', keyword)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            conditions.append('notes.scraped_at >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('notes.scraped_at < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        size = max(1, size)
+        offset = (max(1, page) - 1) * size
+        with self._lock:
+            conn = self._connection()
+            total = conn.execute(f'SELECT COUNT(*) FROM notes {joins} {where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT {NOTE_COLUMNS} FROM notes {joins} {where} ORDER BY notes.scraped_at DESC LIMIT ? OFFSET ?',
+                params + [size, offset]
+            ).fetchall()
+            return [self._row_to_dict(conn, row) for row in rows], total
+
+    def search(self, query, page=1, size=20):
+        """在本地笔记的标题、正文和标签中全文搜索，按相关度排序
+
+        参数:
+            query: 搜索词，多个词以空格分隔，需要同时匹配
+            page / size: 分页
+
+        返回:
+            (笔记列表, 匹配的总数)，每条笔记带有相关度 score，越大越相关
+        """
+        expression = match_query(query)
+        if not self.enabled or not expression:
+            return [], 0
+
+        size = max(1, size)
+        offset = (max(1, page) - 1) * size
+        with self._lock:
+            conn = self._connection()
+            if not self.fts_enabled:
+                return [], 0
+            total = conn.execute('SELECT COUNT(*) FROM notes_fts WHERE notes_fts MATCH ?', (expression,)).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT {NOTE_COLUMNS}, {FTS_RANK} AS rank
+                FROM notes_fts JOIN notes ON notes.note_id = notes_fts.note_id
+                WHERE notes_fts MATCH ?
+                ORDER BY rank, notes.scraped_at DESC
+                LIMIT ? OFFSET ?
+                """,
+                (expression, size, offset)
+            ).fetchall()
+
+            results = []
+            for row in rows:
+                note = self._row_to_dict(conn, row)
+                note["score"] = round(-row['rank'], 4)
+                results.append(note)
+            return results, total
+
+    def search_result(self, keyword, page=1, size=20):
+        """本地全文搜索，返回与 SearchAction.search_content 相同结构的结果"""
+        notes, total = self.search(keyword, page, size)
+        results = []
+        for note in notes:
+            card = note_to_card(note_from_dict(note), SEARCH_CARD_FIELDS)
+            card["score"] = note["score"]
+            results.append(card)
+        return {
+            "keyword": keyword,
+            "page": page,
+            "total_pages": math.ceil(total / max(1, size)),
+            "results": results,
+            "total_count": len(results),
+            "source": "local"
+        }
+
+    def _row_to_dict(self, conn, row):
+        """将数据库行转换为与 Note 模型相同结构的字典，附带抓取信息"""
+        tags = conn.execute(
+            'SELECT tag_id, name, type FROM note_tags WHERE note_id = ? ORDER BY rowid', (row['note_id'],)
+        ).fetchall()
+        note = Note(
+            note_id=row['note_id'],
+            url=row['url'],
+            title=row['title'],
+            content=row['content'],
+            user=User(user_id=row['user_id'], username=row['username'], avatar=row['avatar']),
+            images=[Image(**image) for image in json.loads(row['images'] or '[]')],
+            videos=json.loads(row['videos'] or '[]'),
+            tags=[Tag(tag_id=tag['tag_id'], name=tag['name'], type=tag['type']) for tag in tags],
+            interaction=Interaction(
+                likes=row['likes'],
+                comments=row['comments'],
+                collections=row['collections'],
+                share_count=row['share_count']
+            ),
+            create_time=row['create_time'],
+            update_time=row['update_time']
+        )
+        data = to_dict(note)
+        data.update({
+            "has_detail": bool(row['has_detail']),
+            "source": row['source'],
+            "keyword": row['keyword'],
+            "first_scraped_at": row['first_scraped_at'],
+            "scraped_at": row['scraped_at']
+        })
+        return data
+
+    def stats(self):
+        """存储统计信息"""
+        if not self.enabled:
+            return {"enabled": False}
+
+        with self._lock:
+            conn = self._connection()
+            notes, details, latest = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(has_detail), 0), MAX(scraped_at) FROM notes'
+            ).fetchone()
+            return {
+                "enabled": True,
+                "path": self.path,
+                "notes": notes,
+                "notes_with_detail": details,
+                "users": conn.execute('SELECT COUNT(*) FROM users').fetchone()[0],
+                "tags": conn.execute('SELECT COUNT(DISTINCT name) FROM note_tags').fetchone()[0],
+                "full_text_search": self.fts_enabled,
+                "last_scraped_at": latest
+            }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
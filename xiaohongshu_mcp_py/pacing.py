@@ -0,0 +1,213 @@
+from collections import deque
+from loguru import logger
+import os
+import random
+import re
+import threading
+import time
+
+# 站点对频繁访问返回的验证页面和状态码
+CAPTCHA_URL_PATTERN = re.compile(r'/website-login/(captcha|verify)|/web-login/captcha|verifyType=')
+CAPTCHA_STATUS = (461, 471)
+
+# 可以重试的临时状态码和网络错误
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+TRANSIENT_ERRORS = (
+    'net::ERR_CONNECTION_RESET',
+    'net::ERR_CONNECTION_CLOSED',
+    'net::ERR_CONNECTION_REFUSED',
+    'net::ERR_CONNECTION_TIMED_OUT',
+    'net::ERR_TIMED_OUT',
+    'net::ERR_EMPTY_RESPONSE',
+    'net::ERR_NETWORK_CHANGED',
+    'net::ERR_HTTP2_PROTOCOL_ERROR',
+    'net::ERR_PROXY_CONNECTION_FAILED',
+    'NS_ERROR_NET_RESET'
+)
+
+# 导航结果
+SUCCESS = 'success'
+FAILURE = 'failure'
+CAPTCHA = 'captcha'
+
+# 失败和遇到验证页面时速率的乘数
+FAILURE_DECREASE = 0.7
+CAPTCHA_DECREASE = 0.5
+
+
+def _env_number(name, default, cast=float):
+    return cast(os.environ.get(name, str(default)))
+
+
+def is_captcha(response):
+    """导航响应是否为验证页面"""
+    if response is None:
+        return False
+    return response.status in CAPTCHA_STATUS or bool(CAPTCHA_URL_PATTERN.search(response.url))
+
+
+def is_transient(error):
+    """导航异常是否为可以重试的临时网络错误"""
+    message = str(error)
+    return any(code in message for code in TRANSIENT_ERRORS)
+
+
+class NavigationPacer:
+    # 同一进程内的所有工作线程共用一个实例
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate=None, min_rate=None, max_rate=None, burst=None, retries=None,
+                 backoff=None, max_backoff=None, captcha_pause=None, window=20):
+        """站点导航的自适应限速和重试策略
+
+        令牌桶限制每分钟的导航次数。导航成功时速率线性上升，失败时按比例下降，
+        遇到验证页面时大幅下降并暂停一段时间，使速率稳定在站点能够接受的水平附近，
+        而不是在突发和被封之间来回摆动。超时和临时网络错误按带随机抖动的指数退避重试。
+
+        参数:
+            rate: 初始的每分钟导航次数，默认读取 NAVIGATION_RATE，为 0 时不限速
+            min_rate: 速率下限，默认读取 NAVIGATION_MIN_RATE
+            max_rate: 速率上限，默认读取 NAVIGATION_MAX_RATE
+            burst: 允许的突发导航次数，默认读取 NAVIGATION_BURST
+            retries: 超时和临时错误的最多重试次数，默认读取 NAVIGATION_RETRIES
+            backoff: 第一次重试前的等待秒数，之后每次翻倍，默认读取 NAVIGATION_BACKOFF
+            max_backoff: 单次重试等待的上限（秒），默认读取 NAVIGATION_MAX_BACKOFF
+            captcha_pause: 遇到验证页面后暂停导航的秒数，默认读取 NAVIGATION_CAPTCHA_PAUSE
+            window: 计算错误率和验证页面比例的导航次数
+        """
+        processes = max(1, int(os.environ.get('BROWSER_PROCESSES', '1')))
+        # 多进程模式下各进程平分速率
+        self.initial_rate = (_env_number('NAVIGATION_RATE', 60) if rate is None else rate) / processes
+        self.min_rate = (_env_number('NAVIGATION_MIN_RATE', 6) if min_rate is None else min_rate) / processes
+        self.max_rate = (_env_number('NAVIGATION_MAX_RATE', 240) if max_rate is None else max_rate) / processes
+        self.burst = max(1.0, _env_number('NAVIGATION_BURST', 3) if burst is None else burst)
+        self.retries = max(0, _env_number('NAVIGATION_RETRIES', 2, int) if retries is None else retries)
+        self.backoff = _env_number('NAVIGATION_BACKOFF', 1) if backoff is None else backoff
+        self.max_backoff = _env_number('NAVIGATION_MAX_BACKOFF', 30) if max_backoff is None else max_backoff
+        self.captcha_pause = _env_number('NAVIGATION_CAPTCHA_PAUSE', 30) if captcha_pause is None else captcha_pause
+
+        self.rate = min(max(self.initial_rate, self.min_rate), self.max_rate) if self.initial_rate else 0
+        # 每分钟成功导航合计使速率上升的幅度
+        self._step = self.rate
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        # 统计数据
+        self._navigations = 0
+        self._failures = 0
+        self._captchas = 0
+        self._retries = 0
+        self._soft = 0
+        self._soft_fallbacks = 0
+        self._wait_seconds_total = 0.0
+
+    @classmethod
+    def shared(cls):
+        """获取进程内共用的实例"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def enabled(self):
+        return bool(self.rate)
+
+    def reserve(self):
+        """预约一次导航
+
+        令牌不足时预支令牌，并发的导航按预约顺序依次间隔开。
+
+        返回:
+            开始导航前需要等待的秒数
+        """
+        if not self.enabled:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate / 60)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens * 60 / self.rate, self._paused_until - now)
+            self._wait_seconds_total += wait
+            return wait
+
+    def backoff_delay(self, attempt):
+        """第 attempt 次重试前的等待秒数，指数退避并在后一半区间内随机抖动，避免多个请求同时重试"""
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def record(self, outcome):
+        """记录一次导航的结果，并调整速率
+
+        参数:
+            outcome: SUCCESS、FAILURE 或 CAPTCHA
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._navigations += 1
+            self._outcomes.append(outcome)
+            if outcome == FAILURE:
+                self._failures += 1
+            elif outcome == CAPTCHA:
+                self._captchas += 1
+            if not self.enabled:
+                return
+
+            if outcome == SUCCESS:
+                # 最近仍有验证页面时保持速率，否则线性上升，每分钟约上升初始速率
+                if CAPTCHA not in self._outcomes and self.rate < self.max_rate:
+                    self.rate = min(self.max_rate, self.rate + self._step / self.rate)
+                return
+
+            if outcome == CAPTCHA:
+                self._paused_until = now + self.captcha_pause
+                # 已经积累的令牌作废，暂停结束后按新的速率开始
+                self._tokens = min(self._tokens, 0.0)
+            elif now - self._decreased_at < 60 / self.rate:
+                # 并发导航同时失败时只下降一次
+                return
+
+            previous = self.rate
+            self.rate = max(self.min_rate, self.rate * (CAPTCHA_DECREASE if outcome == CAPTCHA else FAILURE_DECREASE))
+            self._decreased_at = now
+
+        logger.warning(f"导航{'遇到验证页面' if outcome == CAPTCHA else '失败'}，速率从每分钟 {previous:.1f} 次降至 {self.rate:.1f} 次")
+
+    def record_retry(self):
+        with self._lock:
+            self._retries += 1
+
+    def record_soft(self, ok):
+        """记录一次站内导航，失败时改为完整导航"""
+        with self._lock:
+            if ok:
+                self._soft += 1
+            else:
+                self._soft_fallbacks += 1
+
+    def stats(self):
+        """限速和重试统计信息"""
+        with self._lock:
+            outcomes = len(self._outcomes)
+            return {
+                "rate_per_minute": round(self.rate, 2),
+                "min_rate": round(self.min_rate, 2),
+                "max_rate": round(self.max_rate, 2),
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 1),
+                "error_rate": round(sum(o == FAILURE for o in self._outcomes) / outcomes, 3) if outcomes else 0.0,
+                "captcha_rate": round(sum(o == CAPTCHA for o in self._outcomes) / outcomes, 3) if outcomes else 0.0,
+                "navigations_total": self._navigations,
+                "failures_total": self._failures,
+                "captchas_total": self._captchas,
+                "retries_total": self._retries,
+                "soft_navigations_total": self._soft,
+                "soft_fallbacks_total": self._soft_fallbacks,
+                "wait_seconds_total": round(self._wait_seconds_total, 2)
+            }
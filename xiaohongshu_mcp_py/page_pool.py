@@ -0,0 +1,121 @@
+from loguru import logger
+from contextlib import contextmanager
+import threading
+import time
+
+
+class PagePoolTimeoutError(Exception):
+    """等待空闲页面超时"""
+
+
+class PagePool:
+    def __init__(self, pages, wait_timeout=30):
+        """初始化页面池
+
+        参数:
+            pages: 已创建好的页面列表
+            wait_timeout: 借出页面时的默认等待超时（秒）
+        """
+        self._pages = list(pages)
+        self._idle = list(pages)
+        self._cond = threading.Condition()
+        self.wait_timeout = wait_timeout
+
+        # 统计数据
+        self._waiting = 0
+        self._max_waiting = 0
+        self._acquired_total = 0
+        self._timeouts_total = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    @property
+    def size(self):
+        """池中页面总数"""
+        return len(self._pages)
+
+    @property
+    def pages(self):
+        """池中全部页面"""
+        return list(self._pages)
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """借出一个空闲页面，使用完毕后自动归还
+
+        参数:
+            timeout: 等待超时（秒），默认使用池配置
+        """
+        page = self.checkout(timeout)
+        try:
+            yield page
+        finally:
+            self.checkin(page)
+
+    def checkout(self, timeout=None):
+        """借出一个空闲页面，没有空闲页面时阻塞等待"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+            try:
+                while not self._idle:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts_total += 1
+                        logger.warning(f"等待空闲页面超时 ({timeout}s)，当前排队: {self._waiting}")
+                        raise PagePoolTimeoutError(f"等待空闲页面超时 ({timeout}s)")
+                    self._cond.wait(remaining)
+
+                page = self._idle.pop()
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - start
+            self._acquired_total += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+            return page
+
+    def checkin(self, page):
+        """归还页面"""
+        with self._cond:
+            if page in self._pages and page not in self._idle:
+                self._idle.append(page)
+                self._cond.notify()
+
+    def replace(self, old_page, new_page):
+        """用新页面替换池中的页面，新页面直接加入空闲列表，旧页面之后归还时被忽略"""
+        with self._cond:
+            self._pages = [new_page if page is old_page else page for page in self._pages]
+            if old_page in self._idle:
+                self._idle.remove(old_page)
+            self._idle.append(new_page)
+            self._cond.notify()
+
+    def reset(self, pages):
+        """浏览器重启后换入全部新页面，唤醒正在等待的请求"""
+        with self._cond:
+            self._pages = list(pages)
+            self._idle = list(pages)
+            self._cond.notify_all()
+
+    def stats(self):
+        """页面池统计信息"""
+        with self._cond:
+            acquired = self._acquired_total
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self.size - len(self._idle),
+                "waiting": self._waiting,
+                "max_waiting": self._max_waiting,
+                "acquired_total": acquired,
+                "wait_timeout": self.wait_timeout,
+                "wait_timeouts_total": self._timeouts_total,
+                "wait_seconds_avg": round(self._wait_seconds_total / acquired, 4) if acquired else 0.0,
+                "wait_seconds_max": round(self._wait_seconds_max, 4)
+            }
@@ -0,0 +1,501 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from loguru import logger
+import itertools
+import math
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from xiaohongshu_mcp_py.executor import ExecutorQueueFullError, JobDeadlineExceededError, WorkerCrashedError, invoke
+
+# 工作进程崩溃后重启前的等待时间（秒），连续崩溃时翻倍，最长 MAX_RESTART_DELAY
+RESTART_DELAY = 1
+MAX_RESTART_DELAY = 60
+# 重启后稳定运行超过该时间（秒）或成功完成任务才清零连续崩溃次数
+STABLE_UPTIME = 60
+
+# 流式抓取的回调参数在工作进程中替换为向主进程发送消息的函数
+EMIT_ARG = 'emit'
+
+
+def _worker_main(index, service_factory, tasks, results, stop_stream):
+    """工作进程入口，在进程内创建服务实例并依次执行任务
+
+    参数:
+        index: 工作进程编号
+        service_factory: 创建服务实例的无参可调用对象，需要可以被 pickle
+        tasks: 本进程的任务队列
+        results: 所有进程共用的结果队列
+        stop_stream: 主进程要求停止当前流式抓取时设置
+    """
+    # 每个进程可以使用独立的登录会话，如 storage_state_{worker}.json
+    path = os.environ.get('STORAGE_STATE_PATH', '')
+    if '{worker}' in path:
+        os.environ['STORAGE_STATE_PATH'] = path.replace('{worker}', str(index))
+    # 账号预算按进程编号判断指定账号的请求是否由本进程执行
+    os.environ['BROWSER_PROCESS_INDEX'] = str(index)
+
+    try:
+        service = service_factory()
+        service.worker_id = index
+    except Exception as e:
+        results.put(('ready', index, None, str(e)))
+        return
+    results.put(('ready', index, service.snapshot(), None))
+
+    try:
+        while True:
+            job = tasks.get()
+            if job is None:
+                break
+
+            job_id, method, args, kwargs, deadline = job
+            if time.time() > deadline:
+                results.put(('expired', index, job_id, None, service.snapshot()))
+                continue
+
+            if kwargs.get(EMIT_ARG) is True:
+                stop_stream.clear()
+
+                def emit(card, job_id=job_id):
+                    if stop_stream.is_set():
+                        return False
+                    results.put(('emit', index, job_id, card, None))
+                    return True
+
+                kwargs[EMIT_ARG] = emit
+
+            try:
+                value = invoke(service, method, args, kwargs)
+                message = ('result', index, job_id, value, service.snapshot())
+            except Exception as e:
+                message = ('error', index, job_id, _portable_error(e), service.snapshot())
+            results.put(message)
+    finally:
+        service.close()
+
+
+def _portable_error(e):
+    """能够 pickle 往返的异常原样传回主进程，以便按类型返回状态码，否则传回错误描述"""
+    try:
+        pickle.loads(pickle.dumps(e))
+        return e
+    except Exception:
+        return f"{type(e).__name__}: {str(e)}"
+
+
+class _ServiceProxy:
+    def __init__(self, index):
+        """工作进程中服务实例的代理，提供 AppServer 需要的只读查询
+
+        数据来自工作进程每次执行任务后回传的快照，查询不需要进程间通信。
+        """
+        self.worker_id = index
+        self.pid = None
+        self.restarts = 0
+        self._snapshot = {}
+        self._received_at = time.monotonic()
+
+    def update(self, snapshot, pid):
+        if snapshot is not None:
+            self._snapshot = snapshot
+            self._received_at = time.monotonic()
+        self.pid = pid
+
+    def cached_login_status(self):
+        """快照中未过期的登录状态，未命中返回 None"""
+        status = self._snapshot.get("login_status")
+        if not status:
+            return None
+        expires_in = status.get("expires_in", 0) - (time.monotonic() - self._received_at)
+        if expires_in <= 0:
+            return None
+        return dict(status, expires_in=round(expires_in, 1))
+
+    def metrics_snapshot(self):
+        """工作进程中的指标快照，进程重启后从零开始"""
+        return self._snapshot.get("metrics")
+
+    def get_pool_stats(self):
+        stats = dict(self._snapshot.get("pool_stats") or {})
+        stats["worker_id"] = self.worker_id
+        stats["pid"] = self.pid
+        stats["restarts"] = self.restarts
+        return stats
+
+
+class _Relay:
+    def __init__(self, emit, stop_stream):
+        """在独立线程中调用流式抓取的回调，避免客户端读取过慢时阻塞结果分发
+
+        参数:
+            emit: 主进程中的回调函数，返回 False 时停止抓取
+            stop_stream: 对应工作进程的停止事件
+        """
+        self.emit = emit
+        self.stop_stream = stop_stream
+        self._cards = queue.Queue()
+        threading.Thread(target=self._run, name="stream-relay", daemon=True).start()
+
+    def put(self, card):
+        self._cards.put(card)
+
+    def close(self):
+        self._cards.put(None)
+
+    def _run(self):
+        stopped = False
+        while True:
+            card = self._cards.get()
+            if card is None:
+                return
+            if not stopped and self.emit(card) is False:
+                stopped = True
+                self.stop_stream.set()
+
+
+class _Process:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.tasks = None
+        self.stop_stream = None
+        # 已投递但尚未返回的任务 ID
+        self.jobs = set()
+        self.crashes = 0
+        self.restart_at = None
+        self.ready_at = None
+
+
+class ProcessBrowserExecutor:
+    def __init__(self, service_factory, workers=2, queue_size=64, default_deadline=120, retry_after=5):
+        """初始化多进程浏览器执行器，接口与 BrowserExecutor 相同
+
+        每个工作进程拥有独立的浏览器和 GIL，浏览器崩溃只影响所在的进程，
+        崩溃的进程会被自动重启，其未完成的任务以 WorkerCrashedError 结束。
+        任务投递给未完成任务最少的进程，指定 worker 时投递给对应的进程。
+        进程等待重启期间投递给它的任务以 ExecutorQueueFullError 拒绝，由客户端稍后重试。
+
+        参数:
+            service_factory: 创建服务实例的无参可调用对象，需要可以被 pickle（如服务类本身）
+            workers: 工作进程数量
+            queue_size: 所有进程未完成任务的总容量，已满时拒绝新任务
+            default_deadline: 任务默认截止时间（秒）
+            retry_after: 队列满时建议客户端重试的间隔（秒）
+        """
+        self.service_factory = service_factory
+        self.worker_count = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.default_deadline = default_deadline
+        self.retry_after = retry_after
+
+        # spawn 方式启动的子进程不继承主进程的线程和浏览器状态
+        self._mp = multiprocessing.get_context('spawn')
+        self._results = self._mp.Queue()
+        self._processes = [_Process(i) for i in range(self.worker_count)]
+        self.services = [_ServiceProxy(i) for i in range(self.worker_count)]
+        self._futures = {}
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._ready = {}
+        self._dispatcher = None
+
+        # 统计数据
+        self._submitted = 0
+        self._rejected = 0
+        self._expired = 0
+        self._completed = 0
+        self._failed = 0
+        self._crashed = 0
+
+    def start(self, wait=True):
+        """启动所有工作进程
+
+        参数:
+            wait: 是否等待浏览器初始化完成，为 False 时与 BrowserExecutor 相同，在后台启动
+        """
+        for worker in self._processes:
+            self._ready[worker.index] = threading.Event()
+            self._spawn(worker)
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="process-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+        if not wait:
+            logger.info(f"多进程浏览器执行器已在后台启动，工作进程数: {self.worker_count}，队列容量: {self.queue_size}")
+            return
+
+        errors = []
+        for worker in self._processes:
+            self._ready[worker.index].wait()
+            if worker.process is None:
+                errors.append(worker.index)
+        if errors:
+            self.shutdown()
+            raise RuntimeError(f"工作进程初始化失败: {errors}")
+
+        logger.info(f"多进程浏览器执行器已启动，工作进程数: {self.worker_count}，队列容量: {self.queue_size}")
+
+    def _spawn(self, worker):
+        worker.tasks = self._mp.Queue()
+        worker.stop_stream = self._mp.Event()
+        worker.process = self._mp.Process(
+            target=_worker_main,
+            args=(worker.index, self.service_factory, worker.tasks, self._results, worker.stop_stream),
+            name=f"browser-process-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+        self.services[worker.index].update(None, worker.process.pid)
+
+    def submit(self, method, *args, deadline=None, worker=None, **kwargs):
+        """投递任务，返回 Future
+
+        参数:
+            method: 服务实例上的方法名
+            deadline: 任务截止时间（秒），默认使用执行器配置
+            worker: 指定执行任务的工作进程编号，默认投递给未完成任务最少的进程
+        """
+        if worker is not None and not 0 <= worker < self.worker_count:
+            raise ValueError(f"无效的工作进程编号: {worker}")
+
+        deadline = self.default_deadline if deadline is None else deadline
+        # 回调函数无法跨进程传递，由工作进程通过结果队列回传后在主进程中调用
+        emit = kwargs.pop(EMIT_ARG, None)
+        if emit is not None:
+            kwargs[EMIT_ARG] = True
+        relay = None
+
+        with self._lock:
+            if sum(len(p.jobs) for p in self._processes) >= self.queue_size + self.worker_count:
+                self._rejected += 1
+                logger.warning(f"任务队列已满，拒绝任务: {method}")
+                raise ExecutorQueueFullError("服务繁忙，请稍后重试", retry_after=self.retry_after)
+
+            # 初始化失败的进程不再接收任务
+            started = [p for p in self._processes if p.process is not None]
+            if not started:
+                raise RuntimeError("所有工作进程初始化失败")
+            if worker is None:
+                alive = [p for p in started if p.restart_at is None] or started
+                target = min(alive, key=lambda p: len(p.jobs))
+            else:
+                target = self._processes[worker]
+                if target.process is None:
+                    raise RuntimeError(f"工作进程 {worker} 初始化失败")
+            # 等待重启的进程的任务队列会在重启时替换，投递的任务不会被执行
+            if target.restart_at is not None:
+                self._rejected += 1
+                retry_after = max(1, math.ceil(target.restart_at - time.monotonic()))
+                logger.warning(f"工作进程 {target.index} 正在重启，拒绝任务: {method}")
+                raise ExecutorQueueFullError(f"工作进程 {target.index} 正在重启，请稍后重试", retry_after=retry_after)
+
+            job_id = next(self._job_ids)
+            future = Future()
+            # 任务一经投递就无法从进程的队列中撤回，因此不支持取消
+            future.set_running_or_notify_cancel()
+            if emit is not None:
+                relay = _Relay(emit, target.stop_stream)
+            self._futures[job_id] = (future, target, relay)
+            target.jobs.add(job_id)
+            self._submitted += 1
+
+        target.tasks.put((job_id, method, args, kwargs, time.time() + deadline))
+        return future
+
+    def call(self, method, *args, deadline=None, worker=None, **kwargs):
+        """投递任务并等待结果，超过截止时间抛出 JobDeadlineExceededError"""
+        deadline = self.default_deadline if deadline is None else deadline
+        future = self.submit(method, *args, deadline=deadline, worker=worker, **kwargs)
+        try:
+            return future.result(timeout=deadline)
+        except FutureTimeoutError:
+            with self._lock:
+                self._expired += 1
+            raise JobDeadlineExceededError(f"任务 {method} 超过截止时间 ({deadline}s)")
+
+    def _dispatch_loop(self):
+        """读取工作进程回传的消息，完成对应的 Future，并重启崩溃的进程"""
+        checked_at = time.monotonic()
+        while not self._stop_event.is_set():
+            if time.monotonic() - checked_at >= 0.5:
+                self._supervise()
+                checked_at = time.monotonic()
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._handle(message)
+
+    def _handle(self, message):
+        """处理工作进程回传的一条消息"""
+        kind, index, payload = message[0], message[1], message[2]
+        worker = self._processes[index]
+        if kind == 'ready':
+            error = message[3]
+            if error:
+                logger.error(f"工作进程 {index} 初始化服务失败: {error}")
+                if not self._ready[index].is_set():
+                    # 启动阶段初始化失败时不再重启，由 start 报告错误
+                    worker.process = None
+                    self._fail_init(worker, error)
+            else:
+                # 连续崩溃次数在进程稳定运行后才清零，见 _supervise
+                worker.ready_at = time.monotonic()
+                self.services[index].update(payload, worker.process.pid)
+            self._ready[index].set()
+            return
+
+        job_id, value, snapshot = payload, message[3], message[4]
+        if kind == 'emit':
+            with self._lock:
+                _, _, relay = self._futures.get(job_id, (None, None, None))
+            if relay is not None:
+                relay.put(value)
+            return
+
+        self.services[index].update(snapshot, worker.process.pid)
+        with self._lock:
+            future, _, relay = self._futures.pop(job_id, (None, None, None))
+            worker.jobs.discard(job_id)
+            if kind == 'result':
+                self._completed += 1
+                worker.crashes = 0
+            elif kind == 'error':
+                self._failed += 1
+            else:
+                self._expired += 1
+        if relay is not None:
+            relay.close()
+        if future is None or future.done():
+            return
+
+        if kind == 'result':
+            future.set_result(value)
+        elif kind == 'error':
+            logger.error(f"工作进程 {index} 执行任务失败: {value}")
+            future.set_exception(value if isinstance(value, Exception) else RuntimeError(value))
+        else:
+            future.set_exception(JobDeadlineExceededError("任务在队列中等待超时"))
+
+    def _fail_init(self, worker, error):
+        """后台启动期间已分配给初始化失败的进程的任务全部失败"""
+        with self._lock:
+            lost = [self._futures.pop(job_id) for job_id in worker.jobs if job_id in self._futures]
+            worker.jobs.clear()
+            self._failed += len(lost)
+        for future, _, relay in lost:
+            if relay is not None:
+                relay.close()
+            if not future.done():
+                future.set_exception(RuntimeError(f"工作进程 {worker.index} 初始化失败: {error}"))
+
+    def _supervise(self):
+        """检查工作进程是否存活，崩溃的进程在等待一段时间后重启"""
+        now = time.monotonic()
+        for worker in self._processes:
+            if worker.process is None or self._stop_event.is_set():
+                continue
+
+            if not self._ready[worker.index].is_set():
+                # 初始化阶段退出且未回传结果，如浏览器启动时崩溃
+                if not worker.process.is_alive():
+                    worker.process = None
+                    self._fail_init(worker, "进程已退出")
+                    self._ready[worker.index].set()
+                continue
+
+            if worker.restart_at is not None:
+                if now >= worker.restart_at:
+                    logger.info(f"正在重启工作进程 {worker.index}")
+                    worker.ready_at = None
+                    self._spawn(worker)
+                    # 新的任务队列创建后才重新接收任务
+                    with self._lock:
+                        worker.restart_at = None
+                continue
+
+            if worker.process.is_alive():
+                if worker.crashes and worker.ready_at is not None and now - worker.ready_at >= STABLE_UPTIME:
+                    worker.crashes = 0
+                continue
+
+            # 进程已退出，未完成的任务全部失败，在同一把锁内标记为等待重启，之后投递的任务直接拒绝
+            delay = min(RESTART_DELAY * 2 ** worker.crashes, MAX_RESTART_DELAY)
+            with self._lock:
+                self._crashed += 1
+                worker.crashes += 1
+                worker.restart_at = now + delay
+                lost = [self._futures.pop(job_id) for job_id in worker.jobs if job_id in self._futures]
+                worker.jobs.clear()
+                self._failed += len(lost)
+            for future, _, relay in lost:
+                if relay is not None:
+                    relay.close()
+                if not future.done():
+                    future.set_exception(WorkerCrashedError(f"工作进程 {worker.index} 已退出"))
+
+            logger.error(f"工作进程 {worker.index} 异常退出（exitcode={worker.process.exitcode}），{delay}s 后重启")
+            self.services[worker.index].restarts += 1
+
+    def metrics_snapshots(self):
+        """各工作进程回传的指标快照，由主进程合并后输出"""
+        return [service.metrics_snapshot() for service in self.services]
+
+    def readiness(self):
+        """启动进度，与 BrowserExecutor.readiness 相同"""
+        ready = [p.index for p in self._processes if self._ready[p.index].is_set() and p.process is not None]
+        failed = [p.index for p in self._processes if self._ready[p.index].is_set() and p.process is None]
+        return {
+            "ready": bool(ready),
+            "workers": self.worker_count,
+            "ready_workers": len(ready),
+            "errors": [f"工作进程 {index} 初始化失败" for index in failed]
+        }
+
+    def stats(self):
+        """执行器统计信息"""
+        with self._lock:
+            in_flight = sum(len(p.jobs) for p in self._processes)
+            return {
+                "mode": "process",
+                "workers": self.worker_count,
+                "alive_workers": sum(1 for p in self._processes if p.process is not None and p.process.is_alive()),
+                "busy_workers": sum(1 for p in self._processes if p.jobs),
+                "queue_depth": max(0, in_flight - sum(1 for p in self._processes if p.jobs)),
+                "queue_size": self.queue_size,
+                "submitted_total": self._submitted,
+                "rejected_total": self._rejected,
+                "expired_total": self._expired,
+                "completed_total": self._completed,
+                "failed_total": self._failed,
+                "crashed_total": self._crashed
+            }
+
+    def shutdown(self, timeout=10):
+        """停止工作进程并关闭浏览器"""
+        self._stop_event.set()
+        for worker in self._processes:
+            if worker.process is not None and worker.process.is_alive():
+                worker.tasks.put(None)
+        for worker in self._processes:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+        # 结束未完成的任务
+        with self._lock:
+            pending = list(self._futures.values())
+            self._futures.clear()
+        for future, _, relay in pending:
+            if relay is not None:
+                relay.close()
+            if not future.done():
+                future.set_exception(WorkerCrashedError("执行器已关闭"))
@@ -0,0 +1,168 @@
+from loguru import logger
+import os
+import threading
+
+
+# 拦截配置: 名称 -> (拦截的资源类型, 拦截的URL关键字)
+PROFILES = {
+    "full": (set(), ()),
+    "scrape": (
+        {"image", "media", "font"},
+        (
+            "apm-fe.xiaohongshu.com",
+            "t2.xiaohongshu.com",
+            "google-analytics.com",
+            "googletagmanager.com",
+            "hm.baidu.com"
+        )
+    )
+}
+
+# 各接口默认使用的拦截配置，发布和评论需要完整页面
+DEFAULT_ENDPOINT_PROFILES = {
+    "check_login_status": "scrape",
+    "get_feeds": "scrape",
+    "search_content": "scrape",
+    "get_note_detail": "scrape",
+    "prewarm": "scrape",
+    "publish_content": "full",
+    "post_comment": "full"
+}
+
+# 无法从响应头得知大小时，各类资源的估算大小（字节）
+DEFAULT_SIZE_ESTIMATES = {
+    "image": 60 * 1024,
+    "media": 500 * 1024,
+    "font": 40 * 1024,
+    "analytics": 2 * 1024
+}
+
+
+def load_endpoint_profiles():
+    """读取各接口的拦截配置
+
+    RESOURCE_BLOCKING=false 时全部使用 full，
+    RESOURCE_PROFILES 可覆盖单个接口，如 "get_feeds=full,get_note_detail=scrape"
+    """
+    profiles = dict(DEFAULT_ENDPOINT_PROFILES)
+    if os.environ.get('RESOURCE_BLOCKING', 'true').lower() != 'true':
+        return {endpoint: "full" for endpoint in profiles}
+
+    for item in os.environ.get('RESOURCE_PROFILES', '').split(','):
+        if '=' not in item:
+            continue
+        endpoint, profile = (part.strip() for part in item.split('=', 1))
+        if profile not in PROFILES:
+            logger.warning(f"未知的资源拦截配置: {profile}，已忽略")
+            continue
+        profiles[endpoint] = profile
+    return profiles
+
+
+class ResourceBlockerBase:
+    def __init__(self, endpoint_profiles=None):
+        """初始化资源拦截
+
+        参数:
+            endpoint_profiles: 接口名 -> 拦截配置名，默认读取环境变量
+        """
+        self.endpoint_profiles = endpoint_profiles or load_endpoint_profiles()
+        self._page_profiles = {}
+        self._lock = threading.Lock()
+
+        # 统计数据
+        self._blocked_requests = {}
+        self._allowed_requests = 0
+        self._observed_sizes = {}
+
+    @property
+    def active(self):
+        """是否有接口需要拦截资源"""
+        return any(PROFILES[profile][0] or PROFILES[profile][1] for profile in self.endpoint_profiles.values())
+
+    def profile_for(self, endpoint):
+        """获取接口使用的拦截配置名"""
+        return self.endpoint_profiles.get(endpoint, "full")
+
+    def set_profile(self, page, endpoint):
+        """为页面设置当前接口的拦截配置"""
+        self._page_profiles[page] = self.profile_for(endpoint)
+
+    def forget(self, page):
+        """页面关闭后移除其配置"""
+        self._page_profiles.pop(page, None)
+
+    def _block_category(self, request):
+        """判断请求是否需要拦截，返回拦截类别，不拦截返回 None"""
+        try:
+            page = request.frame.page
+        except Exception:
+            # Service Worker 等没有所属页面的请求不拦截
+            return None
+
+        resource_types, url_keywords = PROFILES[self._page_profiles.get(page, "full")]
+        if request.resource_type in resource_types:
+            return request.resource_type
+        if any(keyword in request.url for keyword in url_keywords):
+            return "analytics"
+        return None
+
+    def _record_blocked(self, category):
+        with self._lock:
+            self._blocked_requests[category] = self._blocked_requests.get(category, 0) + 1
+
+    def _record_allowed(self):
+        with self._lock:
+            self._allowed_requests += 1
+
+    def _on_response(self, response):
+        """记录放行资源的大小，用于估算拦截节省的流量"""
+        resource_type = response.request.resource_type
+        if resource_type not in DEFAULT_SIZE_ESTIMATES:
+            return
+        length = response.headers.get('content-length')
+        if not length or not length.isdigit():
+            return
+        with self._lock:
+            total, count = self._observed_sizes.get(resource_type, (0, 0))
+            self._observed_sizes[resource_type] = (total + int(length), count + 1)
+
+    def _estimated_size(self, category):
+        total, count = self._observed_sizes.get(category, (0, 0))
+        if count:
+            return total // count
+        return DEFAULT_SIZE_ESTIMATES.get(category, 0)
+
+    def stats(self):
+        """资源拦截统计信息"""
+        with self._lock:
+            blocked = dict(self._blocked_requests)
+            return {
+                "endpoint_profiles": dict(self.endpoint_profiles),
+                "blocked_requests": blocked,
+                "blocked_requests_total": sum(blocked.values()),
+                "allowed_requests_total": self._allowed_requests,
+                "estimated_bytes_saved": sum(self._estimated_size(category) * count for category, count in blocked.items())
+            }
+
+
+class ResourceBlocker(ResourceBlockerBase):
+    def attach(self, context):
+        """在上下文上注册请求拦截
+
+        注册 route 后 Playwright 会关闭该上下文的 HTTP 缓存，完整加载页面时前端脚本需要重新下载。
+        """
+        if not self.active:
+            return
+        context.route('**/*', self._handle_route)
+        context.on('response', self._on_response)
+
+    def _handle_route(self, route):
+        category = self._block_category(route.request)
+        if category:
+            self._record_blocked(category)
+            route.abort('blockedbyclient')
+            return
+
+        self._record_allowed()
+        route.continue_()
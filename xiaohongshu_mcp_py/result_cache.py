@@ -0,0 +1,234 @@
+from loguru import logger
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+
+# 各接口默认的缓存有效期（秒），为 0 时不缓存
+DEFAULT_TTLS = {
+    "get_note_detail": 600,
+    "search_content": 120,
+    "get_feeds": 60
+}
+
+
+def load_ttls():
+    """读取各接口的缓存有效期
+
+    RESULT_CACHE=false 时全部为 0，
+    RESULT_CACHE_TTLS 可覆盖单个接口，如 "get_feeds=30,get_note_detail=3600"
+    """
+    ttls = dict(DEFAULT_TTLS)
+    if os.environ.get('RESULT_CACHE', 'true').lower() != 'true':
+        return {endpoint: 0 for endpoint in ttls}
+
+    for item in os.environ.get('RESULT_CACHE_TTLS', '').split(','):
+        if '=' not in item:
+            continue
+        endpoint, ttl = (part.strip() for part in item.split('=', 1))
+        try:
+            ttls[endpoint] = float(ttl)
+        except ValueError:
+            logger.warning(f"无效的缓存有效期: {item}，已忽略")
+    return ttls
+
+
+def is_cacheable(result):
+    """只缓存成功的结果，带有 error 字段的结果不缓存"""
+    return isinstance(result, dict) and not result.get("error")
+
+
+class CacheEntry:
+    __slots__ = ('value', 'size', 'stored_at', 'ttl')
+
+    def __init__(self, value, size, ttl):
+        self.value = value
+        self.size = size
+        self.stored_at = time.monotonic()
+        self.ttl = ttl
+
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+
+class ResultCacheBase:
+    def __init__(self, ttls=None, max_entries=None, max_bytes=None, stale_ttl=None):
+        """初始化结果缓存
+
+        参数:
+            ttls: 接口名 -> 有效期（秒），默认读取环境变量
+            max_entries: 最大条目数，默认读取 RESULT_CACHE_MAX_ENTRIES
+            max_bytes: 最大占用字节数（按 JSON 序列化大小估算），默认读取 RESULT_CACHE_MAX_BYTES
+            stale_ttl: 过期后仍可返回旧结果并在后台刷新的时长（秒），默认读取 RESULT_CACHE_STALE_TTL
+        """
+        self.ttls = ttls or load_ttls()
+        self.max_entries = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '1024')) if max_entries is None else max_entries
+        self.max_bytes = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024))) if max_bytes is None else max_bytes
+        self.stale_ttl = float(os.environ.get('RESULT_CACHE_STALE_TTL', '300')) if stale_ttl is None else stale_ttl
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        # 统计数据
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._bypasses = 0
+        self._evictions = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+
+    def enabled(self, endpoint):
+        """接口是否启用缓存"""
+        return self.ttls.get(endpoint, 0) > 0
+
+    def key(self, endpoint, params):
+        """由接口名和参数生成缓存键"""
+        return (endpoint,) + tuple(params)
+
+    def lookup(self, key):
+        """查找缓存，返回 (状态, 结果)
+
+        状态为 "hit"（未过期）、"stale"（已过期但可返回旧结果）或 "miss"
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return "miss", None
+
+            age = entry.age()
+            if age < entry.ttl:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return "hit", entry.value
+            if age < entry.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self._stale_hits += 1
+                return "stale", entry.value
+
+            self._remove(key)
+            self._misses += 1
+            return "miss", None
+
+    def store(self, key, value):
+        """写入缓存，超出条目数或字节数上限时淘汰最久未使用的条目"""
+        if not is_cacheable(value):
+            return False
+
+        try:
+            size = len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+        except (TypeError, ValueError):
+            return False
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(value, size, self.ttls.get(key[0], 0))
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+        return True
+
+    def record_bypass(self):
+        with self._lock:
+            self._bypasses += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _begin_refresh(self, key):
+        """标记后台刷新开始，同一个键同时只刷新一次"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._refreshes += 1
+            return True
+
+    def _end_refresh(self, key, value=None, error=None):
+        with self._lock:
+            self._refreshing.discard(key)
+            if error is not None or not is_cacheable(value):
+                self._refresh_failures += 1
+        if error is not None:
+            logger.warning(f"后台刷新缓存失败 {key}: {str(error)}")
+        else:
+            self.store(key, value)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                "ttls": dict(self.ttls),
+                "stale_ttl": self.stale_ttl,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits_total": self._hits,
+                "stale_hits_total": self._stale_hits,
+                "misses_total": self._misses,
+                "bypasses_total": self._bypasses,
+                "evictions_total": self._evictions,
+                "refreshes_total": self._refreshes,
+                "refresh_failures_total": self._refresh_failures
+            }
+
+
+class ResultCache(ResultCacheBase):
+    def fetch(self, endpoint, params, load, bypass=False):
+        """读取缓存，未命中时调用 load 获取结果并写入缓存
+
+        参数:
+            endpoint: 接口名
+            params: 规范化后的参数元组
+            load: 无参数的加载函数，返回接口结果
+            bypass: 跳过缓存读取（Cache-Control: no-cache），结果仍会写入缓存
+
+        返回:
+            (结果, 缓存状态)，状态为 hit / stale / miss / bypass
+        """
+        if not self.enabled(endpoint):
+            return load(), "bypass"
+
+        key = self.key(endpoint, params)
+        if bypass:
+            self.record_bypass()
+            status = "bypass"
+        else:
+            status, value = self.lookup(key)
+            if status == "hit":
+                return value, status
+            if status == "stale":
+                # 先返回旧结果，在后台线程中刷新
+                if self._begin_refresh(key):
+                    threading.Thread(target=self._refresh, args=(key, load), daemon=True).start()
+                return value, status
+
+        value = load()
+        self.store(key, value)
+        return value, status
+
+    def _refresh(self, key, load):
+        try:
+            value = load()
+        except Exception as e:
+            self._end_refresh(key, error=e)
+            return
+        self._end_refresh(key, value)
@@ -1,12 +1,25 @@
 from playwright.sync_api import sync_playwright
 from loguru import logger
+import math
 import time
 import os
+from contextlib import contextmanager
 from xiaohongshu_mcp_py.xiaohongshu.login import LoginAction
 from xiaohongshu_mcp_py.xiaohongshu.publish import PublishAction
 from xiaohongshu_mcp_py.xiaohongshu.search import SearchAction
 from xiaohongshu_mcp_py.xiaohongshu.feed import FeedAction
 from xiaohongshu_mcp_py.xiaohongshu.comment import CommentAction
+from xiaohongshu_mcp_py.page_pool import PagePool
+from xiaohongshu_mcp_py.resource_blocker import ResourceBlocker
+from xiaohongshu_mcp_py.login_cache import SITE_URL
+from xiaohongshu_mcp_py.accounts import AccountRegistry, AccountBudgetExceededError
+from xiaohongshu_mcp_py.note_store import NoteStore
+from xiaohongshu_mcp_py.browser_health import BrowserHealth, HEAP_SCRIPT
+from xiaohongshu_mcp_py.pacing import NavigationPacer
+from xiaohongshu_mcp_py import metrics
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.xiaohongshu.harvest import Harvest
+from xiaohongshu_mcp_py.feed_session import FeedSessions, FeedCursorError, encode_cursor, parse_cursor
 
 
 class XiaohongshuService:
@@ -16,84 +29,492 @@ class XiaohongshuService:
         self.browser = None
         self.context = None
         self.page = None
-        self.init_browser()
-        
-        # 初始化各功能模块
-        self.login_action = LoginAction(self)
-        self.publish_action = PublishAction(self)
-        self.search_action = SearchAction(self)
-        self.feed_action = FeedAction(self)
-        self.comment_action = CommentAction(self)
+        self.contexts = []
+        self.page_pool = None
+        # 每个账号拥有独立的上下文、页面池和请求预算，第一个账号为主账号
+        self.accounts = AccountRegistry()
+        self.session_store = self.accounts.primary.session_store
+        self.login_cache = self.accounts.primary.login_cache
+        self.note_store = NoteStore()
+        # 执行器中的工作线程编号，用于把游标请求送回创建会话的工作线程
+        self.worker_id = 0
+        self.resource_blocker = ResourceBlocker()
+        self.health = BrowserHealth()
+        self.feed_sessions = FeedSessions(on_close=self._forget_session_page)
+        # 延迟启动时浏览器在第一个任务开始前由 maintain 启动
+        if os.environ.get('BROWSER_LAZY_LAUNCH', 'false').lower() != 'true':
+            self.init_browser()
     
     def init_browser(self):
         """初始化浏览器"""
         try:
-            headless = os.environ.get('HEADLESS_MODE', 'true').lower() == 'true'
-            browser_bin_path = os.environ.get('BROWSER_BIN_PATH', '')
-            
-            logger.info(f"正在初始化浏览器，无头模式: {headless}")
             self.playwright = sync_playwright().start()
-            
-            browser_kwargs = {
-                'headless': headless,
-                'args': [
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--window-size=1920,1080'
-                ]
-            }
-            
-            if browser_bin_path:
-                browser_kwargs['executable_path'] = browser_bin_path
-            
-            self.browser = self.playwright.chromium.launch(**browser_kwargs)
-            self.context = self.browser.new_context()
-            self.page = self.context.new_page()
-            
-            # 设置默认超时
-            self.page.set_default_timeout(60000)
-            
+            self._launch_browser()
         except Exception as e:
             logger.error(f"初始化浏览器失败: {str(e)}")
             self.close()
+            # 延迟启动时下一个任务重新尝试启动
+            self.playwright = None
             raise
     
-    def check_login_status(self):
-        """检查登录状态"""
-        return self.login_action.check_login_status()
+    def _launch_browser(self):
+        """启动浏览器，创建上下文和页面池"""
+        headless = os.environ.get('HEADLESS_MODE', 'true').lower() == 'true'
+        browser_bin_path = os.environ.get('BROWSER_BIN_PATH', '')
+        
+        logger.info(f"正在初始化浏览器，无头模式: {headless}")
+        browser_kwargs = {
+            'headless': headless,
+            'args': [
+                '--no-sandbox',
+                '--disable-setuid-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+                '--window-size=1920,1080'
+            ]
+        }
+        
+        if browser_bin_path:
+            browser_kwargs['executable_path'] = browser_bin_path
+        
+        self.browser = self.playwright.chromium.launch(**browser_kwargs)
+        self.health.watch_browser(self.browser)
+        for account in self.accounts.accounts:
+            self._init_page_pool(account)
+        
+        # 主账号的上下文和页面池，供登录流程和游标分页会话使用
+        primary = self.accounts.primary
+        self.context = primary.context
+        self.contexts = [context for account in self.accounts.accounts for context in account.contexts]
+        self.page_pool = primary.page_pool
+        self.page = self.page_pool.pages[0]
+    
+    def _init_page_pool(self, account):
+        """初始化账号的上下文和页面
+
+        主上下文从账号保存的会话恢复登录状态。同步服务的每个工作线程同一时间只执行一个任务，
+        每个账号只创建一个页面，PAGE_POOL_SIZE 和 CONTEXT_POOL_SIZE 只对异步服务生效，
+        同步服务通过增加工作线程或工作进程提高吞吐量。页面仍放在 PagePool 中，以沿用借出、回收和统计逻辑。
+        """
+        wait_timeout = float(os.environ.get('PAGE_POOL_WAIT_TIMEOUT', '30'))
+        
+        account.context = self._new_context(account=account)
+        account.contexts = [account.context]
+        if account.session_store.exists():
+            logger.info(f"已从 {account.session_store.path} 恢复会话状态")
+        
+        page = account.context.new_page()
+        # 设置默认超时
+        page.set_default_timeout(60000)
+        self.health.watch_page(page)
+        self._prewarm(page)
+        if account.page_pool is None:
+            account.page_pool = PagePool([page], wait_timeout=wait_timeout)
+        else:
+            # 浏览器重启后沿用同一个页面池，统计数据保持连续
+            account.page_pool.reset([page])
+        logger.info(f"账号 {account.name} 页面初始化完成")
+    
+    def _new_context(self, storage_state=None, account=None):
+        """创建浏览器上下文并注册资源拦截
+
+        参数:
+            storage_state: 会话快照，为空时从账号保存的会话文件恢复
+            account: 上下文所属的账号，默认为主账号
+        """
+        account = account or self.accounts.primary
+        kwargs = {'storage_state': storage_state} if storage_state else account.session_store.context_kwargs()
+        context = self.browser.new_context(**kwargs)
+        self.resource_blocker.attach(context)
+        context.on('response', account.login_cache.on_response)
+        return context
+    
+    def save_storage_state(self, account=None):
+        """将账号主上下文的会话状态保存到磁盘
+
+        参数:
+            account: 账号，默认为主账号
+        """
+        account = account or self.accounts.primary
+        if not account.context:
+            return False
+        try:
+            return account.session_store.write(account.context.storage_state())
+        except Exception as e:
+            logger.error(f"读取会话状态失败: {str(e)}")
+            return False
+    
+    def _save_all_storage_states(self):
+        for account in self.accounts.accounts:
+            self.save_storage_state(account)
     
-    def publish_content(self, data):
-        """发布内容"""
-        return self.publish_action.publish_content(data)
+    def _reserve_account(self, name=None):
+        """选择账号并扣减一次请求预算，预算用完时等待，超过 ACCOUNT_BUDGET_WAIT 抛出 AccountBudgetExceededError
+
+        参数:
+            name: 指定的账号名，为空时按配置的方式选择
+        """
+        deadline = time.monotonic() + self.accounts.wait
+        while True:
+            account, wait = self.accounts.reserve(name)
+            if account is not None:
+                return account
+            if time.monotonic() + wait > deadline:
+                raise AccountBudgetExceededError(
+                    f"账号 {name} 的请求预算已用完" if name else "所有账号的请求预算已用完",
+                    retry_after=math.ceil(wait)
+                )
+            time.sleep(wait)
+    
+    @contextmanager
+    def _checkout(self, endpoint, account=None):
+        """选择账号，借出其页面并应用接口对应的资源拦截配置
+
+        参数:
+            account: 指定的账号名
+        """
+        account = self._reserve_account(account)
+        with account.page_pool.acquire() as page:
+            self.resource_blocker.set_profile(page, endpoint)
+            try:
+                yield page
+            finally:
+                self._after_use(page, account.page_pool)
+    
+    def _after_use(self, page, page_pool):
+        """记录页面使用次数并定期读取内存，超过阈值或渲染进程崩溃时换用新页面"""
+        heap = None
+        if self.health.should_sample(page):
+            try:
+                heap = page.evaluate(HEAP_SCRIPT)
+            except Exception as e:
+                logger.debug(f"读取页面内存失败: {str(e)}")
+        
+        reason = self.health.record_use(page, heap)
+        if reason:
+            self._recycle_page(page, reason, page_pool)
+    
+    def _recycle_page(self, page, reason, page_pool):
+        """在同一个上下文中创建新页面替换旧页面"""
+        logger.info(f"回收页面: {reason}")
+        try:
+            new_page = page.context.new_page()
+            new_page.set_default_timeout(60000)
+        except Exception as e:
+            # 浏览器已断开时由 maintain 重启浏览器
+            logger.warning(f"创建新页面失败: {str(e)}")
+            return
+        
+        self.health.forget(page)
+        self.resource_blocker.forget(page)
+        self.health.watch_page(new_page)
+        self._prewarm(new_page)
+        page_pool.replace(page, new_page)
+        if page is self.page:
+            self.page = new_page
+        try:
+            page.close()
+        except Exception:
+            pass
+    
+    def _forget_session_page(self, page):
+        """游标会话关闭后不再跟踪其页面"""
+        self.resource_blocker.forget(page)
+        self.health.forget(page, recycled=False)
     
-    def get_feeds(self, page=1, size=20):
+    def _prewarm(self, page):
+        """让页面停留在站点上，之后的搜索和笔记详情可以使用站内导航，不再重新加载前端脚本"""
+        self.resource_blocker.set_profile(page, 'prewarm')
+        navigate.prewarm(page)
+    
+    def maintain(self, failed=None):
+        """在两个任务之间检查浏览器健康状态，超过阈值、错误率过高或崩溃时重启浏览器
+
+        由执行器在每个任务前后调用，同一时间没有其他任务使用浏览器。
+
+        参数:
+            failed: 刚结束的任务是否失败，任务开始前调用时为 None
+        """
+        if self.playwright is None:
+            logger.info("第一个任务到达，正在启动浏览器")
+            self.init_browser()
+            return
+        if failed is not None:
+            self.health.record_outcome(failed)
+        reason = self.health.restart_reason()
+        if reason is None and (self.browser is None or not self.browser.is_connected()):
+            reason = "浏览器未启动"
+        if reason:
+            self.restart_browser(reason)
+    
+    def restart_browser(self, reason=""):
+        """关闭并重新启动浏览器，登录状态从保存的会话恢复，游标分页会话随之失效"""
+        logger.warning(f"正在重启浏览器: {reason}")
+        if self.browser is not None and self.browser.is_connected():
+            self._save_all_storage_states()
+        self.health.begin_close()
+        self._close_browser()
+        # 先清空计数，再由 _launch_browser 登记新页面
+        self.health.reset()
+        self._launch_browser()
+        logger.info("浏览器重启完成")
+    
+    def check_login_status(self, force=False, account=None):
+        """检查登录状态
+
+        先根据会话 Cookie 和缓存判断，只有缓存未命中或强制检查时才打开页面。
+
+        参数:
+            force: 跳过缓存，直接打开页面检查
+            account: 账号名，默认为主账号
+        """
+        account = self.accounts.get(account)
+        session_cookie = self._session_cookie(account)
+        if not force:
+            # 没有会话 Cookie 一定未登录，无需打开页面
+            if not session_cookie:
+                return {
+                    "is_logged_in": False,
+                    "message": "未登录",
+                    "source": "cookie"
+                }
+            
+            status = account.login_cache.get(session_cookie)
+            if status:
+                return status
+        
+        with self._checkout('check_login_status', account.name) as page:
+            status = LoginAction(self, page).check_login_status()
+        status["source"] = "page"
+        
+        # 检查后 Cookie 可能已刷新，以最新值写入缓存
+        account.login_cache.set(status, self._session_cookie(account))
+        
+        # 确认已登录后保存会话，重启后无需重新登录
+        if status.get("is_logged_in"):
+            self.save_storage_state(account)
+        return status
+    
+    def _session_cookie(self, account=None):
+        """读取账号主上下文中的会话 Cookie，不访问页面，默认为主账号"""
+        account = account or self.accounts.primary
+        try:
+            return account.login_cache.session_cookie(account.context.cookies(SITE_URL))
+        except Exception as e:
+            logger.warning(f"读取会话 Cookie 失败: {str(e)}")
+            return None
+    
+    def cached_login_status(self, account=None):
+        """读取账号缓存的登录状态，不访问浏览器，未命中返回 None"""
+        return self.accounts.get(account).login_cache.get(match_cookie=False)
+    
+    def publish_content(self, data, account=None):
+        """发布内容，account 为发布使用的账号名"""
+        with self._checkout('publish_content', account) as page:
+            return PublishAction(self, page).publish_content(data)
+    
+    def get_feeds(self, page=1, size=20, account=None):
         """获取推荐列表"""
-        return self.feed_action.get_feeds(page, size)
+        with self._checkout('get_feeds', account) as tab:
+            action = FeedAction(self, tab)
+            result = action.get_feeds(page, size)
+        self._store_notes(action.notes or result.get("feeds"), "feed")
+        return result
+    
+    def get_feeds_by_cursor(self, cursor=None, size=20, account=None):
+        """按游标获取推荐列表
+
+        会话页面固定在创建会话的账号上下文中，每次请求都扣减该账号的预算并记录页面使用次数，
+        页面需要回收时关闭会话，之后的游标失效。
+
+        参数:
+            cursor: 上一页返回的 next_cursor，为空时创建新的会话从头开始
+            size: 每页数量
+            account: 创建新会话时使用的账号名，带游标时必须与会话的账号相同
+        """
+        self.feed_sessions.prune()
+        session, offset = None, 0
+        if cursor:
+            _, session_id, offset = parse_cursor(cursor)
+            session = self.feed_sessions.get(session_id)
+            if session is None:
+                raise FeedCursorError("游标已失效，请不带游标重新开始")
+            if account and account != session.account:
+                raise FeedCursorError(f"游标不属于账号 {account}")
+            self._reserve_account(session.account)
+        else:
+            selected = self._reserve_account(account)
+            session = self.feed_sessions.open(selected.context, self._setup_session_page)
+            session.account = selected.name
+        
+        try:
+            action = FeedAction(self, session.page)
+            result = action.get_feeds_by_cursor(session, offset, size)
+        finally:
+            self._after_session_use(session)
+        next_offset = offset + len(result["feeds"])
+        result["next_cursor"] = encode_cursor(self.worker_id, session.id, next_offset) if result["has_more"] else None
+        self._store_notes(action.notes or result.get("feeds"), "feed")
+        return result
     
-    def search_content(self, keyword, page=1, size=20):
+    def _setup_session_page(self, page):
+        """初始化游标会话独占的页面"""
+        page.set_default_timeout(60000)
+        self.resource_blocker.set_profile(page, 'get_feeds')
+        self.health.watch_page(page)
+    
+    def _after_session_use(self, session):
+        """记录会话页面的使用次数并定期读取内存，会话页面保存着滚动位置，需要回收时直接关闭会话"""
+        heap = None
+        if self.health.should_sample(session.page):
+            try:
+                heap = session.page.evaluate(HEAP_SCRIPT)
+            except Exception as e:
+                logger.debug(f"读取页面内存失败: {str(e)}")
+        
+        reason = self.health.record_use(session.page, heap)
+        if reason and session.id in self.feed_sessions.sessions:
+            logger.info(f"关闭游标会话 {session.id}: {reason}")
+            self.feed_sessions.close(session)
+    
+    def search_content(self, keyword, page=1, size=20, account=None):
         """搜索内容"""
-        return self.search_action.search_content(keyword, page, size)
+        with self._checkout('search_content', account) as tab:
+            action = SearchAction(self, tab)
+            result = action.search_content(keyword, page, size)
+        self._store_notes(action.notes or result.get("results"), "search", keyword)
+        return result
+    
+    def stream_feeds(self, emit, limit=100, time_budget=60, skip_stored=False, account=None):
+        """边滚动边推送推荐列表
+        
+        参数:
+            emit: 接收每张卡片的函数，返回 False 时停止抓取（如客户端已断开）
+            limit: 最多推送的笔记数
+            time_budget: 时间预算（秒）
+            skip_stored: 跳过本地笔记存储中已有的笔记
+            account: 账号名
+        
+        返回:
+            推送统计
+        """
+        harvest = self._harvest(limit, time_budget, skip_stored)
+        with self._checkout('get_feeds', account) as tab:
+            return self._stream(FeedAction(self, tab).iter_feeds(harvest), harvest, emit, "feed")
+    
+    def stream_search(self, keyword, emit, limit=100, time_budget=60, skip_stored=False, account=None):
+        """边滚动边推送搜索结果，参数与 stream_feeds 相同"""
+        harvest = self._harvest(limit, time_budget, skip_stored)
+        with self._checkout('search_content', account) as tab:
+            return self._stream(SearchAction(self, tab).iter_results(keyword, harvest), harvest, emit, "search", keyword)
+    
+    def _harvest(self, limit, time_budget, skip_stored):
+        skip = self.note_store.contains if skip_stored and self.note_store.enabled else None
+        return Harvest(limit, time_budget, skip)
+    
+    def _stream(self, cards, harvest, emit, source, keyword=None):
+        """将抓取到的卡片逐条交给 emit，结束后写入本地笔记存储"""
+        start = time.perf_counter()
+        notes = []
+        try:
+            for card, note in cards:
+                notes.append(note or card)
+                if emit(card) is False:
+                    logger.info("客户端已停止接收，结束流式抓取")
+                    break
+        finally:
+            # 提前结束时关闭生成器，移除页面上的响应监听
+            cards.close()
+            self._store_notes(notes, source, keyword)
+        
+        return {
+            "total_count": len(notes),
+            "skipped": harvest.skipped,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
     
-    def get_note_detail(self, note_id):
+    def get_note_detail(self, note_id, account=None):
         """获取帖子详情"""
-        return self.feed_action.get_note_detail(note_id)
+        with self._checkout('get_note_detail', account) as page:
+            result = FeedAction(self, page).get_note_detail(note_id)
+        if result.get("detail"):
+            self._store_notes([result["detail"]], "detail")
+        return result
     
-    def post_comment(self, note_id, content):
-        """发表评论"""
-        return self.comment_action.post_comment(note_id, content)
+    def _store_notes(self, notes, source, keyword=None):
+        """将抓取到的笔记写入本地笔记存储，写入失败不影响接口返回"""
+        if not self.note_store.enabled or not notes:
+            return
+        try:
+            self.note_store.upsert_notes(notes, source, keyword)
+        except Exception as e:
+            logger.warning(f"保存笔记到本地存储失败: {str(e)}")
+    
+    def post_comment(self, note_id, content, account=None):
+        """发表评论，account 为评论使用的账号名"""
+        with self._checkout('post_comment', account) as page:
+            return CommentAction(self, page).post_comment(note_id, content)
+    
+    def get_pool_stats(self):
+        """获取页面池统计信息"""
+        stats = self.page_pool.stats() if self.page_pool else {}
+        stats["contexts"] = len(self.contexts)
+        stats["resource_blocking"] = self.resource_blocker.stats()
+        stats["login_cache"] = self.login_cache.stats()
+        stats["feed_sessions"] = self.feed_sessions.stats()
+        stats["health"] = self.health.stats()
+        stats["pacing"] = NavigationPacer.shared().stats()
+        if self.accounts.multiple:
+            stats["accounts"] = self.accounts.stats()
+        return stats
+    
+    def snapshot(self):
+        """多进程模式下回传给主进程的状态快照，包括页面池统计、缓存的登录状态和本进程的指标"""
+        return {
+            "pool_stats": self.get_pool_stats(),
+            "login_status": self.login_cache.peek(),
+            "metrics": metrics.registry.snapshot()
+        }
     
     def close(self):
         """关闭浏览器资源"""
+        # 关闭前保存各账号的会话状态
+        self._save_all_storage_states()
+        self.note_store.close()
+        self.health.begin_close()
+        self._close_browser()
+        
         try:
-            if self.page:
-                self.page.close()
-            if self.context:
-                self.context.close()
-            if self.browser:
-                self.browser.close()
             if self.playwright:
                 self.playwright.stop()
         except Exception as e:
-            logger.error(f"关闭资源时出错: {str(e)}")
\ No newline at end of file
+            logger.error(f"关闭资源时出错: {str(e)}")
+    
+    def _close_browser(self):
+        """关闭页面、上下文和浏览器，浏览器已崩溃时忽略关闭错误"""
+        self.feed_sessions.close_all()
+        
+        try:
+            for account in self.accounts.accounts:
+                if account.page_pool:
+                    for page in account.page_pool.pages:
+                        self.resource_blocker.forget(page)
+                        page.close()
+                for context in account.contexts:
+                    context.close()
+                account.context = None
+                account.contexts = []
+        except Exception as e:
+            logger.error(f"关闭资源时出错: {str(e)}")
+        
+        # 页面关闭失败时仍然关闭浏览器，避免残留进程
+        try:
+            if self.browser:
+                self.browser.close()
+        except Exception as e:
+            logger.error(f"关闭浏览器时出错: {str(e)}")
+        
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.contexts = []
\ No newline at end of file
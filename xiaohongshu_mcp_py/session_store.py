@@ -0,0 +1,55 @@
+from loguru import logger
+import json
+import os
+import threading
+
+
+class SessionStore:
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        """初始化会话存储
+
+        参数:
+            path: 存储状态文件路径，默认读取 STORAGE_STATE_PATH，为空字符串时不持久化
+        """
+        self.path = os.environ.get('STORAGE_STATE_PATH', 'storage_state.json') if path is None else path
+
+    @property
+    def enabled(self):
+        """是否启用会话持久化"""
+        return bool(self.path)
+
+    def exists(self):
+        """是否存在已保存的会话"""
+        return self.enabled and os.path.isfile(self.path)
+
+    def context_kwargs(self):
+        """创建上下文时使用的参数，存在已保存的会话时从中恢复"""
+        if self.exists():
+            return {'storage_state': self.path}
+        return {}
+
+    def write(self, state):
+        """保存会话状态（cookies 与 localStorage），先写临时文件再替换，避免写入中断损坏文件
+
+        参数:
+            state: context.storage_state() 返回的字典
+        """
+        if not self.enabled or not state:
+            return False
+
+        with self._lock:
+            try:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.path)
+                logger.info(f"会话状态已保存: {self.path}，cookies: {len(state.get('cookies', []))}")
+                return True
+            except Exception as e:
+                logger.error(f"保存会话状态失败: {str(e)}")
+                return False
@@ -0,0 +1,74 @@
+import threading
+from xiaohongshu_mcp_py.executor import JobDeadlineExceededError
+
+
+class SingleFlightBase:
+    def __init__(self):
+        """初始化请求合并
+
+        相同键的请求同时进行时只执行一次，其余请求等待并共享结果。
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        # 统计数据
+        self._executed = 0
+        self._coalesced = 0
+
+    def stats(self):
+        """请求合并统计信息"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed_total": self._executed,
+                "coalesced_total": self._coalesced
+            }
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(SingleFlightBase):
+    def do(self, key, fn, timeout=None):
+        """执行 fn，同一个键已有进行中的调用时等待其结果
+
+        参数:
+            key: 调用的键，一般为接口名和规范化后的参数
+            fn: 无参数的函数
+            timeout: 等待其他请求的结果的最长秒数，一般为本请求的截止时间，超过时抛出 JobDeadlineExceededError
+
+        返回:
+            (结果, 是否共享了其他请求的结果)，fn 抛出的异常会传递给所有等待者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise JobDeadlineExceededError(f"等待合并的请求超过截止时间 ({timeout}s)")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
@@ -0,0 +1,57 @@
+import json
+
+NDJSON = 'ndjson'
+SSE = 'sse'
+
+MEDIA_TYPES = {
+    NDJSON: 'application/x-ndjson; charset=utf-8',
+    SSE: 'text/event-stream; charset=utf-8'
+}
+
+# 关闭代理缓冲，使每条笔记到达后立即发往客户端
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+# 单次流式抓取的数量上限和时间预算上限（秒）
+MAX_LIMIT = 1000
+MAX_TIME_BUDGET = 600
+
+
+def stream_format(fmt, accept=None):
+    """确定输出格式，format 参数优先，否则按 Accept 请求头判断"""
+    if fmt:
+        return SSE if fmt.lower() == SSE else NDJSON
+    return SSE if 'text/event-stream' in (accept or '').lower() else NDJSON
+
+
+def stream_params(limit, time_budget, dedup):
+    """规范化流式接口的查询参数
+
+    参数:
+        limit: 最多推送的笔记数，默认 100
+        time_budget: 时间预算（秒），默认 60
+        dedup: 为 store 时跳过本地笔记存储中已有的笔记
+
+    返回:
+        传给服务 stream_* 方法的关键字参数
+    """
+    return {
+        "limit": min(max(1, limit or 100), MAX_LIMIT),
+        "time_budget": min(max(1, time_budget or 60), MAX_TIME_BUDGET),
+        "skip_stored": (dedup or '').lower() == 'store'
+    }
+
+
+def format_event(event, data, fmt):
+    """将事件编码为一条输出
+
+    NDJSON 每行一个 JSON 对象，笔记直接输出卡片，结束和错误事件带 event 字段；
+    SSE 使用 event 和 data 字段，event 为 note / end / error。
+    """
+    if fmt == SSE:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event != 'note':
+        data = {"event": event, **data}
+    return json.dumps(data, ensure_ascii=False) + "\n"
@@ -0,0 +1,47 @@
+import re
+
+
+# 连续的中日韩文字，或连续的字母数字
+TOKEN_PATTERN = re.compile(
+    r'([぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+)|([0-9A-Za-zÀ-ɏ]+)'
+)
+
+
+def tokenize(text):
+    """将文本切分为索引词
+
+    中日韩文字没有空格分词，按相邻两字（二元组）切分，并在末尾补上最后一个字，
+    这样任意长度不少于两个字的词都能以连续二元组的短语匹配，单字可以用前缀匹配。
+    字母数字按单词切分并转为小写。
+
+    示例: "杭州旅行vlog" -> ["杭州", "州旅", "旅行", "行", "vlog"]
+    """
+    tokens = []
+    for cjk, word in TOKEN_PATTERN.findall(text or ''):
+        if word:
+            tokens.append(word.lower())
+            continue
+        tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        tokens.append(cjk[-1])
+    return tokens
+
+
+def index_text(text):
+    """生成写入 FTS5 的文本，索引词以空格分隔，由 unicode61 分词器按空格切分"""
+    return ' '.join(tokenize(text))
+
+
+def match_query(query):
+    """将搜索词转换为 FTS5 MATCH 表达式，多个词之间为"与"关系，没有可搜索的词时返回 None
+
+    示例: "杭州 旅行" -> '"杭州" "旅行"'，"川菜馆" -> '"川菜 菜馆"'，"猫" -> '"猫"*'
+    """
+    terms = []
+    for cjk, word in TOKEN_PATTERN.findall(query or ''):
+        if word:
+            terms.append(f'"{word.lower()}"*')
+        elif len(cjk) == 1:
+            terms.append(f'"{cjk}"*')
+        else:
+            terms.append('"' + ' '.join(cjk[i:i + 2] for i in range(len(cjk) - 1)) + '"')
+    return ' '.join(terms) or None
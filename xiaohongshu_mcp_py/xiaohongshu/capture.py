@@ -0,0 +1,211 @@
+from loguru import logger
+from urllib.parse import unquote_plus
+import json
+import re
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu.types import Feed, FeedResponse, SearchResult
+from xiaohongshu_mcp_py.xiaohongshu.initial_state import note_from_item
+from xiaohongshu_mcp_py.xiaohongshu.waits import max_wait_ms
+
+
+# 站点自身用于加载列表和笔记详情的接口
+FEED_API_PATTERN = re.compile(r'/api/sns/web/v1/homefeed')
+SEARCH_API_PATTERN = re.compile(r'/api/sns/web/v1/search/notes')
+NOTE_API_PATTERN = re.compile(r'/api/sns/web/v1/feed\b')
+
+SCROLL_SCRIPT = 'window.scrollTo(0, document.body.scrollHeight)'
+
+
+def camelize(data):
+    """将接口返回的下划线字段名递归转换为驼峰，与初始状态的结构保持一致"""
+    if isinstance(data, list):
+        return [camelize(item) for item in data]
+    if isinstance(data, dict):
+        return {_camel(key): camelize(value) for key, value in data.items()}
+    return data
+
+
+def _camel(key):
+    head, *rest = key.split('_')
+    return head + ''.join(part[:1].upper() + part[1:] for part in rest)
+
+
+def response_matches(response, url_pattern, match=None):
+    """响应是否来自 url_pattern 匹配的接口
+
+    match 不为空时还要求请求地址或请求体中包含 match（如搜索关键词、笔记ID），
+    用于排除切换页面前已经发出、尚未返回的同一接口的请求。
+    """
+    if not url_pattern.search(response.url):
+        return False
+    if not match:
+        return True
+    request = response.request
+    try:
+        body = request.post_data or ''
+    except Exception:
+        body = ''
+    text = f"{unquote_plus(request.url)}\n{body}"
+    # 请求体为 JSON 时非 ASCII 字符可能被转义
+    return match in text or json.dumps(match)[1:-1] in text
+
+
+def parse_payload(body):
+    """解析列表接口和笔记详情接口的响应体
+
+    返回:
+        (Note 列表, 是否还有更多, 下一页游标)
+    """
+    data = (body or {}).get('data') or {}
+    notes = []
+    for item in data.get('items') or []:
+        item = camelize(item)
+        # 只保留笔记卡片，跳过推荐搜索词等其他类型
+        if not item.get('noteCard'):
+            continue
+        note = note_from_item(item)
+        if note.note_id:
+            notes.append(note)
+
+    cursor = data.get('cursor_score') or data.get('cursor')
+    return notes, bool(data.get('has_more')), cursor or None
+
+
+class ResponseCaptureBase:
+    def __init__(self, page, url_pattern, limit=None, match=None):
+        """初始化接口响应捕获
+
+        参数:
+            page: 页面
+            url_pattern: 需要捕获的接口 URL 正则
+            limit: 收集到的笔记数量上限，达到后停止滚动
+            match: 请求地址或请求体中必须包含的内容，如搜索关键词，见 response_matches
+        """
+        self.page = page
+        self.url_pattern = url_pattern
+        self.limit = limit
+        self.match = match
+        self.notes = []
+        self.has_more = True
+        self.cursor = None
+        self.responses_total = 0
+        self._pending = []
+        self._seen = set()
+
+    @property
+    def full(self):
+        """是否已收集到足够的笔记"""
+        return self.limit is not None and len(self.notes) >= self.limit
+
+    def _matches(self, response):
+        return response_matches(response, self.url_pattern, self.match)
+
+    def _on_response(self, response):
+        # 事件回调中只记录响应，响应体在 drain 中读取
+        if self._matches(response):
+            self._pending.append(response)
+
+    def add_notes(self, notes):
+        """加入笔记并去重，返回新增的笔记"""
+        added = []
+        for note in notes:
+            if note.note_id in self._seen:
+                continue
+            self._seen.add(note.note_id)
+            self.notes.append(note)
+            added.append(note)
+        return added
+
+    def _add_body(self, body):
+        notes, has_more, cursor = parse_payload(body)
+        self.responses_total += 1
+        self.has_more = has_more
+        self.cursor = cursor or self.cursor
+        return self.add_notes(notes)
+
+    def feed_response(self, start=0, end=None):
+        """将已收集的笔记整理为 FeedResponse"""
+        notes = self.notes[start:end]
+        return FeedResponse(
+            feeds=[Feed(note=note, position=start + i) for i, note in enumerate(notes)],
+            total_count=len(notes),
+            has_more=self.has_more or len(self.notes) > start + len(notes),
+            next_cursor=self.cursor
+        )
+
+    def search_result(self, keyword, page=1, size=20):
+        """将已收集的笔记整理为 SearchResult"""
+        notes = self.notes[:size]
+        return SearchResult(
+            keyword=keyword,
+            results=notes,
+            total_count=len(notes),
+            page=page,
+            page_size=size
+        )
+
+
+class ResponseCapture(ResponseCaptureBase):
+    """监听页面的接口响应，直接收集列表数据
+
+    用法:
+        with ResponseCapture(page, FEED_API_PATTERN, limit=20) as capture:
+            page.goto(url)
+            for note in capture.iter_notes():
+                ...
+    """
+
+    def __enter__(self):
+        self.page.on('response', self._on_response)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.page.remove_listener('response', self._on_response)
+        return False
+
+    def drain(self):
+        """读取已捕获的响应体，返回新增的笔记"""
+        added = []
+        while self._pending:
+            response = self._pending.pop(0)
+            try:
+                added.extend(self._add_body(response.json()))
+            except Exception as e:
+                logger.debug(f"解析接口响应失败 {response.url}: {str(e)}")
+        return added
+
+    def wait_for_response(self, timeout=None):
+        """等待下一个匹配的接口响应，超时返回 False"""
+        if self._pending:
+            return True
+        try:
+            self.page.wait_for_event('response', predicate=self._matches, timeout=max_wait_ms() if timeout is None else timeout)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    def iter_notes(self, max_scrolls=20):
+        """边滚动边产出新到达的笔记，收集满、没有更多数据或滚动无新响应时结束"""
+        if not self.notes:
+            self.wait_for_response()
+
+        scrolls = 0
+        while True:
+            for note in self.drain():
+                yield note
+            if self.full or not self.has_more or scrolls >= max_scrolls:
+                return
+
+            self.page.evaluate(SCROLL_SCRIPT)
+            scrolls += 1
+            if not self.wait_for_response():
+                for note in self.drain():
+                    yield note
+                return
+
+    def collect(self, max_scrolls=20):
+        """收集笔记直到达到数量上限，返回全部已收集的笔记"""
+        for _ in self.iter_notes(max_scrolls):
+            if self.full:
+                break
+        return self.notes
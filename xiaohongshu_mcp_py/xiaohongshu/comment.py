@@ -1,14 +1,17 @@
 from loguru import logger
-import time
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu import waits
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.metrics import instrument
 
 
 class CommentAction:
-    def __init__(self, service):
+    def __init__(self, service, page=None):
         """初始化评论操作"""
         self.service = service
-        self.page = service.page
+        self.page = page or service.page
     
+    @instrument('post_comment')
     def post_comment(self, note_id, content):
         """发表评论到指定帖子
         
@@ -28,26 +31,27 @@ class CommentAction:
             logger.info(f"正在发表评论到笔记: {note_id}")
             
             # 导航到帖子详情页
-            self.page.goto(note_url)
-            time.sleep(3)
+            self.timer.stage('goto')
+            navigate.goto(self.page, note_url)
             
             # 等待页面加载完成
+            self.timer.stage('wait')
             self.page.wait_for_selector('.note-detail', timeout=10000)
+            waits.wait_for_dom_stable(self.page, '.note-detail')
             
             # 查找评论输入框
             try:
                 # 点击评论按钮或直接定位评论输入框
                 comment_button = self.page.wait_for_selector('.comment-button', timeout=5000)
                 comment_button.click()
-                time.sleep(1)
             except PlaywrightTimeoutError:
                 logger.info("未找到评论按钮，尝试直接查找评论输入框")
             
             # 定位评论输入框并输入内容
+            self.timer.stage('input')
             try:
                 comment_input = self.page.wait_for_selector('textarea[placeholder="添加评论..."]', timeout=5000)
                 comment_input.fill(content)
-                time.sleep(1)
                 
                 # 点击发送按钮
                 send_button = self.page.wait_for_selector('button:has-text("发送")', timeout=3000)
@@ -71,6 +75,7 @@ class CommentAction:
                 raise
             
         except Exception as e:
+            self.timer.fail(e)
             logger.error(f"发表评论失败: {str(e)}")
             return {
                 "success": False,
@@ -0,0 +1,195 @@
+from loguru import logger
+from xiaohongshu_mcp_py.xiaohongshu.types import Note, User, Interaction, Image, Tag
+
+
+# 笔记卡片字段定义: 字段名 -> (卡片内选择器, 读取的属性，None 表示读取 innerText, 默认值)
+# url 字段为必需字段，缺失时跳过该卡片
+FEED_CARD_FIELDS = {
+    "url": ('a', 'href', None),
+    "cover_url": ('img', 'src', ''),
+    "title": ('.title', None, ''),
+    "username": ('.user-avatar', 'alt', ''),
+    "likes": ('.likes-count', None, '0')
+}
+
+SEARCH_CARD_FIELDS = {
+    "url": ('a', 'href', None),
+    "cover_url": ('img', 'src', ''),
+    "title": ('.title', None, ''),
+    "username": ('.user-info .username', None, ''),
+    "likes": ('.likes', None, '0'),
+    "comments": ('.comments', None, '0')
+}
+
+NOTE_ITEM_SELECTOR = '.note-item'
+
+# 一次性读取 [start, end) 范围内所有卡片的字段
+CARDS_SCRIPT = """
+([itemSelector, fields, start, end]) => {
+    const items = Array.from(document.querySelectorAll(itemSelector));
+    return items.slice(start, end === null ? undefined : end).map(item => {
+        const card = {};
+        for (const [name, selector, attr] of fields) {
+            const el = item.querySelector(selector);
+            card[name] = el ? (attr ? el.getAttribute(attr) : el.innerText) : null;
+        }
+        return card;
+    });
+}
+"""
+
+
+def card_script_args(fields, start=0, end=None, item_selector=NOTE_ITEM_SELECTOR):
+    """构造 CARDS_SCRIPT 的参数"""
+    return [item_selector, [[name, selector, attr] for name, (selector, attr, _) in fields.items()], start, end]
+
+
+def extract_cards(page, fields, start=0, end=None, item_selector=NOTE_ITEM_SELECTOR):
+    """在一次 evaluate 调用中提取卡片数据
+
+    参数:
+        fields: 卡片字段定义，如 FEED_CARD_FIELDS
+        start: 起始卡片下标
+        end: 结束卡片下标（不包含），None 表示到末尾
+
+    返回:
+        卡片数据列表
+    """
+    raw_cards = page.evaluate(CARDS_SCRIPT, card_script_args(fields, start, end, item_selector))
+    return build_cards(raw_cards, fields)
+
+
+def build_cards(raw_cards, fields):
+    """将脚本返回的原始字段整理为卡片数据，缺少链接的卡片会被跳过"""
+    cards = []
+    for raw in raw_cards or []:
+        href = raw.get('url')
+        if not href:
+            continue
+
+        card = {"note_id": parse_note_id(href)}
+        for name, (_, _, default) in fields.items():
+            value = raw.get(name)
+            card[name] = default if value is None else value
+        cards.append(card)
+
+    if raw_cards and len(cards) < len(raw_cards):
+        logger.warning(f"{len(raw_cards) - len(cards)} 张卡片缺少笔记链接，已跳过")
+    return cards
+
+
+def parse_note_id(href):
+    """从URL中提取笔记ID"""
+    try:
+        # 假设URL格式为 /explore/6123456789abcdef
+        if href.startswith('/explore/'):
+            return href.split('/')[2].split('?')[0]
+        return href
+    except:
+        return href
+
+
+# 笔记详情字段定义: 字段名 -> (选择器, 读取的属性，None 表示读取 innerText)
+NOTE_DETAIL_FIELDS = {
+    "title": ('.note-title', None),
+    "content": ('.note-content', None),
+    "username": ('.username', None),
+    "avatar": ('.avatar', 'src'),
+    "likes": ('.likes-count', None),
+    "comments": ('.comments-count', None),
+    "collections": ('.collections-count', None),
+    "publish_time": ('.publish-time', None)
+}
+
+# 笔记详情中的列表字段: 字段名 -> (选择器, 读取的属性)
+NOTE_DETAIL_LIST_FIELDS = {
+    "images": ('.note-image', 'src'),
+    "tags": ('.tag', None)
+}
+
+# 一次性读取笔记详情的全部字段
+NOTE_DETAIL_SCRIPT = """
+([fields, listFields]) => {
+    const read = (el, attr) => el ? (attr ? el.getAttribute(attr) : el.innerText) : null;
+    const detail = {};
+    for (const [name, selector, attr] of fields) {
+        detail[name] = read(document.querySelector(selector), attr);
+    }
+    for (const [name, selector, attr] of listFields) {
+        detail[name] = Array.from(document.querySelectorAll(selector))
+            .map(el => read(el, attr))
+            .filter(value => value);
+    }
+    return detail;
+}
+"""
+
+
+def note_detail_script_args():
+    """构造 NOTE_DETAIL_SCRIPT 的参数"""
+    return [
+        [[name, selector, attr] for name, (selector, attr) in NOTE_DETAIL_FIELDS.items()],
+        [[name, selector, attr] for name, (selector, attr) in NOTE_DETAIL_LIST_FIELDS.items()]
+    ]
+
+
+def extract_note_detail(page, note_id=None, url=None):
+    """在一次 evaluate 调用中提取笔记详情
+
+    返回:
+        Note 模型
+    """
+    raw = page.evaluate(NOTE_DETAIL_SCRIPT, note_detail_script_args())
+    return build_note(raw, note_id, url)
+
+
+def build_note(raw, note_id=None, url=None):
+    """将脚本返回的原始字段整理为 Note 模型"""
+    raw = raw or {}
+    return Note(
+        note_id=note_id,
+        url=url,
+        title=raw.get('title') or '',
+        content=raw.get('content') or '',
+        user=User(
+            username=raw.get('username') or '',
+            avatar=raw.get('avatar') or ''
+        ),
+        images=[Image(url=src) for src in raw.get('images') or []],
+        tags=[Tag(name=name.strip().lstrip('#')) for name in raw.get('tags') or []],
+        interaction=Interaction(
+            likes=parse_count(raw.get('likes')),
+            comments=parse_count(raw.get('comments')),
+            collections=parse_count(raw.get('collections'))
+        ),
+        create_time=raw.get('publish_time') or ''
+    )
+
+
+def parse_count(text):
+    """将页面上的计数文本转换为整数，如 "1.2万" -> 12000，无法解析时返回 0"""
+    if text is None:
+        return 0
+    if isinstance(text, (int, float)):
+        return int(text)
+
+    text = str(text).strip().replace(',', '').rstrip('+')
+    multiplier = 1
+    if text.endswith('万') or text.lower().endswith('w'):
+        multiplier = 10000
+        text = text[:-1]
+    elif text.endswith('亿'):
+        multiplier = 100000000
+        text = text[:-1]
+
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return 0
+
+
+def to_dict(model):
+    """将 pydantic 模型转换为字典，兼容 pydantic v1/v2"""
+    if hasattr(model, 'model_dump'):
+        return model.model_dump()
+    return model.dict()
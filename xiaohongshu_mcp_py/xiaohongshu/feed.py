@@ -1,15 +1,26 @@
 from loguru import logger
 import time
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu import waits
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.xiaohongshu import extract
+from xiaohongshu_mcp_py.xiaohongshu import initial_state
+from xiaohongshu_mcp_py.xiaohongshu.capture import ResponseCapture, FEED_API_PATTERN, NOTE_API_PATTERN, parse_payload
+from xiaohongshu_mcp_py.xiaohongshu.harvest import iter_cards
+from xiaohongshu_mcp_py.xiaohongshu.extract import FEED_CARD_FIELDS, to_dict
+from xiaohongshu_mcp_py.metrics import instrument
 
 
 class FeedAction:
-    def __init__(self, service):
+    def __init__(self, service, page=None):
         """初始化Feed操作"""
         self.service = service
-        self.page = service.page
+        self.page = page or service.page
         self.feed_url = "https://www.xiaohongshu.com/explore"
+        # 从结构化数据中获取到的完整笔记模型，供本地笔记存储使用
+        self.notes = []
     
+    @instrument('get_feeds')
     def get_feeds(self, page=1, size=20):
         """获取推荐列表
         
@@ -23,32 +34,36 @@ class FeedAction:
         try:
             logger.info(f"正在获取推荐列表，第 {page} 页，每页 {size} 条")
             
-            # 导航到探索页
-            self.page.goto(self.feed_url)
-            time.sleep(3)
-            
-            # 等待feed内容加载
-            self.page.wait_for_selector('.note-item', timeout=10000)
-            
-            # 如果需要翻页，执行滚动操作
-            if page > 1:
-                self._scroll_to_page(page)
-            
-            # 提取feed数据
-            feeds = []
-            note_items = self.page.query_selector_all('.note-item')
-            
             start_idx = (page - 1) * size
             end_idx = start_idx + size
             
-            for item in note_items[start_idx:end_idx]:
-                try:
-                    feed_data = self._extract_feed_data(item)
-                    if feed_data:
-                        feeds.append(feed_data)
-                except Exception as e:
-                    logger.warning(f"提取推荐内容数据失败: {str(e)}")
-                    continue
+            feeds = None
+            if initial_state.enabled():
+                # 优先使用结构化数据，导航和滚动在其中完成
+                feeds = self._get_structured_feeds(start_idx, end_idx)
+            else:
+                # 导航到探索页
+                self.timer.stage('goto')
+                navigate.goto(self.page, self.feed_url)
+            
+            if feeds is None:
+                # 等待feed内容加载，并等待列表渲染稳定
+                self.timer.stage('wait')
+                self.page.wait_for_selector('.note-item', timeout=10000)
+                waits.wait_for_dom_stable(self.page, '.note-item')
+                
+                # 如果需要翻页，执行滚动操作
+                if page > 1:
+                    self._scroll_to_page(page)
+                
+                self.timer.stage('extract')
+                if initial_state.enabled():
+                    state = initial_state.read_page(self.page)
+                    feeds = initial_state.feed_cards(state, 'feed', FEED_CARD_FIELDS, start_idx, end_idx)
+            
+            if feeds is None:
+                # 初始状态不可用时，回退到一次性提取DOM中的feed数据
+                feeds = extract.extract_cards(self.page, FEED_CARD_FIELDS, start_idx, end_idx)
             
             return {
                 "page": page,
@@ -57,7 +72,8 @@ class FeedAction:
                 "total_count": len(feeds)
             }
             
-        except PlaywrightTimeoutError:
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
             logger.error("推荐内容未找到或超时")
             return {
                 "page": page,
@@ -67,6 +83,7 @@ class FeedAction:
                 "error": "推荐内容加载超时"
             }
         except Exception as e:
+            self.timer.fail(e)
             logger.error(f"获取推荐列表失败: {str(e)}")
             return {
                 "page": page,
@@ -76,6 +93,116 @@ class FeedAction:
                 "error": str(e)
             }
     
+    @instrument('stream_feeds')
+    def iter_feeds(self, harvest):
+        """打开探索页，边滚动边产出 (卡片, Note 模型)，用于流式接口
+        
+        参数:
+            harvest: Harvest，控制数量上限、时间预算和去重
+        """
+        logger.info(f"正在流式获取推荐列表，上限 {harvest.limit} 条")
+        try:
+            yield from iter_cards(self.page, self.feed_url, FEED_API_PATTERN, 'feed', FEED_CARD_FIELDS, harvest, self.timer)
+        except Exception as e:
+            self.timer.fail(e)
+            raise
+    
+    @instrument('get_feeds_by_cursor')
+    def get_feeds_by_cursor(self, session, offset=0, size=20):
+        """在会话页面上按游标获取推荐列表
+        
+        会话页面保持在上次停下的滚动位置，已收集的笔记按 note_id 去重保存在会话中，
+        只有已收集的数量不足时才继续向下滚动，因此每一页的开销与第一页相同。
+        
+        参数:
+            session: FeedSession
+            offset: 已返回的条数
+            size: 每页数量
+        
+        返回:
+            推荐内容列表，has_more 表示是否还有下一页
+        """
+        try:
+            end = offset + size
+            if not session.started:
+                logger.info(f"游标会话 {session.id} 导航到探索页")
+                self.timer.stage('goto')
+                response = navigate.goto(self.page, self.feed_url)
+                session.started = True
+                self.timer.stage('extract')
+                if initial_state.enabled():
+                    session.capture.add_notes(initial_state.feed_notes(initial_state.read_response(response), 'feed'))
+                    session.sync_capture()
+            
+            if len(session.items) < end and session.has_more and not session.full:
+                self.timer.stage('wait')
+                self._fill_session(session, end)
+            
+            self.timer.stage('serialize')
+            feeds = session.items[offset:end]
+            note_ids = {card["note_id"] for card in feeds}
+            self.notes = [note for note in session.notes if note.note_id in note_ids]
+            return {
+                "offset": offset,
+                "size": size,
+                "feeds": feeds,
+                "total_count": len(feeds),
+                "has_more": len(session.items) > end or (session.has_more and not session.full)
+            }
+            
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
+            logger.error("推荐内容未找到或超时")
+            return {
+                "offset": offset,
+                "size": size,
+                "feeds": [],
+                "total_count": 0,
+                "has_more": session.has_more,
+                "error": "推荐内容加载超时"
+            }
+        except Exception as e:
+            self.timer.fail(e)
+            logger.error(f"获取推荐列表失败: {str(e)}")
+            return {
+                "offset": offset,
+                "size": size,
+                "feeds": [],
+                "total_count": 0,
+                "has_more": session.has_more,
+                "error": str(e)
+            }
+    
+    def _fill_session(self, session, end, max_scrolls=20):
+        """从当前滚动位置继续向下，直到会话中收集到 end 条"""
+        if initial_state.enabled():
+            capture = session.capture
+            capture.limit = len(capture.notes) + (end - len(session.items))
+            capture.collect(max_scrolls)
+            session.sync_capture()
+            if len(session.items) >= end:
+                return
+            if capture.responses_total and not capture.has_more:
+                session.has_more = False
+                return
+        
+        # 接口数据不可用时，从页面元素中提取，按 note_id 去重后继续滚动
+        self.page.wait_for_selector('.note-item', timeout=10000)
+        for _ in range(max_scrolls):
+            session.add_cards(extract.extract_cards(self.page, FEED_CARD_FIELDS))
+            if len(session.items) >= end or session.full:
+                return
+            
+            count = self.page.evaluate("document.querySelectorAll('.note-item').length")
+            self.page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+            if not waits.wait_for_count_increase(self.page, '.note-item', count):
+                waits.wait_for_dom_stable(self.page, '.note-item')
+                if not session.add_cards(extract.extract_cards(self.page, FEED_CARD_FIELDS)):
+                    logger.info("滚动后没有加载出新内容，停止滚动")
+                    session.has_more = False
+                    return
+    
+    @instrument('get_note_detail')
     def get_note_detail(self, note_id):
         """获取帖子详情
         
@@ -93,22 +220,49 @@ class FeedAction:
             note_url = f"https://www.xiaohongshu.com/explore/{note_id}"
             logger.info(f"正在获取笔记详情，ID: {note_id}")
             
-            # 导航到帖子详情页
-            self.page.goto(note_url)
-            time.sleep(3)
+            # 优先从服务端渲染的初始状态中提取，无需等待页面渲染
+            if initial_state.enabled():
+                # 页面已预热时使用站内导航，直接读取详情接口的响应
+                self.timer.stage('goto')
+                response, soft = navigate.soft_goto(self.page, note_url, NOTE_API_PATTERN, match=note_id)
+                self.timer.stage('extract')
+                start = time.perf_counter()
+                if soft:
+                    note = self._note_from_api(response, note_id)
+                else:
+                    note = initial_state.note_detail(initial_state.read_response(response), note_id)
+                self.timer.stage('serialize')
+                if note:
+                    note.url = note_url
+                    extract_ms = round((time.perf_counter() - start) * 1000, 2)
+                    logger.info(f"笔记详情从{'详情接口' if soft else '初始状态'}提取，耗时: {extract_ms}ms，ID: {note_id}")
+                    return {
+                        "note_id": note_id,
+                        "detail": to_dict(note),
+                        "extract_ms": extract_ms
+                    }
+            else:
+                # 导航到帖子详情页
+                self.timer.stage('goto')
+                navigate.goto(self.page, note_url)
             
             # 等待页面加载完成
+            self.timer.stage('wait')
             self.page.wait_for_selector('.note-detail', timeout=10000)
+            waits.wait_for_dom_stable(self.page, '.note-detail')
             
-            # 提取帖子详细信息
-            detail = self._extract_note_detail()
+            # 一次性提取帖子详细信息
+            self.timer.stage('extract')
+            detail, extract_ms = self._extract_note_detail(note_id, note_url)
             
             return {
                 "note_id": note_id,
-                "detail": detail
+                "detail": detail,
+                "extract_ms": extract_ms
             }
             
-        except PlaywrightTimeoutError:
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
             logger.error(f"笔记详情未找到或超时，ID: {note_id}")
             return {
                 "note_id": note_id,
@@ -116,6 +270,7 @@ class FeedAction:
                 "error": "帖子详情加载超时"
             }
         except Exception as e:
+            self.timer.fail(e)
             logger.error(f"获取笔记详情失败: {str(e)}")
             return {
                 "note_id": note_id,
@@ -123,118 +278,70 @@ class FeedAction:
                 "error": str(e)
             }
     
+    def _note_from_api(self, response, note_id):
+        """从笔记详情接口的响应中提取笔记，没有数据时返回 None"""
+        try:
+            notes, _, _ = parse_payload(response.json())
+        except Exception as e:
+            self.timer.extraction_failed()
+            logger.debug(f"解析笔记详情接口响应失败: {str(e)}")
+            return None
+        return next((note for note in notes if note.note_id == note_id), None)
+    
+    def _get_structured_feeds(self, start_idx, end_idx):
+        """从结构化数据中获取推荐列表
+
+        首屏数据来自导航响应中的初始状态，后续数据来自滚动时站点接口返回的JSON，
+        收集到 end_idx 条后立即停止滚动。
+
+        返回:
+            卡片数据列表，结构化数据不足时返回 None
+        """
+        with ResponseCapture(self.page, FEED_API_PATTERN, limit=end_idx) as capture:
+            # 导航到探索页
+            self.timer.stage('goto')
+            response = navigate.goto(self.page, self.feed_url)
+            self.timer.stage('extract')
+            capture.add_notes(initial_state.feed_notes(initial_state.read_response(response), 'feed'))
+            capture.collect()
+        
+        if len(capture.notes) <= start_idx:
+            return None
+        
+        logger.info(f"从结构化数据获取推荐列表，已收集 {len(capture.notes)} 条，接口响应 {capture.responses_total} 个")
+        self.timer.stage('serialize')
+        result = capture.feed_response(start_idx, end_idx)
+        self.notes = [feed.note for feed in result.feeds]
+        return [initial_state.note_to_card(feed.note, FEED_CARD_FIELDS) for feed in result.feeds]
+    
     def _scroll_to_page(self, page):
         """滚动到指定页码位置"""
         try:
-            # 简单实现，每次滚动一定距离
-            # 实际实现需要根据具体的加载机制调整
+            # 每次滚动到底部，等待新内容加载出来后再继续
             for _ in range(page - 1):
+                count = self.page.evaluate("document.querySelectorAll('.note-item').length")
                 self.page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                time.sleep(2)  # 等待内容加载
+                if not waits.wait_for_count_increase(self.page, '.note-item', count):
+                    logger.info("滚动后没有加载出新内容，停止滚动")
+                    break
         except Exception as e:
             logger.warning(f"滚动失败: {str(e)}")
     
-    def _extract_feed_data(self, feed_item):
-        """从feed元素中提取数据"""
-        try:
-            # 提取笔记ID和URL
-            note_link = feed_item.query_selector('a')
-            if not note_link:
-                return None
-            
-            href = note_link.get_attribute('href')
-            note_id = self._extract_note_id(href)
-            
-            # 提取封面图
-            cover_img = feed_item.query_selector('img')
-            cover_url = cover_img.get_attribute('src') if cover_img else ''
-            
-            # 提取标题
-            title_element = feed_item.query_selector('.title')
-            title = title_element.inner_text() if title_element else ''
-            
-            # 提取用户信息
-            user_element = feed_item.query_selector('.user-avatar')
-            if user_element:
-                username = user_element.get_attribute('alt') or ''
-            else:
-                username = ''
-            
-            # 提取互动数据
-            likes_element = feed_item.query_selector('.likes-count')
-            likes = likes_element.inner_text() if likes_element else '0'
-            
-            return {
-                "note_id": note_id,
-                "title": title,
-                "cover_url": cover_url,
-                "username": username,
-                "likes": likes,
-                "url": href
-            }
-            
-        except Exception as e:
-            logger.warning(f"提取推荐内容数据失败: {str(e)}")
-            return None
-    
-    def _extract_note_detail(self):
-        """提取帖子详细信息"""
+    def _extract_note_detail(self, note_id, note_url):
+        """提取帖子详细信息
+
+        返回:
+            (Note 模型字典, 提取耗时毫秒)
+        """
+        start = time.perf_counter()
         try:
-            # 提取标题
-            title_element = self.page.query_selector('.note-title')
-            title = title_element.inner_text() if title_element else ''
-            
-            # 提取内容
-            content_element = self.page.query_selector('.note-content')
-            content = content_element.inner_text() if content_element else ''
-            
-            # 提取图片列表
-            images = []
-            image_elements = self.page.query_selector_all('.note-image')
-            for img in image_elements:
-                img_url = img.get_attribute('src')
-                if img_url:
-                    images.append(img_url)
-            
-            # 提取用户信息
-            user_info = {
-                "username": self.page.query_selector('.username').inner_text() if self.page.query_selector('.username') else '',
-                "avatar": self.page.query_selector('.avatar').get_attribute('src') if self.page.query_selector('.avatar') else ''
-            }
-            
-            # 提取互动数据
-            interactions = {
-                "likes": self.page.query_selector('.likes-count').inner_text() if self.page.query_selector('.likes-count') else '0',
-                "comments": self.page.query_selector('.comments-count').inner_text() if self.page.query_selector('.comments-count') else '0',
-                "collections": self.page.query_selector('.collections-count').inner_text() if self.page.query_selector('.collections-count') else '0'
-            }
-            
-            # 提取标签
-            tags = []
-            tag_elements = self.page.query_selector_all('.tag')
-            for tag in tag_elements:
-                tags.append(tag.inner_text())
-            
-            return {
-                "title": title,
-                "content": content,
-                "images": images,
-                "user": user_info,
-                "interactions": interactions,
-                "tags": tags,
-                "publish_time": self.page.query_selector('.publish-time').inner_text() if self.page.query_selector('.publish-time') else ''
-            }
-            
+            note = extract.extract_note_detail(self.page, note_id, note_url)
+            detail = to_dict(note)
         except Exception as e:
+            self.timer.extraction_failed()
             logger.warning(f"提取笔记详情数据失败: {str(e)}")
-            return {}
-    
-    def _extract_note_id(self, href):
-        """从URL中提取笔记ID"""
-        try:
-            # 假设URL格式为 /explore/6123456789abcdef
-            if href.startswith('/explore/'):
-                return href.split('/')[2]
-            return href
-        except:
-            return href
\ No newline at end of file
+            detail = {}
+        
+        extract_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"笔记详情提取耗时: {extract_ms}ms，ID: {note_id}")
+        return detail, extract_ms
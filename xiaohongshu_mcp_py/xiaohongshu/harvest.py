@@ -0,0 +1,118 @@
+from loguru import logger
+import time
+from xiaohongshu_mcp_py.xiaohongshu import waits
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.xiaohongshu import extract
+from xiaohongshu_mcp_py.xiaohongshu import initial_state
+from xiaohongshu_mcp_py.xiaohongshu.capture import ResponseCapture, SCROLL_SCRIPT
+from xiaohongshu_mcp_py.xiaohongshu.extract import NOTE_ITEM_SELECTOR
+
+# 流式抓取时的最大滚动次数，实际由数量上限和时间预算先行截止
+MAX_SCROLLS = 200
+
+COUNT_SCRIPT = f"document.querySelectorAll('{NOTE_ITEM_SELECTOR}').length"
+
+
+class Harvest:
+    def __init__(self, limit=None, time_budget=None, skip=None):
+        """流式抓取的截止条件和去重状态
+
+        参数:
+            limit: 最多产出的笔记数
+            time_budget: 时间预算（秒）
+            skip: 判断是否跳过某个 note_id 的函数，如跳过本地已保存的笔记
+        """
+        self.limit = limit
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        self.skip = skip
+        self.count = 0
+        self.skipped = 0
+        self._seen = set()
+
+    @property
+    def seen(self):
+        """已见过的笔记数，包括跳过的笔记"""
+        return len(self._seen)
+
+    @property
+    def done(self):
+        """是否已达到数量上限或用完时间预算"""
+        if self.limit is not None and self.count >= self.limit:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def accept(self, note_id):
+        """判断笔记是否需要产出，按 note_id 去重"""
+        if not note_id or note_id in self._seen:
+            return False
+        self._seen.add(note_id)
+        if self.skip and self.skip(note_id):
+            self.skipped += 1
+            return False
+        self.count += 1
+        return True
+
+
+def iter_cards(page, url, url_pattern, branch, fields, harvest, timer):
+    """打开列表页并边滚动边产出 (卡片, Note 模型)
+
+    优先使用初始状态和接口响应中的结构化数据，不可用时从页面元素中提取，
+    此时 Note 模型为 None。达到 harvest 的数量上限或时间预算时结束。
+
+    参数:
+        url: 列表页地址
+        url_pattern: 列表接口 URL 正则
+        branch: 初始状态分支，'feed' 或 'search'
+        fields: 卡片字段定义
+        harvest: Harvest
+        timer: 记录各阶段耗时的 StageTimer，滚动等待新内容计入 scroll 阶段
+    """
+    if initial_state.enabled():
+        with ResponseCapture(page, url_pattern) as capture:
+            timer.stage('goto')
+            response = navigate.goto(page, url)
+            timer.stage('extract')
+            initial = capture.add_notes(initial_state.feed_notes(initial_state.read_response(response), branch))
+            for note in initial:
+                if harvest.accept(note.note_id):
+                    yield initial_state.note_to_card(note, fields), note
+                if harvest.done:
+                    return
+
+            timer.stage('scroll')
+            for note in capture.iter_notes(MAX_SCROLLS):
+                if harvest.accept(note.note_id):
+                    yield initial_state.note_to_card(note, fields), note
+                if harvest.done:
+                    return
+
+            if capture.notes:
+                return
+        logger.info("未获取到结构化数据，改为从页面元素中提取")
+    else:
+        timer.stage('goto')
+        navigate.goto(page, url)
+
+    timer.stage('wait')
+    page.wait_for_selector(NOTE_ITEM_SELECTOR, timeout=10000)
+    idle = 0
+    for _ in range(MAX_SCROLLS):
+        seen = harvest.seen
+        timer.stage('extract')
+        for card in extract.extract_cards(page, fields):
+            if harvest.accept(card["note_id"]):
+                yield card, None
+            if harvest.done:
+                return
+
+        # 虚拟列表中元素数量可能不变，以是否出现新笔记判断，连续两次没有新笔记时结束
+        idle = 0 if harvest.seen > seen else idle + 1
+        if idle >= 2:
+            logger.info("滚动后没有加载出新内容，停止抓取")
+            return
+
+        timer.stage('scroll')
+        count = page.evaluate(COUNT_SCRIPT)
+        page.evaluate(SCROLL_SCRIPT)
+        if not waits.wait_for_count_increase(page, NOTE_ITEM_SELECTOR, count):
+            waits.wait_for_dom_stable(page, NOTE_ITEM_SELECTOR)
@@ -0,0 +1,207 @@
+from loguru import logger
+from datetime import datetime
+import json
+import os
+import re
+from xiaohongshu_mcp_py.xiaohongshu.types import Note, User, Interaction, Image, Tag
+from xiaohongshu_mcp_py.xiaohongshu.extract import parse_count
+
+
+# 读取页面中的 window.__INITIAL_STATE__，只保留用到的分支，并展开 Vue 的 ref 包装
+INITIAL_STATE_SCRIPT = """
+() => {
+    const state = window.__INITIAL_STATE__;
+    if (!state) return null;
+    const unwrap = value => {
+        if (value && typeof value === 'object') {
+            if ('_rawValue' in value) return value._rawValue;
+            if ('_value' in value) return value._value;
+        }
+        return value;
+    };
+    const seen = new WeakSet();
+    try {
+        return JSON.parse(JSON.stringify({feed: state.feed, search: state.search, note: state.note}, (key, value) => {
+            value = unwrap(value);
+            if (value && typeof value === 'object') {
+                if (seen.has(value)) return undefined;
+                seen.add(value);
+            }
+            return value;
+        }));
+    } catch (e) {
+        return null;
+    }
+}
+"""
+
+STATE_PATTERN = re.compile(r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*</script>', re.S)
+UNDEFINED_PATTERN = re.compile(r'(?<=[:\[,])undefined(?=[,\]}])')
+
+
+def enabled():
+    """是否优先使用初始状态提取，由 EXTRACT_MODE 配置: auto（默认）/ dom"""
+    return os.environ.get('EXTRACT_MODE', 'auto').lower() != 'dom'
+
+
+def parse_html(html):
+    """从服务端渲染的 HTML 中解析初始状态，未找到或解析失败返回 None"""
+    if not html:
+        return None
+
+    match = STATE_PATTERN.search(html)
+    if not match:
+        return None
+
+    try:
+        return json.loads(UNDEFINED_PATTERN.sub('null', match.group(1)))
+    except ValueError as e:
+        logger.debug(f"解析初始状态失败: {str(e)}")
+        return None
+
+
+def read_response(response):
+    """从导航响应的 HTML 中读取初始状态，无需等待页面渲染"""
+    try:
+        if response is None or not response.ok:
+            return None
+        return parse_html(response.text())
+    except Exception as e:
+        logger.debug(f"读取导航响应失败: {str(e)}")
+        return None
+
+
+def read_page(page):
+    """通过 evaluate 读取当前页面的初始状态"""
+    try:
+        return page.evaluate(INITIAL_STATE_SCRIPT)
+    except Exception as e:
+        logger.debug(f"读取页面初始状态失败: {str(e)}")
+        return None
+
+
+def feed_notes(state, branch):
+    """从初始状态的 feed/search 分支中提取笔记列表
+
+    参数:
+        state: 初始状态
+        branch: 'feed' 或 'search'
+    """
+    items = _get(state, branch, 'feeds')
+    if not isinstance(items, list):
+        return []
+
+    notes = []
+    for item in items:
+        note = note_from_item(item)
+        if note.note_id:
+            notes.append(note)
+    return notes
+
+
+def feed_cards(state, branch, fields, start=0, end=None):
+    """从初始状态的 feed/search 分支中提取卡片数据
+
+    参数:
+        fields: 卡片字段定义，返回的卡片只包含其中的字段
+
+    返回:
+        卡片数据列表，初始状态中没有数据时返回 None
+    """
+    notes = feed_notes(state, branch)[start:end]
+    return [note_to_card(note, fields) for note in notes] or None
+
+
+def note_detail(state, note_id):
+    """从初始状态的 note 分支中提取笔记详情，没有数据时返回 None"""
+    detail_map = _get(state, 'note', 'noteDetailMap')
+    if not isinstance(detail_map, dict):
+        return None
+
+    entry = detail_map.get(note_id)
+    if entry is None and len(detail_map) == 1:
+        entry = next(iter(detail_map.values()))
+    note = _get(entry, 'note')
+    if not note:
+        return None
+    return note_from_item(note)
+
+
+def note_from_item(item):
+    """将初始状态中的笔记数据映射为 Note 模型，兼容列表卡片（noteCard）和详情两种结构"""
+    data = item.get('noteCard') or item
+    note_id = item.get('id') or data.get('noteId') or data.get('id')
+
+    user = data.get('user') or {}
+    interact = data.get('interactInfo') or {}
+
+    image_list = data.get('imageList') or []
+    if not image_list and data.get('cover'):
+        image_list = [data['cover']]
+
+    return Note(
+        note_id=note_id,
+        url=f"/explore/{note_id}" if note_id else None,
+        title=data.get('title') or data.get('displayTitle') or '',
+        content=data.get('desc') or '',
+        user=User(
+            user_id=user.get('userId'),
+            username=user.get('nickname') or user.get('nickName') or '',
+            avatar=user.get('avatar') or ''
+        ),
+        images=[
+            Image(
+                url=image.get('urlDefault') or image.get('url') or '',
+                width=image.get('width') or 0,
+                height=image.get('height') or 0
+            )
+            for image in image_list
+        ],
+        tags=[
+            Tag(tag_id=tag.get('id'), name=tag.get('name'), type=1 if tag.get('type') == 'topic' else 0)
+            for tag in data.get('tagList') or []
+        ],
+        interaction=Interaction(
+            likes=parse_count(interact.get('likedCount')),
+            comments=parse_count(interact.get('commentCount')),
+            collections=parse_count(interact.get('collectedCount')),
+            share_count=parse_count(interact.get('shareCount'))
+        ),
+        create_time=_format_time(data.get('time')),
+        update_time=_format_time(data.get('lastUpdateTime'))
+    )
+
+
+def note_to_card(note, fields):
+    """将 Note 模型转换为与 DOM 提取结果相同结构的卡片"""
+    values = {
+        "url": note.url,
+        "cover_url": note.images[0].url if note.images else '',
+        "title": note.title or '',
+        "username": note.user.username if note.user else '',
+        "likes": str(note.interaction.likes or 0) if note.interaction else '0',
+        "comments": str(note.interaction.comments or 0) if note.interaction else '0'
+    }
+    card = {"note_id": note.note_id}
+    for name, (_, _, default) in fields.items():
+        card[name] = values.get(name, default)
+    return card
+
+
+def _format_time(timestamp):
+    """毫秒时间戳转换为时间字符串"""
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromtimestamp(int(timestamp) / 1000).strftime('%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def _get(data, *keys):
+    """按路径读取嵌套字典，路径不存在时返回 None"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
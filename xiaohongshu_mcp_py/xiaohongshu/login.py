@@ -1,48 +1,56 @@
 from loguru import logger
 import time
+from xiaohongshu_mcp_py.xiaohongshu import waits
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.metrics import instrument
 
 
 class LoginAction:
-    def __init__(self, service):
+    def __init__(self, service, page=None):
         """初始化登录操作"""
         self.service = service
-        self.page = service.page
+        self.page = page or service.page
         self.login_url = "https://www.xiaohongshu.com/explore"
+        self.login_button_selector = 'button:has-text("登录")'
+        self.avatar_selector = '.avatar'
+        self.status_selectors = [self.login_button_selector, self.avatar_selector]
     
+    @instrument('check_login_status')
     def check_login_status(self):
         """检查登录状态"""
         try:
             # 导航到主页
-            self.page.goto(self.login_url)
-            time.sleep(2)
+            self.timer.stage('goto')
+            navigate.goto(self.page, self.login_url)
             
-            # 检查是否存在登录按钮或用户头像来判断登录状态
-            try:
-                # 尝试查找登录按钮
-                self.page.wait_for_selector('button:has-text("登录")', timeout=2000)
+            # 等待登录按钮或用户头像出现，页头稳定后再判断，登录按钮优先
+            self.timer.stage('wait')
+            matched = waits.wait_for_any_selector(self.page, self.status_selectors, timeout=6000)
+            if matched:
+                waits.wait_for_dom_stable(self.page, timeout=1000)
+                matched = waits.wait_for_any_selector(self.page, self.status_selectors, timeout=1000)
+            
+            if matched == self.login_button_selector:
                 logger.info("未登录")
                 return {
                     "is_logged_in": False,
                     "message": "未登录"
                 }
-            except:
-                # 检查是否存在用户头像或登录后的元素
-                try:
-                    # 尝试查找用户头像
-                    self.page.wait_for_selector('.avatar', timeout=2000)
-                    logger.info("已登录")
-                    return {
-                        "is_logged_in": True,
-                        "message": "已登录"
-                    }
-                except:
-                    # 超时或其他情况，默认返回未登录
-                    logger.warning("无法确定登录状态")
-                    return {
-                        "is_logged_in": False,
-                        "message": "无法确定登录状态"
-                    }
+            if matched == self.avatar_selector:
+                logger.info("已登录")
+                return {
+                    "is_logged_in": True,
+                    "message": "已登录"
+                }
+            
+            # 超时或其他情况，默认返回未登录
+            logger.warning("无法确定登录状态")
+            return {
+                "is_logged_in": False,
+                "message": "无法确定登录状态"
+            }
         except Exception as e:
+            self.timer.fail(e)
             logger.error(f"检查登录状态失败: {str(e)}")
             return {
                 "is_logged_in": False,
@@ -53,16 +61,22 @@ class LoginAction:
         """手动登录 - 打开浏览器让用户手动登录"""
         try:
             # 打开登录页面
-            self.page.goto(self.login_url)
+            navigate.goto(self.page, self.login_url)
             logger.info("请在浏览器窗口中手动登录")
             
             # 等待用户登录完成
             # 这里会一直等待直到用户手动登录或超时
             # 实际实现中可能需要根据实际情况调整等待逻辑
             while True:
+                # 会话 Cookie 出现前无需打开页面检查
+                if not self.service._session_cookie():
+                    time.sleep(5)
+                    continue
+                
                 login_status = self.check_login_status()
                 if login_status["is_logged_in"]:
                     logger.info("登录成功")
+                    self.service.save_storage_state()
                     return True
                 
                 # 每5秒检查一次
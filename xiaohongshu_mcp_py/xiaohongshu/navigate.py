@@ -0,0 +1,149 @@
+from loguru import logger
+import os
+import time
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.pacing import NavigationPacer, SUCCESS, FAILURE, CAPTCHA, RETRYABLE_STATUS, is_captcha, is_transient
+from xiaohongshu_mcp_py.login_cache import SITE_URL
+from xiaohongshu_mcp_py.xiaohongshu.capture import response_matches
+from xiaohongshu_mcp_py.xiaohongshu.waits import max_wait_ms
+
+# 预热页面停留的地址
+PREWARM_URL = f"{SITE_URL}/explore"
+
+# 站内导航: 优先使用站点的 Vue Router，否则修改地址后触发 popstate，由前端路由加载新页面
+SOFT_NAVIGATE_SCRIPT = """
+(path) => {
+    const root = document.querySelector('#app');
+    const app = root && root.__vue_app__;
+    const router = app && app.config.globalProperties.$router;
+    if (router) {
+        router.push(path);
+        return 'router';
+    }
+    history.pushState(null, '', path);
+    window.dispatchEvent(new PopStateEvent('popstate', {state: null}));
+    return 'history';
+}
+"""
+
+
+def prewarm_enabled():
+    """是否预热页面并优先使用站内导航，由 PAGE_PREWARM 配置"""
+    return os.environ.get('PAGE_PREWARM', 'true').lower() == 'true'
+
+
+def is_warm(page):
+    """页面是否已停留在站点上，前端应用已经启动"""
+    return page.url.startswith(SITE_URL)
+
+
+def goto(page, url, pacer=None, **kwargs):
+    """限速导航，超时、临时网络错误和临时状态码按指数退避重试
+
+    参数:
+        url: 目标地址
+        pacer: NavigationPacer，默认使用进程内共用的实例
+        kwargs: 传给 page.goto 的参数
+
+    返回:
+        最后一次导航的响应，重试用尽时抛出最后一次的异常
+    """
+    pacer = pacer or NavigationPacer.shared()
+    attempt = 0
+    while True:
+        wait = pacer.reserve()
+        if wait:
+            time.sleep(wait)
+
+        try:
+            response = page.goto(url, **kwargs)
+        except PlaywrightError as e:
+            if not isinstance(e, PlaywrightTimeoutError) and not is_transient(e):
+                raise
+            pacer.record(FAILURE)
+            if attempt >= pacer.retries:
+                raise
+            reason = str(e).splitlines()[0]
+        else:
+            if is_captcha(response):
+                logger.warning(f"导航遇到验证页面: {url}")
+                pacer.record(CAPTCHA)
+                return response
+            if response is None or response.status not in RETRYABLE_STATUS:
+                pacer.record(SUCCESS)
+                return response
+            pacer.record(FAILURE)
+            if attempt >= pacer.retries:
+                return response
+            reason = f"状态码 {response.status}"
+
+        delay = pacer.backoff_delay(attempt)
+        attempt += 1
+        pacer.record_retry()
+        logger.warning(f"导航失败（{reason}），{delay:.1f}s 后第 {attempt} 次重试: {url}")
+        time.sleep(delay)
+
+
+def prewarm(page, pacer=None):
+    """页面不在站点上时打开探索页，加载并缓存前端脚本，之后的请求可以使用站内导航
+
+    返回:
+        页面是否已预热
+    """
+    if not prewarm_enabled():
+        return False
+    if is_warm(page):
+        return True
+    try:
+        goto(page, PREWARM_URL, pacer)
+        return is_warm(page)
+    except Exception as e:
+        logger.warning(f"预热页面失败: {str(e)}")
+        return False
+
+
+def soft_goto(page, url, api_pattern, pacer=None, match=None, **kwargs):
+    """页面已预热时通过站内导航打开 url，不重新加载页面和前端脚本
+
+    站内导航以站点接口返回数据为成功，接口未在就绪等待上限内返回、返回错误或页面未预热时，
+    改为完整导航。接口返回验证页面时直接返回该响应，与 goto 相同，完整导航同样会遇到验证页面。
+
+    参数:
+        url: 站点内的目标地址
+        api_pattern: 目标页面加载数据时请求的接口 URL 正则
+        pacer: NavigationPacer，默认使用进程内共用的实例
+        match: 接口请求中必须包含的内容，如搜索关键词、笔记ID，避免把上一个页面未返回的请求当作目标页面的响应
+        kwargs: 完整导航时传给 page.goto 的参数
+
+    返回:
+        (响应, 是否为站内导航)，站内导航时响应为目标页面请求的接口响应，否则为完整导航的响应
+    """
+    pacer = pacer or NavigationPacer.shared()
+    if not prewarm_enabled() or not url.startswith(SITE_URL) or not is_warm(page):
+        return goto(page, url, pacer, **kwargs), False
+
+    wait = pacer.reserve()
+    if wait:
+        time.sleep(wait)
+
+    try:
+        with page.expect_response(lambda response: response_matches(response, api_pattern, match), timeout=max_wait_ms()) as info:
+            page.evaluate(SOFT_NAVIGATE_SCRIPT, url[len(SITE_URL):])
+        response = info.value
+    except PlaywrightError as e:
+        logger.debug(f"站内导航未完成，改为完整导航: {str(e).splitlines()[0]}")
+        pacer.record_soft(False)
+        return goto(page, url, pacer, **kwargs), False
+
+    if is_captcha(response):
+        logger.warning(f"站内导航遇到验证页面: {url}")
+        pacer.record(CAPTCHA)
+        pacer.record_soft(True)
+        return response, True
+    if response.ok:
+        pacer.record(SUCCESS)
+        pacer.record_soft(True)
+        return response, True
+    pacer.record(FAILURE)
+    pacer.record_soft(False)
+    return goto(page, url, pacer, **kwargs), False
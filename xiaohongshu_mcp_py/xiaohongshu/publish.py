@@ -1,16 +1,19 @@
 from loguru import logger
-import time
 import os
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu import waits
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.metrics import instrument
 
 
 class PublishAction:
-    def __init__(self, service):
+    def __init__(self, service, page=None):
         """初始化发布操作"""
         self.service = service
-        self.page = service.page
+        self.page = page or service.page
         self.publish_url = "https://creator.xiaohongshu.com/publish/publish-note"
     
+    @instrument('publish_content')
     def publish_content(self, data):
         """发布内容到小红书
         
@@ -28,39 +31,36 @@ class PublishAction:
                 raise ValueError("缺少必要的发布字段")
             
             # 导航到发布页面
-            self.page.goto(self.publish_url)
-            time.sleep(3)
+            self.timer.stage('goto')
+            navigate.goto(self.page, self.publish_url)
             
             # 1. 上传图片
+            self.timer.stage('upload')
             logger.info(f"正在上传 {len(data['images'])} 张图片")
             self._upload_images(data['images'])
-            time.sleep(2)
             
             # 2. 填写标题
+            self.timer.stage('input')
             if 'title' in data:
                 logger.info(f"正在设置标题: {data['title']}")
                 self.page.fill('input[placeholder="添加标题"]', data['title'])
-                time.sleep(1)
             
             # 3. 填写内容
             if 'content' in data:
                 logger.info("正在设置内容")
                 self.page.fill('textarea[placeholder="分享你的想法..."]', data['content'])
-                time.sleep(1)
             
             # 4. 添加标签
             if 'tags' in data and data['tags']:
                 logger.info(f"正在添加 {len(data['tags'])} 个标签")
                 for tag in data['tags']:
                     self._add_tag(tag)
-                    time.sleep(0.5)
             
             # 5. 添加话题
             if 'topics' in data and data['topics']:
                 logger.info(f"正在添加 {len(data['topics'])} 个话题")
                 for topic in data['topics']:
                     self._add_topic(topic)
-                    time.sleep(0.5)
             
             # 6. 发布
             # 注意：实际发布操作可能需要额外的确认步骤
@@ -84,6 +84,7 @@ class PublishAction:
             }
             
         except Exception as e:
+            self.timer.fail(e)
             logger.error(f"发布内容失败: {str(e)}")
             return {
                 "success": False,
@@ -108,8 +109,8 @@ class PublishAction:
             file_input = self.page.wait_for_selector('input[type="file"]', timeout=5000)
             file_input.set_input_files(valid_paths)
             
-            # 等待上传完成
-            time.sleep(3)  # 简单等待，实际应该检查上传状态
+            # 等待上传请求结束，最长等待配置的上限
+            waits.wait_for_network_idle(self.page)
             
         except PlaywrightTimeoutError:
             logger.error("未找到上传区域")
@@ -123,15 +124,13 @@ class PublishAction:
         try:
             # 点击标签输入区域
             self.page.click('button:has-text("添加标签")')
-            time.sleep(1)
             
-            # 输入标签内容
+            # 输入标签内容，fill 会自动等待输入框可用
             self.page.fill('input[placeholder="添加标签"]', tag)
-            time.sleep(0.5)
             
-            # 按回车确认
+            # 按回车确认，等待标签渲染完成
             self.page.keyboard.press('Enter')
-            time.sleep(0.5)
+            waits.wait_for_dom_stable(self.page, timeout=1000)
             
         except Exception as e:
             logger.warning(f"添加标签 {tag} 失败: {str(e)}")
@@ -142,15 +141,13 @@ class PublishAction:
         try:
             # 点击话题输入区域
             self.page.click('button:has-text("添加话题")')
-            time.sleep(1)
             
-            # 输入话题内容
+            # 输入话题内容，fill 会自动等待输入框可用
             self.page.fill('input[placeholder="搜索话题"]', topic)
-            time.sleep(0.5)
             
-            # 选择第一个搜索结果
+            # 选择第一个搜索结果，click 会等待搜索结果出现
             self.page.click('.topic-item')
-            time.sleep(0.5)
+            waits.wait_for_dom_stable(self.page, timeout=1000)
             
         except Exception as e:
             logger.warning(f"添加话题 {topic} 失败: {str(e)}")
@@ -1,15 +1,25 @@
 from loguru import logger
-import time
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from xiaohongshu_mcp_py.xiaohongshu import waits
+from xiaohongshu_mcp_py.xiaohongshu import navigate
+from xiaohongshu_mcp_py.xiaohongshu import extract
+from xiaohongshu_mcp_py.xiaohongshu import initial_state
+from xiaohongshu_mcp_py.xiaohongshu.capture import ResponseCapture, SEARCH_API_PATTERN
+from xiaohongshu_mcp_py.xiaohongshu.harvest import iter_cards
+from xiaohongshu_mcp_py.xiaohongshu.extract import SEARCH_CARD_FIELDS
+from xiaohongshu_mcp_py.metrics import instrument
 
 
 class SearchAction:
-    def __init__(self, service):
+    def __init__(self, service, page=None):
         """初始化搜索操作"""
         self.service = service
-        self.page = service.page
+        self.page = page or service.page
         self.search_url = "https://www.xiaohongshu.com/search_result/"
+        # 从结构化数据中获取到的完整笔记模型，供本地笔记存储使用
+        self.notes = []
     
+    @instrument('search_content')
     def search_content(self, keyword, page=1, size=20):
         """搜索小红书内容
         
@@ -29,26 +39,42 @@ class SearchAction:
             search_url = f"https://www.xiaohongshu.com/search_result/{keyword}?page={page}"
             logger.info(f"正在搜索关键词: {keyword} (第 {page} 页)")
             
-            # 导航到搜索页面
-            self.page.goto(search_url)
-            time.sleep(3)
-            
-            # 等待搜索结果加载
-            self.page.wait_for_selector('.note-item', timeout=10000)
-            
-            # 提取搜索结果
-            results = []
-            note_items = self.page.query_selector_all('.note-item')
-            
-            for item in note_items[:size]:  # 限制返回数量
-                try:
-                    # 提取笔记信息
-                    note_data = self._extract_note_data(item)
-                    if note_data:
-                        results.append(note_data)
-                except Exception as e:
-                    logger.warning(f"提取笔记数据失败: {str(e)}")
-                    continue
+            results = None
+            if initial_state.enabled():
+                # 优先使用初始状态和搜索接口返回的JSON，收集到 size 条后立即停止
+                with ResponseCapture(self.page, SEARCH_API_PATTERN, limit=size, match=keyword) as capture:
+                    # 导航到搜索页面，页面已预热时使用站内导航，搜索接口的响应由 capture 收集
+                    self.timer.stage('goto')
+                    response, soft = navigate.soft_goto(self.page, search_url, SEARCH_API_PATTERN, match=keyword)
+                    self.timer.stage('extract')
+                    if not soft:
+                        capture.add_notes(initial_state.feed_notes(initial_state.read_response(response), 'search'))
+                    capture.collect()
+                
+                if capture.notes:
+                    self.timer.stage('serialize')
+                    result = capture.search_result(keyword, page, size)
+                    self.notes = list(result.results)
+                    results = [initial_state.note_to_card(note, SEARCH_CARD_FIELDS) for note in result.results]
+            else:
+                # 导航到搜索页面
+                self.timer.stage('goto')
+                navigate.goto(self.page, search_url)
+            
+            if results is None:
+                # 等待搜索结果加载，并等待列表渲染稳定
+                self.timer.stage('wait')
+                self.page.wait_for_selector('.note-item', timeout=10000)
+                waits.wait_for_dom_stable(self.page, '.note-item')
+                
+                self.timer.stage('extract')
+                if initial_state.enabled():
+                    state = initial_state.read_page(self.page)
+                    results = initial_state.feed_cards(state, 'search', SEARCH_CARD_FIELDS, 0, size)
+            
+            if results is None:
+                # 初始状态不可用时，回退到一次性提取DOM中的搜索结果，限制返回数量
+                results = extract.extract_cards(self.page, SEARCH_CARD_FIELDS, 0, size)
             
             # 获取总页数信息（如果有）
             total_pages = self._get_total_pages()
@@ -61,7 +87,8 @@ class SearchAction:
                 "total_count": len(results)
             }
             
-        except PlaywrightTimeoutError:
+        except PlaywrightTimeoutError as e:
+            self.timer.fail(e)
             logger.error("搜索结果未找到或超时")
             return {
                 "keyword": keyword,
@@ -71,6 +98,7 @@ class SearchAction:
                 "error": "搜索结果加载超时"
             }
         except Exception as e:
+            self.timer.fail(e)
             logger.error(f"搜索失败: {str(e)}")
             return {
                 "keyword": keyword,
@@ -80,62 +108,23 @@ class SearchAction:
                 "error": str(e)
             }
     
-    def _extract_note_data(self, note_item):
-        """从笔记元素中提取数据"""
+    @instrument('stream_search')
+    def iter_results(self, keyword, harvest):
+        """打开搜索结果页，边滚动边产出 (卡片, Note 模型)，用于流式接口
+        
+        参数:
+            keyword: 搜索关键词
+            harvest: Harvest，控制数量上限、时间预算和去重
+        """
+        if not keyword:
+            raise ValueError("搜索关键词不能为空")
+        
+        logger.info(f"正在流式搜索关键词: {keyword}，上限 {harvest.limit} 条")
         try:
-            # 提取笔记ID和URL
-            note_link = note_item.query_selector('a')
-            if not note_link:
-                return None
-            
-            href = note_link.get_attribute('href')
-            note_id = self._extract_note_id(href)
-            
-            # 提取封面图
-            cover_img = note_item.query_selector('img')
-            cover_url = cover_img.get_attribute('src') if cover_img else ''
-            
-            # 提取标题
-            title_element = note_item.query_selector('.title')
-            title = title_element.inner_text() if title_element else ''
-            
-            # 提取用户信息
-            user_element = note_item.query_selector('.user-info')
-            if user_element:
-                username = user_element.query_selector('.username').inner_text() if user_element.query_selector('.username') else ''
-            else:
-                username = ''
-            
-            # 提取互动数据
-            likes_element = note_item.query_selector('.likes')
-            likes = likes_element.inner_text() if likes_element else '0'
-            
-            comments_element = note_item.query_selector('.comments')
-            comments = comments_element.inner_text() if comments_element else '0'
-            
-            return {
-                "note_id": note_id,
-                "title": title,
-                "cover_url": cover_url,
-                "username": username,
-                "likes": likes,
-                "comments": comments,
-                "url": href
-            }
-            
+            yield from iter_cards(self.page, f"{self.search_url}{keyword}", SEARCH_API_PATTERN, 'search', SEARCH_CARD_FIELDS, harvest, self.timer)
         except Exception as e:
-            logger.warning(f"提取笔记数据失败: {str(e)}")
-            return None
-    
-    def _extract_note_id(self, href):
-        """从URL中提取笔记ID"""
-        try:
-            # 假设URL格式为 /explore/6123456789abcdef
-            if href.startswith('/explore/'):
-                return href.split('/')[2]
-            return href
-        except:
-            return href
+            self.timer.fail(e)
+            raise
     
     def _get_total_pages(self):
         """获取总页数"""
@@ -0,0 +1,100 @@
+from loguru import logger
+import os
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+
+# 等待目标区域的 DOM 在 quietMs 内不再变化，超过 timeoutMs 返回 false
+DOM_STABLE_SCRIPT = """
+([selector, quietMs, timeoutMs]) => new Promise(resolve => {
+    const anchor = selector ? document.querySelector(selector) : null;
+    const target = anchor ? (anchor.parentElement || anchor) : document.body;
+    if (!target) {
+        resolve(false);
+        return;
+    }
+    let quietTimer = null;
+    let deadlineTimer = null;
+    let observer = null;
+    const finish = stable => {
+        if (observer) observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadlineTimer);
+        resolve(stable);
+    };
+    observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    observer.observe(target, {childList: true, subtree: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    deadlineTimer = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+# 匹配元素数量超过给定值
+COUNT_INCREASED_SCRIPT = "([selector, count]) => document.querySelectorAll(selector).length > count"
+
+# DOM 静默判定时长（毫秒）
+DOM_QUIET_MS = 300
+
+
+def max_wait_ms(default=3.0):
+    """就绪等待的上限（毫秒），由 WAIT_UPPER_BOUND（秒）配置"""
+    return int(float(os.environ.get('WAIT_UPPER_BOUND', default)) * 1000)
+
+
+def wait_for_any_selector(page, selectors, timeout=None):
+    """等待任意一个选择器出现
+
+    返回:
+        最先匹配到的选择器，超时返回 None
+    """
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        page.wait_for_selector(', '.join(selectors), timeout=timeout)
+    except PlaywrightTimeoutError:
+        return None
+
+    for selector in selectors:
+        if page.query_selector(selector):
+            return selector
+    return None
+
+
+def wait_for_dom_stable(page, selector=None, quiet_ms=DOM_QUIET_MS, timeout=None):
+    """等待 DOM 变化停止
+
+    参数:
+        selector: 观察该元素所在的容器，为空时观察整个 body
+        quiet_ms: 持续无变化多久视为稳定
+        timeout: 等待上限（毫秒）
+
+    返回:
+        是否在上限内稳定
+    """
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        return page.evaluate(DOM_STABLE_SCRIPT, [selector, quiet_ms, timeout])
+    except Exception as e:
+        logger.debug(f"等待 DOM 稳定失败: {str(e)}")
+        return False
+
+
+def wait_for_network_idle(page, timeout=None):
+    """等待网络空闲，超时返回 False"""
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        page.wait_for_load_state('networkidle', timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def wait_for_count_increase(page, selector, count, timeout=None):
+    """等待匹配元素数量超过 count（用于滚动加载），超时返回 False"""
+    timeout = max_wait_ms() if timeout is None else timeout
+    try:
+        page.wait_for_function(COUNT_INCREASED_SCRIPT, arg=[selector, count], timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False